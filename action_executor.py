@@ -0,0 +1,148 @@
+"""
+Bounded worker pool for hotkey actions.
+
+Hotkey callbacks are invoked on the keyboard hook thread, and Windows silently
+drops low-level hooks that take too long to return. So the hook only enqueues a
+small ActionRecord here and returns; a fixed set of long-lived workers runs the
+actual work (run_command, focus_window, open_url, ...).
+
+- max_workers: number of worker threads (created once)
+- max_queue: queue-depth limit; when full, drop_policy decides what is lost
+  ("drop_newest" rejects the new action, "drop_oldest" evicts the oldest queued one)
+- type_limits: optional per-action-type concurrency limit, e.g. {"focus": 1}
+- latency: optional LatencyStats; actions submitted with key-down/match
+  timestamps get their enqueue/start/end stamps recorded there
+"""
+import threading
+import time
+from collections import deque
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+
+
+class ActionRecord:
+    __slots__ = ("action_type", "func", "args", "label", "t_down", "t_match", "t_enqueue")
+
+    def __init__(self, action_type, func, args, label, t_down, t_match):
+        self.action_type = action_type
+        self.func = func
+        self.args = args
+        self.label = label
+        self.t_down = t_down
+        self.t_match = t_match
+        self.t_enqueue = time.perf_counter_ns()
+
+
+class ActionExecutor:
+    def __init__(self, max_workers=4, max_queue=32, type_limits=None, drop_policy=DROP_NEWEST, name="HotkeyAction", latency=None):
+        if drop_policy not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(1, int(max_queue))
+        self.type_limits = dict(type_limits or {})
+        self.drop_policy = drop_policy
+        self.latency = latency
+
+        self._queue = deque()
+        self._running_by_type = {}
+        self._cond = threading.Condition()
+        self._shutdown = False
+
+        # Counters
+        self.running = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+
+        self._workers = []
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"{name}-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, action_type, func, *args, label=None, t_down=None, t_match=None):
+        """
+        Enqueues an action and returns immediately. Safe to call from the hook
+        thread. Returns False if the action was dropped.
+        """
+        record = ActionRecord(action_type, func, args, label, t_down, t_match)
+        with self._cond:
+            if self._shutdown:
+                return False
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                if self.drop_policy == DROP_NEWEST:
+                    print(f"WARNING: Action queue full, dropped '{action_type}' action")
+                    return False
+                evicted = self._queue.popleft()
+                print(f"WARNING: Action queue full, dropped oldest '{evicted.action_type}' action")
+            self._queue.append(record)
+            self._cond.notify()
+        return True
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "running": self.running,
+                "dropped": self.dropped,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    def shutdown(self, wait=False):
+        with self._cond:
+            self._shutdown = True
+            self._queue.clear()
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _next_runnable(self):
+        # First queued action whose type is below its concurrency limit.
+        # The queue is bounded by max_queue, so this scan is bounded too.
+        for i, record in enumerate(self._queue):
+            limit = self.type_limits.get(record.action_type)
+            if limit is None or self._running_by_type.get(record.action_type, 0) < limit:
+                del self._queue[i]
+                return record
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                record = self._next_runnable()
+                while record is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    record = self._next_runnable()
+                self.running += 1
+                self._running_by_type[record.action_type] = self._running_by_type.get(record.action_type, 0) + 1
+
+            ok = True
+            t_start = time.perf_counter_ns()
+            try:
+                record.func(*record.args)
+            except Exception as e:
+                ok = False
+                print(f"ERROR in '{record.action_type}' action: {e}")
+                import traceback
+                traceback.print_exc()
+            t_end = time.perf_counter_ns()
+
+            if self.latency is not None and record.t_down is not None:
+                self.latency.record(record.label or record.action_type, record.action_type,
+                                    record.t_down, record.t_match, record.t_enqueue, t_start, t_end)
+
+            with self._cond:
+                self.running -= 1
+                self._running_by_type[record.action_type] -= 1
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                # A slot for this type freed up; wake workers waiting on it
+                self._cond.notify_all()
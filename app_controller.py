@@ -7,14 +7,19 @@ from PyQt6.QtGui import QIcon
 from ui.main_window import MainWindow
 from ui.tray_icon import TrayIcon
 from ui.ai_voice_widget import AiVoiceWidget
+from ui.snippet_popup import SnippetPopup
 from config_manager import ConfigManager
 from hotkey_manager import HotkeyManager
 from text_expander import TextExpander
 from workspace_manager import WorkspaceManager
 
+# Candidates listed in the snippet autocomplete popup
+AUTOCOMPLETE_LIMIT = 6
+
 # Signal helper to bridge threads
 class SignalHelper(QObject):
     launch_ai = pyqtSignal(str)
+    suggest_snippets = pyqtSignal(str)
 
 class AppController:
     def __init__(self):
@@ -25,6 +30,7 @@ class AppController:
         self.workspace_manager = None
         self.main_window = None
         self.tray_icon = None
+        self.snippet_popup = None
         self.ai_widgets = []
         self.signal_helper = SignalHelper()
 
@@ -61,10 +67,17 @@ class AppController:
 
     def initialize_ui(self):
         print("Initializing UI...")
-        self.main_window = MainWindow(self.config_manager, self.workspace_manager)
+        self.main_window = MainWindow(self.config_manager, self.workspace_manager, self.hotkey_manager, self.text_expander)
         self.tray_icon = TrayIcon(self.main_window)
         self.tray_icon.show()
 
+        # Snippet autocomplete: the expander reports the typed prefix from the
+        # hook thread; the lookup and the popup run here on the UI thread
+        self.snippet_popup = SnippetPopup()
+        self.signal_helper.suggest_snippets.connect(self.show_snippet_suggestions)
+        self.text_expander.on_suggest = self.signal_helper.suggest_snippets.emit
+        self.snippet_popup.snippet_chosen.connect(self.text_expander.accept_suggestion)
+
         # Connect Signals
         self._connect_signals()
         
@@ -83,13 +96,13 @@ class AppController:
         
         # Hotkey Management Signals
         self.main_window.add_hotkey_signal.connect(
-            lambda t, typ, tar, sup, lp, name: [self.config_manager.add_hotkey(t, typ, tar, sup, lp, name), self.refresh_hotkeys()]
+            lambda data: [self.add_hotkey(data), self.refresh_hotkeys()]
         )
         self.main_window.remove_hotkey_signal.connect(
             lambda idx: [self.config_manager.remove_hotkey(idx), self.refresh_hotkeys()]
         )
         self.main_window.toggle_hotkey_signal.connect(
-            lambda idx, state: [self.config_manager.update_hotkey_status(idx, state), self.refresh_hotkeys()]
+            lambda idx, state: [self.config_manager.update_hotkey_status(idx, state), self.refresh_hotkey_status(idx)]
         )
         self.main_window.update_hotkey_signal.connect(
             lambda idx, data: [self.config_manager.update_hotkey(idx, data), self.refresh_hotkeys()]
@@ -98,7 +111,7 @@ class AppController:
         # Text Expansion Signals
         te_tab = self.main_window.text_expansion_tab
         te_tab.add_snippet_signal.connect(
-            lambda trig, repl: [self.config_manager.add_snippet(trig, repl), self.refresh_snippets()]
+            lambda trig, repl, mode: [self.config_manager.add_snippet(trig, repl, mode), self.refresh_snippets()]
         )
         te_tab.remove_snippet_signal.connect(
             lambda idx: [self.config_manager.remove_snippet(idx), self.refresh_snippets()]
@@ -107,7 +120,7 @@ class AppController:
             lambda idx, state: [self.config_manager.update_snippet_status(idx, state), self.refresh_snippets()]
         )
         te_tab.update_snippet_signal.connect(
-            lambda idx, trig, repl: [self.config_manager.update_snippet(idx, trig, repl), self.refresh_snippets()]
+            lambda idx, trig, repl, mode: [self.config_manager.update_snippet(idx, trig, repl, mode), self.refresh_snippets()]
         )
         
         # Import/Export
@@ -115,6 +128,11 @@ class AppController:
             lambda: [self.refresh_hotkeys(), self.refresh_snippets()]
         )
 
+    def add_hotkey(self, data):
+        # data comes from AddHotkeyDialog.get_data()
+        options = dict(data)
+        self.config_manager.add_hotkey(options.pop("trigger"), options.pop("type"), options.pop("target"), **options)
+
     def start_listeners(self):
         self.hotkey_manager.start_listener()
         self.text_expander.start_listener()
@@ -122,15 +140,32 @@ class AppController:
     def stop_listeners(self):
         self.hotkey_manager.stop_listener()
         self.text_expander.stop_listener()
+        if self.snippet_popup:
+            self.snippet_popup.hide()
 
     def refresh_hotkeys(self):
         if self.hotkey_manager.is_running:
             self.hotkey_manager.reload_hotkeys()
 
+    def refresh_hotkey_status(self, index):
+        # Single toggle: add/remove just that binding instead of a full reload
+        hotkeys = self.config_manager.get_hotkeys()
+        if self.hotkey_manager.is_running and 0 <= index < len(hotkeys):
+            self.hotkey_manager.update_hotkey_status(hotkeys[index])
+
     def refresh_snippets(self):
         if self.text_expander.is_running:
             self.text_expander.reload_snippets()
 
+    def show_snippet_suggestions(self, prefix):
+        if not prefix or not self.text_expander.is_running:
+            self.snippet_popup.hide()
+            return
+        candidates = self.text_expander.index.complete(prefix, AUTOCOMPLETE_LIMIT)
+        # Only these few bodies are read, through the store's cache
+        self.snippet_popup.show_candidates(
+            [(trigger, self.config_manager.get_snippet_text(snippet) or "") for trigger, snippet in candidates])
+
     def launch_ai_voice(self, url):
         print(f"Launching AI Voice: {url}")
         try:
@@ -163,4 +198,6 @@ class AppController:
         self.initialize_core()
         self.initialize_ui()
         
-        sys.exit(self.app.exec())
+        exit_code = self.app.exec()
+        self.config_manager.close()
+        sys.exit(exit_code)
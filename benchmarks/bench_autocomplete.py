@@ -0,0 +1,68 @@
+"""
+Autocomplete lookup cost of SnippetIndex with many snippets.
+
+Builds an index of 50000 random triggers, a thousand of which have usage
+history, and times complete() for prefixes of 1 to 4 characters, plus the
+incremental update() after editing one snippet:
+
+    python benchmarks/bench_autocomplete.py
+
+Every lookup should stay well under a millisecond.
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snippet_index import SnippetIndex
+
+SNIPPETS = 50000
+USED = 1000
+LOOKUPS = 2000
+
+
+def make_snippets(count, rng):
+    triggers = set()
+    while len(triggers) < count:
+        triggers.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10))))
+    return [(trigger, f"replacement for {trigger}") for trigger in sorted(triggers)]
+
+
+def main():
+    rng = random.Random(7)
+    snippets = make_snippets(SNIPPETS, rng)
+    index = SnippetIndex()
+
+    start = time.perf_counter()
+    index.update(snippets)
+    print(f"initial build: {(time.perf_counter() - start) * 1000:.1f} ms for {len(index)} snippets")
+
+    now = time.time()
+    for trigger, _ in rng.sample(snippets, USED):
+        for _ in range(rng.randint(1, 5)):
+            index.record_use(trigger, when=now - rng.uniform(0, 30 * 24 * 3600))
+
+    print(f"{'prefix len':>10} {'us/lookup':>10} {'worst us':>10}")
+    for length in (1, 2, 3, 4):
+        prefixes = [trigger[:length] for trigger, _ in rng.sample(snippets, LOOKUPS)]
+        worst = 0.0
+        start = time.perf_counter()
+        for prefix in prefixes:
+            t = time.perf_counter()
+            index.complete(prefix)
+            worst = max(worst, time.perf_counter() - t)
+        elapsed = time.perf_counter() - start
+        print(f"{length:>10} {elapsed / LOOKUPS * 1e6:>10.1f} {worst * 1e6:>10.1f}")
+
+    edited = list(snippets)
+    edited[rng.randrange(len(edited))] = ("brandnewtrigger", "new")
+    start = time.perf_counter()
+    index.update(edited)
+    print(f"update after editing one snippet: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Per-event cost of the chord dispatcher versus the number of bindings.
+
+Feeds synthetic key events straight into ChordDispatcher.handle_event (no real
+keyboard hook is installed), so it runs on any platform:
+
+    python benchmarks/bench_dispatch.py
+
+The ns/event column should stay roughly flat from 10 to 10000 bindings. Half
+of the bindings are two-stroke sequences ("ctrl+k, <chord>") so the trie walk
+is measured as well.
+"""
+import os
+import sys
+import time
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chord_dispatcher import ChordDispatcher, BindingTable, Binding, parse_sequence
+
+
+_scan_codes = {}
+
+
+class FakeEvent:
+    __slots__ = ("name", "event_type", "scan_code")
+
+    def __init__(self, name, event_type):
+        self.name = name
+        self.event_type = event_type
+        # One made-up scan code per key name, as a real keyboard reports them
+        self.scan_code = _scan_codes.setdefault(name, len(_scan_codes) + 1)
+
+
+KEYS = "abcdefghijklmnopqrstuvwxyz0123456789"
+MODIFIER_SETS = ["ctrl", "alt", "shift", "windows", "ctrl+alt", "ctrl+shift",
+                 "alt+shift", "ctrl+alt+shift", "ctrl+windows", "alt+windows"]
+
+
+def make_triggers(count):
+    triggers = []
+    for size in itertools.count(1):
+        for mods in MODIFIER_SETS:
+            for keys in itertools.combinations(KEYS, size):
+                triggers.append(mods + "+" + "+".join(keys))
+                if len(triggers) == count:
+                    return triggers
+
+
+def build_dispatcher(count):
+    table = BindingTable()
+    for i, trigger in enumerate(make_triggers(count)):
+        if i % 2:
+            trigger = "ctrl+k, " + trigger
+        table.add(parse_sequence(trigger), Binding(trigger, lambda t_down, t_match: None))
+    dispatcher = ChordDispatcher()
+    dispatcher.set_table(table)
+    return dispatcher
+
+
+def typing_stream():
+    # Ordinary typing plus a few modifier chords, most of which miss the table
+    events = []
+    for ch in "the quick brown fox jumps over the lazy dog":
+        name = "space" if ch == " " else ch
+        events.append(FakeEvent(name, "down"))
+        events.append(FakeEvent(name, "up"))
+    for chord in ("ctrl+c", "ctrl+alt+t", "alt+shift+z", "ctrl+k", "ctrl+alt+b"):
+        keys = chord.split("+")
+        events.extend(FakeEvent(k, "down") for k in keys)
+        events.extend(FakeEvent(k, "up") for k in reversed(keys))
+    return events
+
+
+def bench(count, rounds=2000):
+    dispatcher = build_dispatcher(count)
+    events = typing_stream()
+    handle = dispatcher.handle_event
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for event in events:
+            handle(event)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(events)) * 1e9
+
+
+def main():
+    print(f"{'bindings':>10} {'ns/event':>10}")
+    for count in (10, 100, 1000, 10000):
+        print(f"{count:>10} {bench(count):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
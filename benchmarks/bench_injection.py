@@ -0,0 +1,98 @@
+"""
+Latency of a snippet swap and its undo: the old event-by-event injection
+with fixed sleeps versus one batched input_injection.replace() call.
+
+No real input is injected. input_injection.backend is replaced by a fake
+system that echoes every event straight back through is_injected(), the way
+the keyboard hook would, so it runs on any platform:
+
+    python benchmarks/bench_injection.py
+
+"calls" is the number of separate injection calls made. The old swap spends
+100 ms in fixed sleeps, and the old undo sleeps 10 ms per deleted character.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import input_injection
+
+
+class FakeEvent:
+    __slots__ = ("name", "event_type", "_injected")
+
+    def __init__(self, name, event_type):
+        self.name = name
+        self.event_type = event_type
+
+
+class FakeSystem:
+    """Counts injection calls and hands each injected key event back to the hook check."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def inject(self, inputs):
+        self.calls += 1
+        for key, value in inputs:
+            if key is not None:
+                input_injection.is_injected(FakeEvent(key, "down" if value else "up"))
+
+
+def legacy_swap(system, trigger, delimiter):
+    # The old _perform_swap: sleep, backspaces, sleep, Ctrl+V
+    time.sleep(0.05)
+    for _ in range(len(trigger) + len(delimiter)):
+        system.inject([("backspace", True), ("backspace", False)])
+    time.sleep(0.05)
+    system.inject([("ctrl", True), ("v", True), ("v", False), ("ctrl", False)])
+
+
+def legacy_undo(system, trigger, replacement, delimiter):
+    # The old _perform_undo: one backspace per character with a 10 ms sleep each
+    for _ in range(len(replacement) - 1):
+        system.inject([("backspace", True), ("backspace", False)])
+        time.sleep(0.01)
+    time.sleep(0.05)
+    system.inject([(None, char) for char in trigger + delimiter])
+
+
+def batched_swap(trigger, delimiter):
+    input_injection.replace(len(trigger) + len(delimiter), paste=True).wait()
+
+
+def batched_undo(trigger, replacement, delimiter):
+    input_injection.replace(len(replacement) - 1, trigger + delimiter).wait()
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    system = FakeSystem()
+    input_injection.backend = system.inject
+    trigger, delimiter = "addr", " "
+
+    print(f"{'chars':>6} {'':>6} {'old ms':>9} {'new ms':>9} {'old calls':>10} {'new calls':>10}")
+    for length in (10, 100, 500):
+        replacement = "x" * length
+        rows = (
+            ("swap", (legacy_swap, system, trigger, delimiter), (batched_swap, trigger, delimiter)),
+            ("undo", (legacy_undo, system, trigger, replacement, delimiter), (batched_undo, trigger, replacement, delimiter)),
+        )
+        for name, legacy, batched in rows:
+            system.calls = 0
+            old_ms = timed(*legacy)
+            old_calls = system.calls
+            system.calls = 0
+            new_ms = timed(*batched)
+            print(f"{length:>6} {name:>6} {old_ms:>9.1f} {new_ms:>9.2f} {old_calls:>10} {system.calls:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Memoized chord compiler.
+
+Turns a trigger string such as "Alt+Ctrl+T" or "ctrl+k, ctrl+c" into an
+immutable CompiledTrigger: the canonical key sets the dispatcher matches on,
+the canonical text (modifiers first in a fixed order), the left/right
+variants each key stands for, and the scan codes `keyboard` would resolve.
+
+Results are cached by (trigger string, keyboard layout). Every registration
+path (hotkeys, workspace launch hotkeys, long-press replay) compiles through
+here, so reloading the same hotkeys again parses and resolves nothing.
+"""
+import threading
+
+import keyboard
+
+from chord_dispatcher import KEY_ALIASES, MODIFIER_KEYS, parse_sequence
+
+MODIFIER_ORDER = ("ctrl", "alt", "shift", "windows")
+
+# Canonical names `keyboard` does not know under that name
+_KEYBOARD_NAMES = {"comma": ",", "plus": "+"}
+
+# Canonical key -> every raw name that collapses onto it
+KEY_VARIANTS = {}
+for _raw, _key in KEY_ALIASES.items():
+    KEY_VARIANTS.setdefault(_key, [_key]).append(_raw)
+KEY_VARIANTS = {key: tuple(names) for key, names in KEY_VARIANTS.items()}
+
+
+def _sorted_keys(chord):
+    modifiers = [m for m in MODIFIER_ORDER if m in chord]
+    return tuple(modifiers) + tuple(sorted(chord - MODIFIER_KEYS))
+
+
+class CompiledTrigger:
+    """
+    strokes:    tuple of frozensets, one per stroke (what the dispatcher matches)
+    keys:       the same strokes as tuples in canonical order
+    text:       canonical trigger, e.g. "ctrl+alt+t" or "ctrl+k, ctrl+c"
+    variants:   canonical key -> raw key names it stands for ("ctrl" -> "left ctrl", ...)
+    scan_codes: per stroke, per key, the scan codes to press; None if a key
+                could not be resolved on this layout
+    """
+    __slots__ = ("trigger", "strokes", "keys", "text", "variants", "scan_codes", "layout")
+
+    def __init__(self, trigger, strokes, scan_codes, layout):
+        keys = tuple(_sorted_keys(chord) for chord in strokes)
+        object.__setattr__(self, "trigger", trigger)
+        object.__setattr__(self, "strokes", strokes)
+        object.__setattr__(self, "keys", keys)
+        object.__setattr__(self, "text", ", ".join("+".join(stroke) for stroke in keys))
+        object.__setattr__(self, "variants", {key: KEY_VARIANTS.get(key, (key,)) for chord in strokes for key in chord})
+        object.__setattr__(self, "scan_codes", scan_codes)
+        object.__setattr__(self, "layout", layout)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledTrigger is immutable")
+
+    def __len__(self):
+        return len(self.strokes)
+
+    def __repr__(self):
+        return f"CompiledTrigger({self.text!r})"
+
+
+class ChordCompiler:
+    def __init__(self, resolver=None, layout_getter=None):
+        # resolver(name) -> tuple of scan codes, raises ValueError for unknown keys
+        self.resolver = resolver or keyboard.key_to_scan_codes
+        self.layout_getter = layout_getter or _current_layout
+        self.layout = self.layout_getter()
+        self._cache = {} # (trigger, layout) -> CompiledTrigger
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def refresh_layout(self):
+        """Re-reads the keyboard layout; call once per reload, not per trigger."""
+        layout = self.layout_getter()
+        if layout != self.layout:
+            print(f"DEBUG: Keyboard layout changed ({self.layout} -> {layout})")
+            self.layout = layout
+        return layout
+
+    def compile(self, trigger):
+        """Returns the CompiledTrigger for a trigger string. Raises ValueError if it is empty."""
+        key = (trigger, self.layout)
+        compiled = self._cache.get(key)
+        if compiled is not None:
+            self.hits += 1
+            return compiled
+
+        strokes = parse_sequence(trigger)
+        compiled = CompiledTrigger(trigger, strokes, self._resolve(strokes), self.layout)
+        with self._lock:
+            self.misses += 1
+            return self._cache.setdefault(key, compiled)
+
+    def _resolve(self, strokes):
+        try:
+            return tuple(
+                tuple(tuple(self.resolver(_KEYBOARD_NAMES.get(name, name))) for name in _sorted_keys(chord))
+                for chord in strokes
+            )
+        except (ValueError, KeyError, OSError):
+            # OSError: the layout cannot be read at all (no dumpkeys on Linux)
+            return None
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+def _current_layout():
+    try:
+        import win32api
+        return win32api.GetKeyboardLayout(0)
+    except Exception:
+        return None
+
+
+compiler = ChordCompiler()
+
+
+def compile_trigger(trigger):
+    return compiler.compile(trigger)
@@ -0,0 +1,569 @@
+"""
+Single-hook chord dispatcher.
+
+Instead of registering one keyboard.add_hotkey handler per binding (which makes
+the keyboard library walk every handler on every key event), HotkeyManager
+installs ONE hook and forwards each event here. The set of currently held keys
+is kept as a canonical frozenset and resolved against the binding table with a
+single dict lookup, so the per-event cost stays flat whatever the binding count.
+Held keys are tracked by scan code, since the name `keyboard` reports for a key
+changes with shift ("!" going down, "1" coming up).
+
+Multi-step sequences such as "ctrl+k, ctrl+c" are stored as a trie of chords
+and walked by a small state machine: one dict lookup per keystroke whatever
+the number of sequences, with an inter-stroke timeout and instant rejection
+of a stroke that matches no continuation. The strokes leading into a
+suppressing sequence are held back too, and given back through `replay` if
+the sequence is abandoned or times out.
+
+Long-press bindings live in the same table. They are resolved from the
+key-down/key-up events themselves plus one deadline on the shared
+DeadlineScheduler, so a press creates no threads and nothing polls key state.
+Tap and double-tap bindings are likewise recognised from the timestamps of
+the events alone, with a fixed amount of state in the dispatcher.
+
+This module deliberately does not import `keyboard`, so the matching logic can
+be exercised (and benchmarked) without a real keyboard hook.
+"""
+import threading
+import time
+
+from deadline_scheduler import DeadlineScheduler
+
+# Left/right variants and common spellings collapse onto the names used by
+# KeyRecorder ("ctrl", "alt", "shift", "windows").
+KEY_ALIASES = {
+    "control": "ctrl",
+    "left ctrl": "ctrl",
+    "right ctrl": "ctrl",
+    "left control": "ctrl",
+    "right control": "ctrl",
+    "left shift": "shift",
+    "right shift": "shift",
+    "left alt": "alt",
+    "right alt": "alt",
+    "alt gr": "alt",
+    "win": "windows",
+    "left windows": "windows",
+    "right windows": "windows",
+    "cmd": "windows",
+    "command": "windows",
+    "super": "windows",
+    "return": "enter",
+    "escape": "esc",
+    "del": "delete",
+    "ins": "insert",
+    "page up": "pageup",
+    "page down": "pagedown",
+    # ',' and '+' separate strokes and keys in a trigger, so those keys go by name
+    ",": "comma",
+    "+": "plus",
+}
+
+MODIFIER_KEYS = frozenset(("ctrl", "alt", "shift", "windows"))
+
+# What a binding does when its chord is pressed again before being released
+# (OS autorepeat) or in quick succession. Stored as-is in config.json.
+REPEAT_ONCE = "once" # fire once per physical press, ignore autorepeat
+REPEAT_DEBOUNCE = "debounce" # fire only after repeat_interval without any trigger event
+REPEAT_RATE = "rate" # allow autorepeat, but at most once per repeat_interval
+REPEAT_ALWAYS = "always" # fire on every key-down event, autorepeat included
+REPEAT_POLICIES = (REPEAT_ONCE, REPEAT_DEBOUNCE, REPEAT_RATE, REPEAT_ALWAYS)
+
+# How a chord has to be pressed to trigger a binding. Stored as-is in config.json.
+GESTURE_PRESS = "press" # on key-down, the default
+GESTURE_HOLD = "hold" # held for long_press_delay
+GESTURE_TAP = "tap" # pressed and released alone within tap_timeout
+GESTURE_DOUBLE_TAP = "double_tap" # tapped twice within double_tap_interval, fires on the second press
+GESTURES = (GESTURE_PRESS, GESTURE_HOLD, GESTURE_TAP, GESTURE_DOUBLE_TAP)
+
+# Cache of raw event name -> canonical name, so the hook path does a single
+# dict lookup per event instead of lower()/strip() on every keystroke.
+_normalized_names = {}
+# Trigger string -> parsed strokes. Triggers come from a small, stable set
+# (the config), so this never needs evicting.
+_parsed_sequences = {}
+
+
+def normalize_key(name):
+    """Returns the canonical name for a key, e.g. 'Right Ctrl' -> 'ctrl'."""
+    cached = _normalized_names.get(name)
+    if cached is not None:
+        return cached
+    key = name.strip().lower()
+    key = KEY_ALIASES.get(key, key)
+    _normalized_names[name] = key
+    return key
+
+
+def parse_chord(trigger):
+    """
+    Parses a single chord like 'ctrl+alt+t' into its canonical form: a
+    frozenset of normalized key names. Order of keys does not matter.
+    """
+    keys = frozenset(normalize_key(part) for part in trigger.split("+") if part.strip())
+    if not keys:
+        raise ValueError(f"Empty hotkey trigger: '{trigger}'")
+    return keys
+
+
+def parse_sequence(trigger):
+    """
+    Parses a trigger into a tuple of chords. 'ctrl+alt+t' gives one chord,
+    'ctrl+k, ctrl+c' gives two. Results are memoized by trigger string.
+    """
+    strokes = _parsed_sequences.get(trigger)
+    if strokes is not None:
+        return strokes
+    strokes = tuple(parse_chord(step) for step in trigger.split(",") if step.strip())
+    if not strokes:
+        raise ValueError(f"Empty hotkey trigger: '{trigger}'")
+    _parsed_sequences[trigger] = strokes
+    return strokes
+
+
+class Binding:
+    """
+    A compiled hotkey: the callback to run and whether to block the key.
+    The callback is called as callback(t_down, t_match) with the
+    time.perf_counter_ns() stamps of the key-down and of the match.
+    long_press_delay (seconds) makes it fire only once the chord has been held
+    that long; a shorter press is replayed to the system if it was suppressed.
+    `gesture` is one of the GESTURE_* values (GESTURE_HOLD when long_press_delay
+    is set). Tap gestures never suppress: the key still has to work normally.
+
+    `repeat` is one of the REPEAT_* policies. Its state lives in plain slots so
+    enforcing it on the hook thread allocates nothing; `coalesced` counts the
+    events it swallowed.
+    """
+    __slots__ = ("trigger", "callback", "suppress", "long_press_delay", "gesture",
+                 "repeat", "repeat_interval_ns", "last_fire_ns", "coalesced")
+
+    def __init__(self, trigger, callback, suppress=False, long_press_delay=None,
+                 repeat=REPEAT_ONCE, repeat_interval=0.0, gesture=GESTURE_PRESS):
+        if long_press_delay is not None:
+            gesture = GESTURE_HOLD
+        elif gesture not in (GESTURE_TAP, GESTURE_DOUBLE_TAP):
+            gesture = GESTURE_PRESS
+        self.trigger = trigger
+        self.callback = callback
+        self.suppress = suppress and gesture in (GESTURE_PRESS, GESTURE_HOLD)
+        self.long_press_delay = long_press_delay
+        self.gesture = gesture
+        self.repeat = repeat if repeat in REPEAT_POLICIES else REPEAT_ONCE
+        self.repeat_interval_ns = int(repeat_interval * 1e9)
+        self.last_fire_ns = -(1 << 62)
+        self.coalesced = 0
+
+    def should_fire(self, is_repeat, now_ns):
+        """Applies the repeat policy to one trigger event."""
+        repeat = self.repeat
+        if repeat == REPEAT_ONCE:
+            allowed = not is_repeat
+        elif repeat == REPEAT_ALWAYS:
+            allowed = True
+        elif repeat == REPEAT_DEBOUNCE:
+            allowed = now_ns - self.last_fire_ns >= self.repeat_interval_ns
+        else: # REPEAT_RATE
+            allowed = not is_repeat or now_ns - self.last_fire_ns >= self.repeat_interval_ns
+
+        if allowed or repeat == REPEAT_DEBOUNCE:
+            # Debounce measures quiet time, so swallowed events restart it too
+            self.last_fire_ns = now_ns
+        if not allowed:
+            self.coalesced += 1
+        return allowed
+
+    def __repr__(self):
+        return f"Binding({self.trigger!r}, gesture={self.gesture}, suppress={self.suppress}, long_press_delay={self.long_press_delay})"
+
+
+class LongPress:
+    """State of the long-press chord currently being held."""
+    __slots__ = ("key", "chord", "bindings", "suppress", "deadline", "call", "fired")
+
+    def __init__(self, key, chord, bindings, suppress, deadline):
+        self.key = key # held id (scan code) of the key whose press completed the chord
+        self.chord = chord
+        self.bindings = bindings
+        self.suppress = suppress
+        self.deadline = deadline
+        self.call = None
+        self.fired = False
+
+
+class ChordNode:
+    """
+    One chord in the trie. `bindings` fire when the strokes leading here have
+    been typed; `children` maps the chords that may follow (None for a leaf).
+    `suppressing` counts the suppressing bindings further down, which need
+    this stroke held back too.
+    """
+    __slots__ = ("bindings", "children", "suppressing")
+
+    def __init__(self):
+        self.bindings = ()
+        self.children = None
+        self.suppressing = 0
+
+    def copy(self):
+        node = ChordNode()
+        node.bindings = self.bindings
+        node.suppressing = self.suppressing
+        if self.children:
+            node.children = {chord: child.copy() for chord, child in self.children.items()}
+        return node
+
+    def binding_count(self):
+        count = len(self.bindings)
+        if self.children:
+            count += sum(child.binding_count() for child in self.children.values())
+        return count
+
+
+class BindingTable(dict):
+    """
+    Root of the chord trie: chord (frozenset) -> ChordNode. Single-chord
+    hotkeys are root-level nodes without children.
+
+    Binding tuples are replaced as a whole and nodes are inserted into their
+    parent only once created, so the hook thread always sees either the old or
+    the new state, never a partial one.
+    """
+
+    def add(self, strokes, binding):
+        level = self
+        last = len(strokes) - 1
+        for i, chord in enumerate(strokes):
+            node = level.get(chord)
+            if node is None:
+                node = ChordNode()
+                level[chord] = node
+            if i == last:
+                node.bindings = node.bindings + (binding,)
+            else:
+                if binding.suppress:
+                    node.suppressing += 1
+                if node.children is None:
+                    node.children = {}
+                level = node.children
+
+    def discard(self, strokes, binding):
+        path = []
+        level = self
+        for chord in strokes:
+            node = level.get(chord) if level else None
+            if node is None:
+                return
+            path.append((level, chord, node))
+            level = node.children
+
+        node = path[-1][2]
+        if binding not in node.bindings:
+            return
+        node.bindings = tuple(b for b in node.bindings if b is not binding)
+        if binding.suppress:
+            for _, _, parent in path[:-1]:
+                parent.suppressing -= 1
+        # Prune nodes that no longer lead anywhere
+        for depth in range(len(path) - 1, -1, -1):
+            level, chord, node = path[depth]
+            if node.bindings or node.children:
+                break
+            del level[chord]
+            if depth > 0 and not level:
+                # Parent node lost its last child
+                path[depth - 1][2].children = None
+
+    def copy(self):
+        return BindingTable((chord, node.copy()) for chord, node in self.items())
+
+    def binding_count(self):
+        return sum(node.binding_count() for node in self.values())
+
+
+class ChordDispatcher:
+    def __init__(self, scheduler=None):
+        self.table = BindingTable()
+        self.scheduler = scheduler or DeadlineScheduler("HotkeyScheduler")
+        # Called as replay(trigger) to re-send a suppressed short press of a long-press chord
+        self.replay = None
+        # Called as injected(event); True for keystrokes the app synthesized itself,
+        # which pass straight through without touching any state
+        self.injected = None
+        self.sequence_timeout = 1.0 # seconds allowed between strokes of a sequence
+        self.tap_timeout = 0.25 # seconds a chord may be held and still count as a tap
+        self.double_tap_interval = 0.3 # seconds allowed between the release of a tap and the next press
+        # Scan code -> canonical key name for the keys the bindings use. The
+        # name `keyboard` reports depends on the modifiers ("!" for shift+1),
+        # the scan code does not. Filled in by HotkeyManager on reload.
+        self.scan_names = {}
+        # Called as key_state(scan_code) -> True/False (None if unknown) with the
+        # OS's own view of a key. Held keys it reports as up are dropped.
+        self.key_state = None
+        # Held keys by scan code (by name for events without one) -> the
+        # canonical name they went down as, so the up event finds them even
+        # when it is reported under another name
+        self._held = {}
+        self._held_chord = frozenset()
+        self._suppressed = set() # held keys whose 'down' we blocked, so we block the 'up' too
+        self._lock = threading.Lock() # guards _long_press (hook thread vs scheduler thread)
+        self._long_press = None
+        self._sequence_node = None # trie node reached by the strokes typed so far
+        self._sequence_deadline = 0.0
+        # Strokes of a suppressing sequence held back until it completes; given
+        # back through `replay` if it is abandoned or times out (guarded by _lock)
+        self._swallowed = ()
+        self._sequence_call = None
+        # Tap engine: the chord whose release may complete a tap, as
+        # (chord, bindings, t_down, counts_for_double_tap), and the last completed tap
+        self._tap = None
+        self._last_tap_chord = None
+        self._last_tap_ns = 0
+
+    def set_table(self, table):
+        # Single attribute assignment: the hook thread picks up the new table
+        # on its next event without any window where nothing is bound.
+        self.table = table
+
+    def reset(self):
+        with self._lock:
+            if self._long_press is not None:
+                self.scheduler.cancel(self._long_press.call)
+                self._long_press = None
+        self._end_sequence()
+        self._held.clear()
+        self._held_chord = frozenset()
+        self._suppressed.clear()
+        self._sequence_node = None
+        self._tap = None
+        self._last_tap_chord = None
+
+    def handle_event(self, event):
+        """
+        keyboard.hook callback. Returns False to suppress the event, True to
+        let it through to other applications.
+        """
+        name = event.name
+        if not name:
+            return True
+        if self.injected is not None and self.injected(event):
+            return True
+        code = event.scan_code
+        key = self.scan_names.get(code) or normalize_key(name)
+        held_id = code if code is not None else key
+
+        if event.event_type == "down":
+            t_down = time.perf_counter_ns()
+            long_press = self._long_press
+            is_repeat = held_id in self._held
+            if not is_repeat:
+                if self._held and self.key_state is not None:
+                    self._drop_released_keys()
+                    long_press = self._long_press
+                self._held[held_id] = key
+                self._held_chord = frozenset(self._held.values())
+                if long_press is not None:
+                    # Another key joined the chord before the threshold: short press
+                    self._end_long_press(long_press)
+                # Another key joined: whatever was held is no longer a tap
+                self._tap = None
+                if self._last_tap_chord is not None and not self._held_chord <= self._last_tap_chord:
+                    self._last_tap_chord = None
+            elif long_press is not None and held_id == long_press.key:
+                # Autorepeat while a long press is pending or has fired
+                return not long_press.suppress
+            elif self._swallowed and held_id in self._suppressed:
+                # Autorepeat of a stroke held back for a sequence
+                return False
+
+            node = None
+            abandoned = ()
+            if self._sequence_node is not None:
+                if time.monotonic() > self._sequence_deadline:
+                    self._sequence_node = None
+                    abandoned = self._end_sequence() if self._swallowed else ()
+                else:
+                    node = self._sequence_node.children.get(self._held_chord)
+                    if node is None:
+                        if key in MODIFIER_KEYS:
+                            # Still building the next stroke
+                            return True
+                        # No continuation: drop the sequence and try from the root
+                        self._sequence_node = None
+                        abandoned = self._end_sequence() if self._swallowed else ()
+            if node is None:
+                node = self.table.get(self._held_chord)
+                if node is None:
+                    if abandoned:
+                        # Give the held-back strokes back, and this one after them
+                        self._replay_strokes(abandoned + (self._held_chord,))
+                        self._suppressed.add(held_id)
+                        return False
+                    return True
+            if abandoned:
+                self._replay_strokes(abandoned)
+
+            if node.children:
+                self._sequence_node = node
+                self._sequence_deadline = time.monotonic() + self.sequence_timeout
+            else:
+                self._sequence_node = None
+                if self._swallowed:
+                    # Sequence complete: the held-back strokes were part of it
+                    self._end_sequence()
+
+            bindings = node.bindings
+            suppress = False
+            long_presses = None
+            taps = False
+            double_tapped = False
+            t_match = time.perf_counter_ns()
+            for binding in bindings:
+                gesture = binding.gesture
+                if gesture == GESTURE_PRESS:
+                    if binding.should_fire(is_repeat, t_down):
+                        self._fire(binding, t_down, t_match)
+                elif gesture == GESTURE_HOLD:
+                    long_presses = (long_presses or ()) + (binding,)
+                elif not is_repeat:
+                    taps = True
+                    if (gesture == GESTURE_DOUBLE_TAP and self._last_tap_chord == self._held_chord
+                            and t_down - self._last_tap_ns <= self.double_tap_interval * 1e9):
+                        double_tapped = True
+                        self._fire(binding, t_down, t_match)
+                if binding.suppress:
+                    suppress = True
+            if node.children and node.suppressing and not suppress:
+                # A suppressing sequence goes on from here: hold the stroke back
+                self._swallow(self._held_chord)
+                suppress = True
+            if long_presses:
+                self._start_long_press(held_id, long_presses)
+            if taps:
+                if double_tapped:
+                    self._last_tap_chord = None
+                # A press that completed a double tap does not start another one
+                self._tap = (self._held_chord, bindings, t_down, not double_tapped)
+            if suppress:
+                self._suppressed.add(held_id)
+                return False
+            return True
+
+        # Key up: matched to its key-down by scan code, so a key pressed as "!"
+        # and released as "1" (shift let go first) is still released
+        released = self._held.pop(held_id, None)
+        if released is not None:
+            key = released
+        tap = self._tap
+        if tap is not None and key in tap[0]:
+            self._tap = None
+            self._on_tap_release(tap)
+        if released is not None:
+            self._held_chord = frozenset(self._held.values())
+            long_press = self._long_press
+            if long_press is not None and key in long_press.chord:
+                self._end_long_press(long_press)
+        if held_id in self._suppressed:
+            self._suppressed.discard(held_id)
+            return False
+        return True
+
+    def _swallow(self, chord):
+        with self._lock:
+            self._swallowed = swallowed = self._swallowed + (chord,)
+            self.scheduler.cancel(self._sequence_call)
+            self._sequence_call = self.scheduler.schedule_at(self._sequence_deadline, self._on_sequence_timeout, swallowed)
+
+    def _on_sequence_timeout(self, swallowed):
+        # Scheduler thread. A newer stroke replaces the tuple, so identity tells
+        # whether this deadline is still the current one
+        with self._lock:
+            if self._swallowed is not swallowed:
+                return
+            self._swallowed = ()
+            self._sequence_call = None
+        self._replay_strokes(swallowed)
+
+    def _end_sequence(self):
+        """Forgets the strokes held back for the sequence and returns them."""
+        with self._lock:
+            swallowed, self._swallowed = self._swallowed, ()
+            self.scheduler.cancel(self._sequence_call)
+            self._sequence_call = None
+        return swallowed
+
+    def _replay_strokes(self, strokes):
+        # Done on the scheduler thread, never from inside the hook
+        if self.replay:
+            self.scheduler.schedule(0, self.replay, ", ".join("+".join(sorted(chord)) for chord in strokes))
+
+    def _drop_released_keys(self):
+        # Keys whose up event never reached the hook (Win+L, focus moving to an
+        # elevated window) would otherwise stay part of every chord from now on.
+        # Keys we suppressed are skipped: the OS never saw those go down.
+        for held_id in list(self._held):
+            if held_id in self._suppressed or not isinstance(held_id, int):
+                continue
+            if self.key_state(held_id) is False:
+                key = self._held.pop(held_id)
+                long_press = self._long_press
+                if long_press is not None and key in long_press.chord:
+                    self._end_long_press(long_press)
+        self._held_chord = frozenset(self._held.values())
+
+    def _on_tap_release(self, tap):
+        chord, bindings, t_down, counts_for_double_tap = tap
+        t_up = time.perf_counter_ns()
+        if t_up - t_down > self.tap_timeout * 1e9:
+            # Held too long: that was a hold, not a tap
+            return
+        for binding in bindings:
+            if binding.gesture == GESTURE_TAP:
+                # Latency is measured from the release that completed the tap
+                self._fire(binding, t_up, t_up)
+        if counts_for_double_tap:
+            self._last_tap_chord = chord
+            self._last_tap_ns = t_up
+        else:
+            self._last_tap_chord = None
+
+    def _start_long_press(self, key, bindings):
+        delay = min(b.long_press_delay for b in bindings)
+        long_press = LongPress(key, self._held_chord, bindings,
+                               any(b.suppress for b in bindings),
+                               time.monotonic() + delay)
+        with self._lock:
+            self._long_press = long_press
+            long_press.call = self.scheduler.schedule_at(long_press.deadline, self._on_long_press_deadline, long_press)
+
+    def _on_long_press_deadline(self, long_press):
+        # Scheduler thread: the chord is still held when its deadline comes up
+        with self._lock:
+            if self._long_press is not long_press or long_press.fired:
+                return
+            long_press.fired = True
+        print(f"DEBUG: Long Press Met! {long_press.bindings[0].trigger}")
+        # Latency is measured from the threshold, not from the start of the hold
+        now = time.perf_counter_ns()
+        for binding in long_press.bindings:
+            self._fire(binding, now, now)
+
+    def _end_long_press(self, long_press):
+        with self._lock:
+            if self._long_press is not long_press:
+                return
+            self._long_press = None
+            self.scheduler.cancel(long_press.call)
+            short_press = not long_press.fired
+        if short_press and long_press.suppress and self.replay:
+            # Released before the threshold: give the swallowed press back.
+            # Done on the scheduler thread, never from inside the hook.
+            self.scheduler.schedule(0, self.replay, long_press.bindings[0].trigger)
+
+    def _fire(self, binding, t_down, t_match):
+        try:
+            binding.callback(t_down, t_match)
+        except Exception as e:
+            # Never let a callback exception kill the hook
+            print(f"ERROR in hotkey callback for {binding.trigger}: {e}")
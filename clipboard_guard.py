@@ -0,0 +1,220 @@
+"""
+Clipboard save/restore around paste-based snippet expansion.
+
+Pasting a snippet has to put it on the clipboard, which would destroy
+whatever the user had copied. ClipboardGuard snapshots the existing contents
+(every format that can be copied as data) in the same open/close that sets
+the snippet text, and puts the snapshot back shortly after the paste has been
+consumed.
+
+Expansions that follow each other within RESTORE_DELAY share one snapshot:
+the clipboard is saved before the first and restored once after the last.
+If anything else writes the clipboard in the meantime (the clipboard sequence
+number moves past ours), the snapshot is dropped instead of overwriting the
+newer contents.
+
+The clipboard itself sits behind a small interface (get_text, replace,
+set_text, restore, sequence_number). Win32Clipboard is the real one;
+FakeClipboard keeps the formats in a dict so the logic runs on Linux.
+"""
+import os
+import threading
+
+from deadline_scheduler import DeadlineScheduler
+
+CF_UNICODETEXT = 13
+
+# Seconds after a paste is acknowledged before the clipboard is restored; the
+# target app reads the clipboard when it handles Ctrl+V, slightly later
+RESTORE_DELAY = 0.5
+
+
+class Win32Clipboard:
+    # Formats held as GDI/owner handles rather than data; these cannot be copied out
+    HANDLE_FORMATS = frozenset((2, 3, 9, 14, 0x80, 0x82, 0x83, 0x8E)) # BITMAP, METAFILEPICT, PALETTE, ENHMETAFILE, OWNERDISPLAY, DSP*
+
+    def get_text(self):
+        import win32clipboard
+
+        win32clipboard.OpenClipboard()
+        try:
+            if win32clipboard.IsClipboardFormatAvailable(CF_UNICODETEXT):
+                return win32clipboard.GetClipboardData(CF_UNICODETEXT)
+            return None
+        finally:
+            win32clipboard.CloseClipboard()
+
+    def replace(self, text):
+        """Snapshots the current contents and sets `text`, in one open. Returns the snapshot."""
+        import win32clipboard
+
+        win32clipboard.OpenClipboard()
+        try:
+            snapshot = self._read_all(win32clipboard)
+            win32clipboard.EmptyClipboard()
+            win32clipboard.SetClipboardText(text, CF_UNICODETEXT)
+        finally:
+            win32clipboard.CloseClipboard()
+        return snapshot
+
+    def set_text(self, text):
+        import win32clipboard
+
+        win32clipboard.OpenClipboard()
+        try:
+            win32clipboard.EmptyClipboard()
+            win32clipboard.SetClipboardText(text, CF_UNICODETEXT)
+        finally:
+            win32clipboard.CloseClipboard()
+
+    def restore(self, snapshot):
+        import win32clipboard
+
+        win32clipboard.OpenClipboard()
+        try:
+            win32clipboard.EmptyClipboard()
+            for fmt, data in snapshot.items():
+                try:
+                    win32clipboard.SetClipboardData(fmt, data)
+                except Exception as e:
+                    print(f"WARNING: Could not restore clipboard format {fmt}: {e}")
+        finally:
+            win32clipboard.CloseClipboard()
+
+    def sequence_number(self):
+        import win32clipboard
+        return win32clipboard.GetClipboardSequenceNumber()
+
+    def _read_all(self, win32clipboard):
+        snapshot = {}
+        fmt = win32clipboard.EnumClipboardFormats(0)
+        while fmt:
+            if fmt not in self.HANDLE_FORMATS:
+                try:
+                    data = win32clipboard.GetClipboardData(fmt)
+                    # pywin32 decodes a few formats into other types (file lists,
+                    # ...) that cannot be written back as they are
+                    if isinstance(data, (bytes, str)):
+                        snapshot[fmt] = data
+                except Exception:
+                    pass # Formats the owner refuses to render are skipped
+            fmt = win32clipboard.EnumClipboardFormats(fmt)
+        return snapshot
+
+
+class FakeClipboard:
+    """In-memory clipboard for tests and non-Windows runs."""
+
+    def __init__(self, formats=None):
+        self.formats = dict(formats or {})
+        self.sequence = 0
+        self.opens = 0 # how many times the clipboard was opened
+
+    def get_text(self):
+        self.opens += 1
+        return self.formats.get(CF_UNICODETEXT)
+
+    def replace(self, text):
+        self.opens += 1
+        snapshot = dict(self.formats)
+        self._write({CF_UNICODETEXT: text})
+        return snapshot
+
+    def set_text(self, text):
+        self.opens += 1
+        self._write({CF_UNICODETEXT: text})
+
+    def restore(self, snapshot):
+        self.opens += 1
+        self._write(snapshot)
+
+    def sequence_number(self):
+        return self.sequence
+
+    def copy(self, text):
+        # Simulates another application writing the clipboard
+        self._write({CF_UNICODETEXT: text})
+
+    def _write(self, formats):
+        self.formats = dict(formats)
+        self.sequence += 1
+
+
+class ClipboardGuard:
+    def __init__(self, clipboard=None, scheduler=None, restore_delay=RESTORE_DELAY):
+        self.clipboard = clipboard or default_clipboard()
+        self.scheduler = scheduler or DeadlineScheduler(name="ClipboardRestore")
+        self.restore_delay = restore_delay
+        self._lock = threading.Lock()
+        self._snapshot = None # the user's contents while expansions are in progress
+        self._sequence = None # sequence number right after our last write
+        self._restore_call = None
+
+    def user_text(self):
+        """
+        The text the user has on the clipboard. While expansions are in
+        progress that is the saved snapshot, not the snippet on the clipboard.
+        """
+        with self._lock:
+            try:
+                if self._snapshot is not None and self._sequence == self.clipboard.sequence_number():
+                    text = self._snapshot.get(CF_UNICODETEXT)
+                    return text if isinstance(text, str) else None
+                return self.clipboard.get_text()
+            except Exception as e:
+                print(f"Error reading clipboard: {e}")
+                return None
+
+    def set_text(self, text):
+        """
+        Puts `text` on the clipboard for a paste, saving the user's contents
+        first unless an earlier expansion already did. Returns False if the
+        clipboard could not be written.
+        """
+        with self._lock:
+            self.scheduler.cancel(self._restore_call)
+            self._restore_call = None
+            try:
+                if self._snapshot is not None and self._sequence == self.clipboard.sequence_number():
+                    # Coalesced with the previous expansion: its snapshot still stands
+                    self.clipboard.set_text(text)
+                else:
+                    self._snapshot = self.clipboard.replace(text)
+                self._sequence = self.clipboard.sequence_number()
+                return True
+            except Exception as e:
+                print(f"Error setting clipboard: {e}")
+                return False
+
+    def pasted(self):
+        """Call once the paste has been acknowledged; restores the saved contents after restore_delay."""
+        with self._lock:
+            if self._snapshot is None:
+                return
+            self.scheduler.cancel(self._restore_call)
+            self._restore_call = self.scheduler.schedule(self.restore_delay, self._restore)
+
+    def restore_now(self):
+        with self._lock:
+            self.scheduler.cancel(self._restore_call)
+        self._restore()
+
+    def _restore(self):
+        with self._lock:
+            self._restore_call = None
+            snapshot, self._snapshot = self._snapshot, None
+            if snapshot is None:
+                return
+            try:
+                if self.clipboard.sequence_number() != self._sequence:
+                    print("DEBUG: Clipboard changed since the expansion, not restoring it")
+                    return
+                self.clipboard.restore(snapshot)
+            except Exception as e:
+                print(f"Error restoring clipboard: {e}")
+
+
+def default_clipboard():
+    if os.name == "nt":
+        return Win32Clipboard()
+    return FakeClipboard()
@@ -1,11 +1,20 @@
 import json
 import os
 import time
+from snippet_store import SnippetStore
+from usage_stats import UsageStats, KIND_SNIPPET, KIND_HOTKEY
 
 class ConfigManager:
     def __init__(self, config_file="config.json"):
         self.config_file = config_file
         self.config = self.load_config()
+        # Snippets live in their own SQLite file next to the config; only their
+        # triggers and flags are kept in memory
+        self.snippet_store = SnippetStore(os.path.join(os.path.dirname(config_file), "snippets.db"))
+        self._migrate_snippets()
+        # Use counts of snippets and hotkeys, kept in memory and written to
+        # their own file in the background
+        self.usage = UsageStats(os.path.join(os.path.dirname(config_file), "usage_stats.json"))
 
     def load_config(self):
         if not os.path.exists(self.config_file):
@@ -18,6 +27,19 @@ class ConfigManager:
 
     def reload_config(self):
         self.config = self.load_config()
+        self._migrate_snippets()
+
+    def _migrate_snippets(self, replace=False):
+        # Snippets found in config.json (older versions, hand edits) are added
+        # to the store, unless their trigger is already there, and dropped from
+        # the config. A backup import (replace) restores the backup's library
+        if "snippets" in self.config:
+            snippets = self.config.pop("snippets") or []
+            if replace:
+                self.snippet_store.replace_all(snippets)
+            else:
+                self.snippet_store.merge(snippets)
+            self.save_config()
 
     def save_config(self):
         try:
@@ -28,8 +50,11 @@ class ConfigManager:
 
     def export_to_file(self, file_path):
         try:
+            # Backups stay one self-contained JSON file, snippets included
+            backup = dict(self.config)
+            backup["snippets"] = self.snippet_store.export()
             with open(file_path, "w") as f:
-                json.dump(self.config, f, indent=4)
+                json.dump(backup, f, indent=4)
             return True, "Success"
         except IOError as e:
             return False, f"Error exporting: {e}"
@@ -46,6 +71,7 @@ class ConfigManager:
                 return False, "Invalid config format"
 
             self.config = new_config
+            self._migrate_snippets(replace=True)
             self.save_config() # Persist to main config.json
             return True, "Success"
         except (json.JSONDecodeError, IOError) as e:
@@ -54,7 +80,7 @@ class ConfigManager:
     def get_hotkeys(self):
         return self.config.get("hotkeys", [])
 
-    def add_hotkey(self, trigger_key, action_type, action_target, suppress=False, long_press=False, name=""):
+    def add_hotkey(self, trigger_key, action_type, action_target, suppress=False, long_press=False, name="", **options):
         """
         trigger_key: str, e.g., 'ctrl+alt+t'
         action_type: str, e.g., 'run', 'focus'
@@ -62,6 +88,7 @@ class ConfigManager:
         action_target: str, e.g., 'notepad.exe', 'Spotify'
         suppress: bool, whether to block the original key event
         long_press: bool, whether to use long press trigger
+        options: any further hotkey fields, e.g. repeat='debounce', repeat_ms=300
         """
         print(f"DEBUG: add_hotkey called with long_press={long_press}")
         new_hotkey = {
@@ -74,6 +101,7 @@ class ConfigManager:
             "long_press": long_press,
             "created_at": time.time()
         }
+        new_hotkey.update(options)
         self.config.setdefault("hotkeys", []).append(new_hotkey)
         self.save_config()
 
@@ -108,37 +136,69 @@ class ConfigManager:
     # --- Snippets (Text Expansion) ---
 
     def get_snippets(self):
-        return self.config.get("snippets", [])
+        """SnippetRecords (trigger, mode, active, ...) without their bodies; see get_snippet_text."""
+        return self.snippet_store.records()
 
-    def add_snippet(self, trigger, replacement):
-        snippet = {
-            "trigger": trigger,
-            "replacement": replacement,
-            "active": True,
-            "created_at": time.time()
-        }
-        self.config.setdefault("snippets", []).append(snippet)
-        self.save_config()
+    def get_snippet_text(self, snippet):
+        return self.snippet_store.body(snippet.id)
+
+    def find_snippet(self, trigger):
+        return self.snippet_store.find(trigger)
+
+    def search_snippets(self, text):
+        return self.snippet_store.search(text)
+
+    def get_snippet_previews(self, length=100):
+        return self.snippet_store.previews(length)
 
-    def update_snippet(self, index, trigger, replacement):
-        if 0 <= index < len(self.config["snippets"]):
-            snippet = self.config["snippets"][index]
-            snippet["trigger"] = trigger
-            snippet["replacement"] = replacement
+    def add_snippet(self, trigger, replacement, mode="delimiter"):
+        self.snippet_store.add(trigger, replacement, mode) # mode: 'delimiter' or 'immediate'
+
+    def update_snippet(self, index, trigger, replacement, mode=None):
+        snippets = self.get_snippets()
+        if 0 <= index < len(snippets):
             # Active and created_at remain unchanged
-            self.save_config()
-            return True
+            return self.snippet_store.update(snippets[index].id, trigger=trigger, body=replacement, mode=mode)
         return False
 
     def remove_snippet(self, index):
-        if 0 <= index < len(self.config["snippets"]):
-            self.config["snippets"].pop(index)
-            self.save_config()
+        snippets = self.get_snippets()
+        if 0 <= index < len(snippets):
+            self.snippet_store.remove(snippets[index].id)
 
     def update_snippet_status(self, index, active):
-        if 0 <= index < len(self.config["snippets"]):
-            self.config["snippets"][index]["active"] = active
-            self.save_config()
+        snippets = self.get_snippets()
+        if 0 <= index < len(snippets):
+            self.snippet_store.update(snippets[index].id, active=active)
+
+    def reorder_snippets(self, snippets):
+        self.snippet_store.reorder(snippets)
+
+    # --- Usage Statistics ---
+
+    def record_snippet_use(self, trigger, saved=0):
+        # Called on the expansion path: memory only
+        self.usage.record(KIND_SNIPPET, trigger, saved)
+
+    def record_hotkey_use(self, trigger):
+        # Called on the keyboard hook thread: memory only
+        self.usage.record(KIND_HOTKEY, trigger)
+
+    def add_usage_listener(self, listener):
+        """listener(kind, key, when) is called for every recorded use."""
+        self.usage.add_listener(listener)
+
+    def get_snippet_usage(self):
+        """lower-cased trigger -> UsageCounter (count, saved, last_used)."""
+        return self.usage.snapshot(KIND_SNIPPET)
+
+    def get_hotkey_usage(self):
+        """trigger -> UsageCounter (count, saved, last_used)."""
+        return self.usage.snapshot(KIND_HOTKEY)
+
+    def close(self):
+        # Writes out the last usage counts
+        self.usage.close()
 
     # --- Appearance Settings ---
 
@@ -207,6 +267,40 @@ class ConfigManager:
         self.config.setdefault("general", {})["long_press_delay"] = delay_ms
         self.save_config()
 
+    def get_sequence_timeout(self):
+        return self.config.get("general", {}).get("sequence_timeout", 1000) # Max ms between strokes of a multi-step hotkey
+
+    def set_sequence_timeout(self, timeout_ms):
+        self.config.setdefault("general", {})["sequence_timeout"] = timeout_ms
+        self.save_config()
+
+    def get_tap_timeout(self):
+        return self.config.get("general", {}).get("tap_timeout", 250) # Max ms a key may be held to count as a tap
+
+    def set_tap_timeout(self, timeout_ms):
+        self.config.setdefault("general", {})["tap_timeout"] = timeout_ms
+        self.save_config()
+
+    def get_double_tap_interval(self):
+        return self.config.get("general", {}).get("double_tap_interval", 300) # Max ms between the two taps of a double tap
+
+    def set_double_tap_interval(self, interval_ms):
+        self.config.setdefault("general", {})["double_tap_interval"] = interval_ms
+        self.save_config()
+
+    def get_autocomplete_min_chars(self):
+        return self.config.get("general", {}).get("autocomplete_min_chars", 3) # Typed characters before snippet suggestions show; 0 disables them
+
+    def set_autocomplete_min_chars(self, count):
+        self.config.setdefault("general", {})["autocomplete_min_chars"] = count
+        self.save_config()
+
+    def get_action_workers(self):
+        return self.config.get("general", {}).get("action_workers", 4) # Hotkey action worker threads
+
+    def get_action_queue_limit(self):
+        return self.config.get("general", {}).get("action_queue_limit", 32) # Max pending hotkey actions
+
     # --- Workspaces ---
 
     def get_workspaces(self):
@@ -0,0 +1,94 @@
+"""
+Shared deadline scheduler.
+
+One heap of (deadline, callback) entries serviced by a single long-lived
+thread that sleeps until the earliest deadline. Used for long-press thresholds
+and other "call me back in N ms" needs of the hotkey engine, so nothing has to
+spawn a threading.Timer per key press or poll for key state.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+
+class ScheduledCall:
+    __slots__ = ("deadline", "seq", "callback", "args", "cancelled")
+
+    def __init__(self, deadline, seq, callback, args):
+        self.deadline = deadline
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class DeadlineScheduler:
+    def __init__(self, name="DeadlineScheduler"):
+        self.name = name
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._shutdown = False
+
+    def schedule(self, delay, callback, *args):
+        """Runs callback(*args) on the scheduler thread after `delay` seconds."""
+        return self.schedule_at(time.monotonic() + delay, callback, *args)
+
+    def schedule_at(self, deadline, callback, *args):
+        """Runs callback(*args) at the given time.monotonic() deadline. Returns a cancellable handle."""
+        call = ScheduledCall(deadline, next(self._counter), callback, args)
+        with self._cond:
+            if self._thread is None:
+                # Created once, on first use
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, call)
+            # Only wake the thread if this is now the earliest deadline
+            if self._heap[0] is call:
+                self._cond.notify()
+        return call
+
+    @staticmethod
+    def cancel(call):
+        # Lazy deletion: the entry stays in the heap and is skipped when due
+        if call is not None:
+            call.cancelled = True
+
+    def pending(self):
+        with self._cond:
+            return sum(1 for call in self._heap if not call.cancelled)
+
+    def shutdown(self):
+        with self._cond:
+            self._shutdown = True
+            self._heap.clear()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._shutdown:
+                        return
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    call = self._heap[0]
+                    if call.cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+                    remaining = call.deadline - time.monotonic()
+                    if remaining <= 0:
+                        heapq.heappop(self._heap)
+                        break
+                    self._cond.wait(remaining)
+
+            try:
+                call.callback(*call.args)
+            except Exception as e:
+                print(f"ERROR in scheduled callback: {e}")
@@ -0,0 +1,178 @@
+"""
+Ordered injection queue for the text expander.
+
+Every expansion and undo is an operation run by one long-lived worker
+thread, in the order they were submitted. Two quick expansions, or an
+expansion and the backspace that undoes it, can no longer interleave their
+keystrokes, and the expander's undo state is only touched on that thread.
+
+An operation is a function, run on the worker, that returns the Edit to
+inject (or None if there is nothing to do). When operations pile up behind
+a slow one, the waiting ones are coalesced into the same edit: deleting d1
+and inserting t1, then deleting d2 and inserting t2, is one deletion and
+one insertion, so the backlog goes out as a single batch. A barrier
+operation (undo) is never pulled into an edit, because it has to see the
+result of the edits before it.
+
+stats() reports the queue depth and the latency from submitting an
+operation to its edit being acknowledged.
+"""
+import threading
+import time
+from collections import deque
+
+from latency_stats import LatencyHistogram
+
+
+class Edit:
+    """
+    Delete `deletions` characters before the caret, insert `text` (pasted if
+    paste is set and the clipboard is available), then move the caret
+    `cursor_back` characters left. expansion: what undoing it needs, or None.
+    """
+    __slots__ = ("deletions", "text", "cursor_back", "paste", "expansion")
+
+    def __init__(self, deletions, text, cursor_back=0, paste=False, expansion=None):
+        self.deletions = deletions
+        self.text = text
+        self.cursor_back = cursor_back
+        self.paste = paste
+        self.expansion = expansion
+
+    def then(self, other):
+        """One Edit doing self and then other, or None if they cannot be merged."""
+        if self.cursor_back:
+            return None # other's deletions would not start at the end of our text
+        if other.deletions <= len(self.text):
+            deletions = self.deletions
+            text = self.text[:len(self.text) - other.deletions] + other.text
+        else:
+            deletions = self.deletions + other.deletions - len(self.text)
+            text = other.text
+        return Edit(deletions, text, other.cursor_back, self.paste or other.paste, other.expansion)
+
+    def __repr__(self):
+        return f"Edit(-{self.deletions}, {self.text!r}, cursor_back={self.cursor_back})"
+
+
+class _Operation:
+    __slots__ = ("prepare", "barrier", "t_submit")
+
+    def __init__(self, prepare, barrier):
+        self.prepare = prepare
+        self.barrier = barrier
+        self.t_submit = time.perf_counter_ns()
+
+
+class EditQueue:
+    def __init__(self, apply, name="TextExpansion"):
+        # apply(edit) injects an edit and returns once it is acknowledged
+        self.apply = apply
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._shutdown = False
+
+        # Counters
+        self.max_queued = 0
+        self.completed = 0 # operations
+        self.injected = 0 # edits actually sent
+        self.coalesced = 0 # operations merged into an edit sent for an earlier one
+        self.failed = 0
+        self.latency = LatencyHistogram() # submit -> edit acknowledged
+
+        self._worker = threading.Thread(target=self._worker_loop, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, prepare, barrier=False):
+        """Queues an operation and returns at once. Safe to call from the hook thread."""
+        with self._cond:
+            if self._shutdown:
+                return False
+            self._queue.append(_Operation(prepare, barrier))
+            self.max_queued = max(self.max_queued, len(self._queue))
+            self._cond.notify()
+        return True
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "injected": self.injected,
+                "coalesced": self.coalesced,
+                "failed": self.failed,
+                "latency": self.latency.summary(),
+            }
+
+    def shutdown(self, wait=False):
+        with self._cond:
+            self._shutdown = True
+            self._queue.clear()
+            self._cond.notify_all()
+        if wait:
+            self._worker.join()
+
+    def _prepare(self, operation):
+        try:
+            return operation.prepare(), True
+        except Exception as e:
+            print(f"ERROR preparing text expansion edit: {e}")
+            import traceback
+            traceback.print_exc()
+            return None, False
+
+    def _next(self, barriers):
+        # Caller holds the lock
+        if self._queue and (barriers or not self._queue[0].barrier):
+            return self._queue.popleft()
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                operation = self._queue.popleft()
+
+            edit, ok = self._prepare(operation)
+            submitted = [operation.t_submit]
+            failed = 0 if ok else 1
+            merged = 0
+            # Operations that queued up meanwhile go out in the same edit
+            while edit is None or not edit.cursor_back:
+                with self._cond:
+                    operation = self._next(barriers=edit is None)
+                if operation is None:
+                    break
+                following, ok = self._prepare(operation)
+                submitted.append(operation.t_submit)
+                failed += 0 if ok else 1
+                if following is None:
+                    continue
+                if edit is None:
+                    edit = following
+                else:
+                    edit = edit.then(following)
+                    merged += 1
+
+            if edit is not None:
+                try:
+                    self.apply(edit)
+                except Exception as e:
+                    failed += 1
+                    print(f"ERROR injecting text expansion edit: {e}")
+                    import traceback
+                    traceback.print_exc()
+            t_end = time.perf_counter_ns()
+
+            with self._cond:
+                self.completed += len(submitted)
+                self.failed += failed
+                self.coalesced += merged
+                if edit is not None:
+                    self.injected += 1
+                for t_submit in submitted:
+                    self.latency.record(t_end - t_submit)
@@ -0,0 +1,200 @@
+"""
+Cached foreground-application context for per-app hotkeys.
+
+The keyboard hook must never ask Windows which app is in front: that is
+several system calls per keystroke. Instead a provider reports focus changes
+as they happen (SetWinEventHook(EVENT_SYSTEM_FOREGROUND) on Windows), and
+ForegroundContext keeps the result. HotkeyManager maps it to an app key and
+swaps the dispatcher's binding table, so the hook still does one dict lookup.
+
+An app is named either by its executable ("code.exe") or by its window class
+("class:Chrome_WidgetWin_1"), case-insensitively.
+
+FakeForegroundProvider reports whatever it is told, so the scoping logic can
+be driven headless (e.g. on Linux) without any win32 modules.
+"""
+import os
+import threading
+
+CLASS_PREFIX = "class:"
+
+
+def normalize_app(app):
+    """Canonical form of an app entry from the config: 'Code.EXE' -> 'code.exe'."""
+    app = app.strip().lower()
+    if app.startswith(CLASS_PREFIX):
+        return CLASS_PREFIX + app[len(CLASS_PREFIX):].strip()
+    return app
+
+
+class ForegroundContext:
+    """
+    Last reported foreground app. Listeners are called as listener(exe, window_class)
+    when the app changes; window listeners are called with no arguments whenever
+    any window comes to the front, even one of the same app.
+    """
+
+    def __init__(self, provider=None):
+        self.provider = provider
+        self.exe = None # lower-case executable name, e.g. "code.exe"
+        self.window_class = None # lower-case window class
+        self._listeners = []
+        self._window_listeners = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def add_window_listener(self, listener):
+        self._window_listeners.append(listener)
+
+    def start(self):
+        if self.provider is not None:
+            self.provider.start(self._on_change)
+
+    def stop(self):
+        if self.provider is not None:
+            self.provider.stop()
+
+    def _on_change(self, exe, window_class):
+        for listener in self._window_listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"ERROR in foreground window listener: {e}")
+        exe = exe.lower() if exe else None
+        window_class = window_class.lower() if window_class else None
+        if (exe, window_class) == (self.exe, self.window_class):
+            return
+        self.exe = exe
+        self.window_class = window_class
+        for listener in self._listeners:
+            try:
+                listener(exe, window_class)
+            except Exception as e:
+                print(f"ERROR in foreground listener: {e}")
+
+
+class FakeForegroundProvider:
+    """Provider for tests and non-Windows runs: call set_foreground() to simulate a focus change."""
+
+    def __init__(self, exe=None, window_class=None):
+        self.exe = exe
+        self.window_class = window_class
+        self._callback = None
+
+    def start(self, callback):
+        self._callback = callback
+        callback(self.exe, self.window_class)
+
+    def stop(self):
+        self._callback = None
+
+    def set_foreground(self, exe, window_class=None):
+        self.exe = exe
+        self.window_class = window_class
+        if self._callback is not None:
+            self._callback(exe, window_class)
+
+
+class WindowsForegroundProvider:
+    """Reports foreground changes from a WinEvent hook running on its own message loop thread."""
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        self._callback = None
+        self._thread = None
+        self._thread_id = None
+        self._proc = None # keeps the ctypes callback alive
+
+    def start(self, callback):
+        if self._thread is not None:
+            return
+        self._callback = callback
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="ForegroundWatcher", daemon=True)
+        self._thread.start()
+        ready.wait(2.0)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        import ctypes
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+        self._thread = None
+        self._callback = None
+
+    def _run(self, ready):
+        import ctypes
+        from ctypes import wintypes
+        import win32gui
+
+        user32 = ctypes.windll.user32
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, time_ms):
+            self._report(hwnd)
+
+        self._proc = WinEventProc(on_event)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        hook = user32.SetWinEventHook(self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND,
+                                      0, self._proc, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+        if not hook:
+            print("ERROR: Could not install foreground event hook")
+            ready.set()
+            return
+        # Report the window that is already in front
+        self._report(win32gui.GetForegroundWindow())
+        ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+
+    def _report(self, hwnd):
+        callback = self._callback
+        if callback is None or not hwnd:
+            return
+        try:
+            import win32gui
+            import win32process
+
+            window_class = win32gui.GetClassName(hwnd)
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+            callback(self._exe_name(pid), window_class)
+        except Exception as e:
+            print(f"Error reading foreground window: {e}")
+
+    @staticmethod
+    def _exe_name(pid):
+        # Limited query rights are enough here, and are granted even for most
+        # elevated processes; if not, the window class still works
+        import ctypes
+        from ctypes import wintypes
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        handle = kernel32.OpenProcess(0x1000, False, pid) # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return None
+        try:
+            buf = ctypes.create_unicode_buffer(260)
+            size = wintypes.DWORD(len(buf))
+            if kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+                return os.path.basename(buf.value)
+            return None
+        finally:
+            kernel32.CloseHandle(handle)
+
+
+def default_provider():
+    if os.name == "nt":
+        return WindowsForegroundProvider()
+    return FakeForegroundProvider()
@@ -0,0 +1,206 @@
+"""
+Conflict and shadowing index for hotkey triggers.
+
+Triggers are normalized to canonical chord sequences first, so "ctrl+alt+t"
+and "Alt+Ctrl+T" are recognised as the same trigger. Then, per scope (a
+(workspace, app) pair where None means "any", and where a scope also sees the
+bindings of the broader scopes it falls under), the index reports:
+
+- duplicate:  two bindings of the same gesture share a trigger; both fire
+- long_press: a long-press and a short-press binding share a trigger; the
+              short one fires on every press, the long one on top of it
+- prefix:     a trigger is the first stroke(s) of a multi-step sequence; it
+              fires on the way to the sequence
+
+Everything is done with dict lookups keyed by the canonical sequence, so the
+index is built in time linear in the total number of strokes.
+"""
+from chord_dispatcher import parse_sequence, GESTURE_PRESS, GESTURE_HOLD
+from foreground_context import normalize_app
+
+DUPLICATE = "duplicate"
+LONG_PRESS = "long_press"
+PREFIX = "prefix"
+
+
+class TriggerEntry:
+    """A binding as seen by the index. `index` is the position in the hotkeys (or workspaces) list."""
+    __slots__ = ("source", "index", "label", "trigger", "strokes", "gesture", "scope")
+
+    def __init__(self, source, index, label, trigger, strokes, gesture, scope):
+        self.source = source # "hotkey" or "workspace"
+        self.index = index
+        self.label = label
+        self.trigger = trigger
+        self.strokes = strokes
+        self.gesture = gesture # chord_dispatcher.GESTURE_*
+        self.scope = scope # (workspace id or None, app key or None)
+
+
+class Conflict:
+    __slots__ = ("kind", "scope", "entries")
+
+    def __init__(self, kind, scope, entries):
+        self.kind = kind
+        self.scope = scope # (workspace id or None, app key or None)
+        self.entries = entries
+
+    def describe(self, workspace_names=None):
+        workspace_id, app = self.scope
+        parts = []
+        if workspace_id is not None:
+            parts.append(f"workspace '{(workspace_names or {}).get(workspace_id, workspace_id)}'")
+        if app is not None:
+            parts.append(f"app '{app}'")
+        where = ", ".join(parts) or "global"
+        labels = " and ".join(e.label for e in self.entries)
+        if self.kind == DUPLICATE:
+            return f"Duplicate trigger '{self.entries[0].trigger}' ({where}): {labels}"
+        if self.kind == LONG_PRESS:
+            return f"Long press and short press on '{self.entries[0].trigger}' ({where}): {labels}"
+        return f"'{self.entries[0].trigger}' shadows sequence '{self.entries[1].trigger}' ({where}): {labels}"
+
+
+class ConflictIndex:
+    def __init__(self, conflicts, workspace_names):
+        self.conflicts = conflicts
+        self.workspace_names = workspace_names
+        # hotkey index -> conflicts it is involved in (for the hotkey table)
+        self.by_hotkey = {}
+        for conflict in conflicts:
+            for entry in conflict.entries:
+                if entry.source == "hotkey":
+                    self.by_hotkey.setdefault(entry.index, []).append(conflict)
+
+    def __len__(self):
+        return len(self.conflicts)
+
+    def messages(self):
+        return [c.describe(self.workspace_names) for c in self.conflicts]
+
+    def messages_for_hotkey(self, index):
+        return [c.describe(self.workspace_names) for c in self.by_hotkey.get(index, [])]
+
+
+def _hotkey_scopes(hk):
+    # Mirrors HotkeyManager: no workspaces (or 'global') means active everywhere,
+    # no apps means active whatever app is in front
+    allowed = hk.get("workspaces", [])
+    workspaces = (None,) if not allowed or "global" in allowed else tuple(allowed)
+    apps = sorted(set(normalize_app(app) for app in hk.get("apps", []) if app.strip())) or (None,)
+    return tuple((workspace_id, app) for workspace_id in workspaces for app in apps)
+
+
+def _broader_scopes(scope):
+    # The scopes whose bindings are also active in this one
+    workspace_id, app = scope
+    broader = []
+    for other in ((None, app), (workspace_id, None), (None, None)):
+        if other != scope and other not in broader:
+            broader.append(other)
+    return broader
+
+
+def _hotkey_gesture(hk, strokes):
+    # Mirrors HotkeyManager: multi-step triggers are always plain presses
+    if len(strokes) > 1:
+        return GESTURE_PRESS
+    gesture = hk.get("gesture")
+    if gesture:
+        return gesture
+    return GESTURE_HOLD if hk.get("long_press", False) else GESTURE_PRESS
+
+
+def _collect_entries(hotkeys, workspaces):
+    entries = []
+    for i, hk in enumerate(hotkeys):
+        if not hk.get("active", True):
+            continue
+        try:
+            strokes = parse_sequence(hk.get("trigger", ""))
+        except ValueError:
+            continue
+        label = f"hotkey '{hk.get('name') or hk.get('target', '')}'"
+        gesture = _hotkey_gesture(hk, strokes)
+        for scope in _hotkey_scopes(hk):
+            entries.append(TriggerEntry("hotkey", i, label, hk["trigger"], strokes, gesture, scope))
+
+    for i, w in enumerate(workspaces):
+        trigger = w.get("launch_hotkey")
+        if not trigger:
+            continue
+        try:
+            strokes = parse_sequence(trigger)
+        except ValueError:
+            continue
+        entries.append(TriggerEntry("workspace", i, f"workspace '{w.get('name', '')}' launch hotkey", trigger, strokes, GESTURE_PRESS, (None, None)))
+    return entries
+
+
+def _clashes(scope, group):
+    # group: entries sharing one canonical trigger within one scope
+    conflicts = []
+    by_gesture = {}
+    for entry in group:
+        by_gesture.setdefault(entry.gesture, []).append(entry)
+    for same in by_gesture.values():
+        if len(same) > 1:
+            conflicts.append(Conflict(DUPLICATE, scope, same))
+    short = by_gesture.get(GESTURE_PRESS)
+    long = by_gesture.get(GESTURE_HOLD)
+    if short and long:
+        conflicts.append(Conflict(LONG_PRESS, scope, [short[0], long[0]]))
+    return conflicts
+
+
+def build_conflict_index(hotkeys, workspaces=()):
+    """
+    Builds the conflict index for the given hotkeys and workspaces (as stored
+    in the config). Inactive hotkeys are ignored.
+    """
+    entries = _collect_entries(hotkeys, workspaces)
+
+    # scope -> canonical strokes -> entries
+    by_scope = {}
+    for entry in entries:
+        by_scope.setdefault(entry.scope, {}).setdefault(entry.strokes, []).append(entry)
+
+    # Proper prefixes of each scope's sequences, so narrower scopes can be checked against them
+    prefixes = {}
+    for scope, index in by_scope.items():
+        prefixes[scope] = scope_prefixes = {}
+        for strokes, group in index.items():
+            for n in range(1, len(strokes)):
+                scope_prefixes.setdefault(strokes[:n], group[0])
+
+    conflicts = []
+    for scope, index in by_scope.items():
+        broader = [by_scope[other] for other in _broader_scopes(scope) if other in by_scope]
+        for strokes, group in index.items():
+            for other in broader:
+                # A scope also sees the bindings of every broader scope
+                group = group + other.get(strokes, [])
+            conflicts.extend(_clashes(scope, group))
+
+            for n in range(1, len(strokes)):
+                prefix = strokes[:n]
+                shadow = index.get(prefix)
+                for other in broader:
+                    if shadow:
+                        break
+                    shadow = other.get(prefix)
+                if shadow:
+                    conflicts.append(Conflict(PREFIX, scope, [shadow[0], group[0]]))
+
+        for other in _broader_scopes(scope):
+            # A binding here that is itself a prefix of a broader scope's sequence
+            other_prefixes = prefixes.get(other)
+            if not other_prefixes:
+                continue
+            for strokes, group in index.items():
+                sequence = other_prefixes.get(strokes)
+                if sequence is not None:
+                    conflicts.append(Conflict(PREFIX, scope, [group[0], sequence]))
+
+    workspace_names = {w.get("id"): w.get("name", "") for w in workspaces}
+    return ConflictIndex(conflicts, workspace_names)
@@ -1,16 +1,82 @@
-import keyboard
-import time
+import ctypes
+import os
 import threading
+import keyboard
+import input_injection
 from utils import focus_window, run_command, open_url
+from chord_dispatcher import ChordDispatcher, Binding, BindingTable, GESTURE_PRESS, GESTURE_HOLD
+from chord_compiler import compiler
+from action_executor import ActionExecutor
+from hotkey_conflicts import build_conflict_index
+from latency_stats import LatencyStats
+from macro_actions import MacroRunner, compile_macro
+from foreground_context import ForegroundContext, default_provider, normalize_app, CLASS_PREFIX
+from snippet_templates import compile_template
+from clipboard_guard import default_clipboard
+
+# At most this many actions of a given type run at once. Focusing windows or
+# switching workspaces concurrently only makes them fight each other.
+ACTION_TYPE_LIMITS = {
+    "focus": 1,
+    "workspace": 1,
+    "Ai Voice Mode": 1,
+}
+
+
+def _windows_key_state(scan_code):
+    """Whether Windows sees the key as down right now; None if the scan code maps to no virtual key."""
+    user32 = ctypes.windll.user32
+    # MAPVK_VSC_TO_VK does not tell left from right, so either Ctrl keeps "ctrl" held;
+    # the Windows keys only map with their extended prefix (MAPVK_VSC_TO_VK_EX)
+    vk = user32.MapVirtualKeyW(scan_code, 1) or user32.MapVirtualKeyW(0xE000 | scan_code, 3)
+    if not vk:
+        return None
+    return bool(user32.GetAsyncKeyState(vk) & 0x8000)
+
 
 class HotkeyManager:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, foreground_provider=None):
         self.config_manager = config_manager
         self.is_running = False
         self.current_workspace_id = None # None means "Global" context
+        self.current_app = None # app key of the foreground app if some hotkey is scoped to it
         self.workspace_switcher_callback = None
-        self.registered_hotkeys = []
         self.ai_voice_callback = None
+        self.dispatcher = ChordDispatcher()
+        self.dispatcher.replay = self._replay_chord
+        self.dispatcher.injected = input_injection.is_injected
+        if os.name == "nt":
+            # Lets the dispatcher drop held keys whose up event it never got
+            self.dispatcher.key_state = _windows_key_state
+        self.hook_ref = None
+        # Precompiled binding tables keyed by (workspace id, app key); None in
+        # either place means "no workspace" / "no scoped app in front". Each holds
+        # the bindings active in that context, so switching workspace or app
+        # just points the dispatcher at another table.
+        self.tables = {(None, None): self.dispatcher.table}
+        self._tables_lock = threading.RLock()
+        # Foreground app, cached from focus-change events, never queried from the hook
+        self.foreground = ForegroundContext(foreground_provider or default_provider())
+        self.foreground.add_listener(self._on_foreground_changed)
+        self.app_keys = {} # app key -> number of bindings scoped to it
+        # Trigger-to-action latency per binding and per action type
+        self.latency = LatencyStats()
+        # Callbacks only enqueue here; the work runs off the keyboard hook thread
+        self.executor = ActionExecutor(
+            max_workers=config_manager.get_action_workers(),
+            max_queue=config_manager.get_action_queue_limit(),
+            type_limits=ACTION_TYPE_LIMITS,
+            latency=self.latency,
+        )
+        # Macro hotkeys: steps run on the executor, delays are scheduler deadlines
+        self.macros = MacroRunner(self.executor, self.dispatcher.scheduler, snippet_lookup=self._snippet_text)
+        # A macro waiting for a window checks again whenever a window comes to the front
+        self.foreground.add_window_listener(self.macros.window_changed)
+        # (signature, occurrence) -> function that undoes that registration.
+        # Reloads diff against this instead of tearing everything down.
+        self.registrations = {}
+        self.conflicts = None # ConflictIndex of the compiled bindings, rebuilt lazily
+        self.bindings = {} # every Binding currently in the tables -> (strokes, workspaces, apps)
 
     def set_workspace_switcher(self, callback):
         self.workspace_switcher_callback = callback
@@ -21,258 +87,395 @@ class HotkeyManager:
     def set_current_workspace(self, workspace_id):
         print(f"HotkeyManager: Switching to workspace {workspace_id}")
         self.current_workspace_id = workspace_id
-        if self.is_running:
-            self.reload_hotkeys()
+        self._apply_table()
+
+    def _apply_table(self):
+        # Tables are compiled ahead and only rebuilt on config changes
+        with self._tables_lock:
+            self.dispatcher.set_table(self._table_for(self.current_workspace_id, self.current_app))
+
+    def _app_key(self, exe, window_class):
+        # Only apps some hotkey is scoped to get their own table
+        if exe in self.app_keys:
+            return exe
+        if window_class and CLASS_PREFIX + window_class in self.app_keys:
+            return CLASS_PREFIX + window_class
+        return None
+
+    def _on_foreground_changed(self, exe, window_class):
+        # Focus-change thread
+        app = self._app_key(exe, window_class)
+        if app != self.current_app:
+            self.current_app = app
+            self._apply_table()
 
     def start_listener(self):
         if self.is_running:
             return
         self.reload_hotkeys()
+        # One hook for every chord binding; the dispatcher resolves the held
+        # key set with a single dict lookup per event.
+        self.dispatcher.reset()
+        self.hook_ref = keyboard.hook(self.dispatcher.handle_event, suppress=True)
+        self.foreground.start()
         self.is_running = True
         print("Hotkey Listener Started")
 
     def stop_listener(self):
         if not self.is_running:
             return
+        for remove in self.registrations.values():
+            remove()
+        self.registrations.clear()
+        self.macros.cancel_all()
+        self.foreground.stop()
         keyboard.unhook_all()
+        self.hook_ref = None
+        self.dispatcher.reset()
         self.is_running = False
         print("Hotkey Listener Stopped")
 
+    def apply_timeouts(self):
+        """Pushes the sequence, tap and double-tap timeouts from the config to the live dispatcher."""
+        self.dispatcher.sequence_timeout = self.config_manager.get_sequence_timeout() / 1000.0 # ms to s
+        self.dispatcher.tap_timeout = self.config_manager.get_tap_timeout() / 1000.0
+        self.dispatcher.double_tap_interval = self.config_manager.get_double_tap_interval() / 1000.0
+
     def reload_hotkeys(self):
-        # Clear existing hotkeys managed by this manager
-        for hk in self.registered_hotkeys:
+        """
+        Brings the registered hotkeys in line with the config by diffing the
+        desired bindings against what is currently registered. Unchanged
+        bindings are left alone, new ones are registered before stale ones are
+        removed, so hotkeys keep firing throughout a reload.
+        """
+        # Make sure every known workspace has its table before bindings are diffed in
+        for w in self.config_manager.get_workspaces():
+            self._table_for(w["id"], None)
+
+        self.apply_timeouts()
+        # Compiled triggers are cached per layout; a layout switch recompiles lazily
+        compiler.refresh_layout()
+        self.dispatcher.scan_names = self._scan_names()
+        desired = self._desired_bindings()
+
+        added = 0
+        for key, item in desired.items():
+            if key in self.registrations:
+                continue
+            remove = self._register(key, item)
+            if remove:
+                self.registrations[key] = remove
+                added += 1
+
+        stale = [key for key in self.registrations if key not in desired]
+        for key in stale:
+            self.registrations.pop(key)()
+
+        # Scoped apps may have changed: re-evaluate the cached foreground app
+        self.current_app = self._app_key(self.foreground.exe, self.foreground.window_class)
+        self._apply_table()
+        print(f"DEBUG: Hotkeys reloaded (+{added} / -{len(stale)}), total registered: {len(self.registrations)}")
+
+        self.invalidate_conflicts()
+        for message in self.get_conflicts().messages():
+            print(f"WARNING: Hotkey conflict: {message}")
+
+    def get_conflicts(self):
+        """Duplicate, long/short press and sequence-prefix clashes between the configured triggers."""
+        if self.conflicts is None:
+            self.conflicts = build_conflict_index(self.config_manager.get_hotkeys(), self.config_manager.get_workspaces())
+        return self.conflicts
+
+    def invalidate_conflicts(self):
+        """Drops the cached index; the next get_conflicts() rebuilds it from the config."""
+        self.conflicts = None
+
+    def update_hotkey_status(self, hk):
+        """
+        Applies a single hotkey's active flag without a full reload. Only the
+        binding for this hotkey is added or removed.
+        """
+        if not self.is_running:
+            return
+        signature = self._hotkey_signature(hk)
+        if hk.get("active", True):
+            key = (signature, self._next_occurrence(self.registrations, signature))
+            remove = self._register(key, hk)
+            if remove:
+                self.registrations[key] = remove
+        else:
+            occurrence = self._next_occurrence(self.registrations, signature) - 1
+            if occurrence >= 0:
+                self.registrations.pop((signature, occurrence))()
+        if hk.get("apps"):
+            self.current_app = self._app_key(self.foreground.exe, self.foreground.window_class)
+            self._apply_table()
+        self.invalidate_conflicts()
+
+    @staticmethod
+    def _hotkey_scope(hk):
+        # If 'workspaces' key is missing or empty -> Global (active everywhere)
+        # We also allow 'global' entry in the list to mean "always active"
+        # Otherwise the hotkey is only active in the listed workspaces
+        allowed_workspaces = hk.get("workspaces", [])
+        if not allowed_workspaces or "global" in allowed_workspaces:
+            return None
+        return tuple(allowed_workspaces)
+
+    @staticmethod
+    def _hotkey_apps(hk):
+        # No 'apps' -> any foreground app. Entries are executables ("code.exe")
+        # or window classes ("class:Notepad")
+        apps = [normalize_app(app) for app in hk.get("apps", []) if app.strip()]
+        return tuple(sorted(set(apps))) if apps else None
+
+    @staticmethod
+    def _hotkey_gesture(hk):
+        # 'gesture' is press/hold/tap/double_tap; older configs only have the long_press flag
+        gesture = hk.get("gesture")
+        if gesture:
+            return gesture
+        return GESTURE_HOLD if hk.get("long_press", False) else GESTURE_PRESS
+
+    @staticmethod
+    def _in_context(workspaces, apps, key):
+        workspace_id, app = key
+        return (workspaces is None or workspace_id in workspaces) and (apps is None or app in apps)
+
+    def _table_for(self, workspace_id, app):
+        key = (workspace_id, app)
+        table = self.tables.get(key)
+        if table is None:
+            # Built once per context from the live bindings, then kept up to date by _bind
+            with self._tables_lock:
+                table = BindingTable()
+                for binding, (strokes, workspaces, apps) in self.bindings.items():
+                    if self._in_context(workspaces, apps, key):
+                        table.add(strokes, binding)
+                self.tables[key] = table
+        return table
+
+    def _hotkey_signature(self, hk):
+        # Everything that affects how a hotkey is registered. Two hotkeys with
+        # the same signature are interchangeable.
+        gesture = self._hotkey_gesture(hk)
+        long_press = gesture == GESTURE_HOLD
+        return (
+            "hotkey",
+            hk.get("trigger"),
+            hk.get("type"),
+            hk.get("target"),
+            bool(hk.get("suppress", False)),
+            gesture,
+            hk.get("repeat", "once"),
+            hk.get("repeat_ms", 0),
+            self._hotkey_scope(hk),
+            self._hotkey_apps(hk),
+            self.config_manager.get_long_press_delay() if long_press else None,
+        )
+
+    @staticmethod
+    def _next_occurrence(mapping, signature):
+        # Identical hotkeys are told apart by an occurrence counter
+        occurrence = 0
+        while (signature, occurrence) in mapping:
+            occurrence += 1
+        return occurrence
+
+    def _scan_names(self):
+        # Scan code -> canonical key for every key of the configured triggers,
+        # inactive ones included so a toggle needs no reload. Only a key's first
+        # scan code counts: the others are keypad variants that another key
+        # (numpad 8 and the up arrow) may share.
+        triggers = [hk.get("trigger") for hk in self.config_manager.get_hotkeys()]
+        triggers += [w.get("launch_hotkey") for w in self.config_manager.get_workspaces()]
+        names = {}
+        for trigger in triggers:
+            if not trigger:
+                continue
             try:
-                keyboard.remove_hotkey(hk)
-            except Exception:
-                pass
-        self.registered_hotkeys.clear()
-        
-        # Mapping for long press handlers to keep them alive/clean up
-        self.long_press_handlers = getattr(self, "long_press_handlers", [])
-        for handler in self.long_press_handlers:
-            handler.stop()
-        self.long_press_handlers = []
-
-        hotkeys = self.config_manager.get_hotkeys()
-        for hk in hotkeys:
+                compiled = compiler.compile(trigger)
+            except ValueError:
+                continue
+            if compiled.scan_codes is None:
+                continue
+            for keys, codes in zip(compiled.keys, compiled.scan_codes):
+                for key, key_codes in zip(keys, codes):
+                    if key_codes:
+                        names.setdefault(key_codes[0], key)
+        return names
+
+    def _desired_bindings(self):
+        desired = {}
+        for hk in self.config_manager.get_hotkeys():
             if not hk.get("active", True):
                 continue
-            
-            # Workspace Filtering
-            # If 'workspaces' key is missing or empty -> Global (active everywhere)
-            # If present, must contain current_workspace_id (or 'global')
-            allowed_workspaces = hk.get("workspaces", [])
-            if allowed_workspaces:
-                # If specific workspaces are defined, we check if current ID is in there
-                # We also allow 'global' entry in the list to mean "always active"
-                if self.current_workspace_id not in allowed_workspaces and "global" not in allowed_workspaces:
-                    continue 
-
-            self._register_hotkey(hk)
-
-        # Register Workspace Launch Hotkeys
-        workspaces = self.config_manager.get_workspaces()
-        for w in workspaces:
-            trigger = w.get("launch_hotkey")
-            if trigger and self.workspace_switcher_callback:
-                print(f"Registering workspace hotkey: {trigger} -> {w['name']}")
-                try:
-                    # Use default args to capture variable in lambda
-                    hk_ref = keyboard.add_hotkey(trigger, lambda wid=w['id']: self.workspace_switcher_callback(wid))
-                    self.registered_hotkeys.append(hk_ref)
-                except Exception as e:
-                    print(f"Failed to register workspace hotkey '{trigger}': {e}")
-        
-        print(f"DEBUG: Total registered hotkeys: {len(self.registered_hotkeys)}")
+            signature = self._hotkey_signature(hk)
+            desired[(signature, self._next_occurrence(desired, signature))] = hk
 
-    def _register_hotkey(self, hk):
+        # Workspace Launch Hotkeys
+        if self.workspace_switcher_callback:
+            for w in self.config_manager.get_workspaces():
+                trigger = w.get("launch_hotkey")
+                if trigger:
+                    desired[(("workspace", w["id"], trigger), 0)] = w
+        return desired
+
+    def _register(self, key, item):
+        if key[0][0] == "workspace":
+            return self._register_workspace_hotkey(item)
+        return self._register_hotkey(item)
+
+    def _register_workspace_hotkey(self, w):
+        trigger = w["launch_hotkey"]
+        print(f"Registering workspace hotkey: {trigger} -> {w['name']}")
+        try:
+            # Use default args to capture variable in lambda
+            binding = Binding(trigger, lambda t_down, t_match, wid=w['id']: self.executor.submit(
+                "workspace", self.workspace_switcher_callback, wid, label=trigger, t_down=t_down, t_match=t_match))
+            return self._bind(compiler.compile(trigger).strokes, binding, None, None)
+        except Exception as e:
+            print(f"Failed to register workspace hotkey '{trigger}': {e}")
+            return None
+
+    def _bind(self, strokes, binding, scope, apps):
+        with self._tables_lock:
+            # Precompile the contexts this binding is meant for
+            for workspace_id in scope or (None,):
+                for app in apps or (None,):
+                    self._table_for(workspace_id, app)
+            for app in apps or ():
+                self.app_keys[app] = self.app_keys.get(app, 0) + 1
+
+            self.bindings[binding] = (strokes, scope, apps)
+            for key, table in self.tables.items():
+                if self._in_context(scope, apps, key):
+                    table.add(strokes, binding)
+
+        def remove():
+            with self._tables_lock:
+                for key, table in self.tables.items():
+                    if self._in_context(scope, apps, key):
+                        table.discard(strokes, binding)
+                self.bindings.pop(binding, None)
+                for app in apps or ():
+                    self.app_keys[app] -= 1
+                    if not self.app_keys[app]:
+                        del self.app_keys[app]
+        return remove
+
+    def get_action_stats(self):
+        """Queued / running / dropped counters of the action executor."""
+        return self.executor.stats()
+
+    def get_coalesced_counts(self):
+        """trigger -> number of autorepeat/debounced events swallowed by its repeat policy."""
+        counts = {}
+        for binding in list(self.bindings):
+            if binding.coalesced:
+                counts[binding.trigger] = counts.get(binding.trigger, 0) + binding.coalesced
+        return counts
+
+    def _make_callback(self, hk):
         trigger = hk["trigger"]
         action_type = hk["type"]
         target = hk["target"]
+
+        if action_type == "macro":
+            # Compiled once here; raises ValueError for a malformed macro
+            macro = compile_macro(target)
+
+            def macro_callback(t_down, t_match):
+                self.config_manager.record_hotkey_use(trigger)
+                self.macros.start(macro, trigger, t_down, t_match)
+
+            return macro_callback
         
-        # Define the callback closure
-        def callback():
-            print(f"DEBUG: Hotkey callback triggered for '{trigger}'")
-            print(f"Triggered: {trigger} -> {action_type}: {target}")
-            
-            try:
-                if action_type in ("run", "File", "Folder"):
-                    print(f"DEBUG: Executing run_command for {target}")
-                    run_command(target)
-                elif action_type == "focus":
-                    print(f"DEBUG: Focusing window {target}")
-                    focus_window(target)
-                elif action_type == "open_url":
-                    print(f"DEBUG: Opening URL {target}")
-                    open_url(target)
-                elif action_type == "Ai Voice Mode":
-                    print(f"DEBUG: Activating AI Voice Mode for {target}")
-                    if self.ai_voice_callback:
-                        # Execute callback. Note: This runs on the keyboard hook thread.
-                        # The callback (Qt Signal.emit) is thread-safe and will queue the slot 
-                        # execution on the main thread if connected with Auto/Queued connection.
-                        self.ai_voice_callback(target)
-                    else:
-                        print("ERROR: AI Voice callback not set!")
-            except Exception as e:
-                print(f"ERROR in hotkey callback for {trigger}: {e}")
-                import traceback
-                traceback.print_exc()
+        # Define the callback closure. It runs on the keyboard hook thread, so it
+        # only enqueues the action and returns straight away.
+        def callback(t_down, t_match):
+            self.config_manager.record_hotkey_use(trigger)
+            self.executor.submit(action_type, self._run_action, trigger, action_type, target,
+                                 label=trigger, t_down=t_down, t_match=t_match)
+
+        return callback
+
+    def _snippet_text(self, trigger):
+        snippet = self.config_manager.find_snippet(trigger)
+        if snippet is None:
+            return None
+        try:
+            text, _ = compile_template(self.config_manager.get_snippet_text(snippet) or "").render(default_clipboard().get_text)
+        except ValueError as e:
+            print(f"ERROR: Snippet '{trigger}': {e}")
+            return None
+        return text
+
+    def _run_action(self, trigger, action_type, target):
+        print(f"Triggered: {trigger} -> {action_type}: {target}")
+        
+        try:
+            if action_type in ("run", "File", "Folder"):
+                print(f"DEBUG: Executing run_command for {target}")
+                run_command(target)
+            elif action_type == "focus":
+                print(f"DEBUG: Focusing window {target}")
+                focus_window(target)
+            elif action_type == "open_url":
+                print(f"DEBUG: Opening URL {target}")
+                open_url(target)
+            elif action_type == "Ai Voice Mode":
+                print(f"DEBUG: Activating AI Voice Mode for {target}")
+                if self.ai_voice_callback:
+                    # Execute callback. Note: This runs on an action worker thread.
+                    # The callback (Qt Signal.emit) is thread-safe and will queue the slot 
+                    # execution on the main thread if connected with Auto/Queued connection.
+                    self.ai_voice_callback(target)
+                else:
+                    print("ERROR: AI Voice callback not set!")
+        except Exception as e:
+            print(f"ERROR in hotkey callback for {trigger}: {e}")
+            import traceback
+            traceback.print_exc()
 
+    def _register_hotkey(self, hk):
+        """Registers one hotkey and returns a function that unregisters it (None on failure)."""
+        trigger = hk["trigger"]
+        scope = self._hotkey_scope(hk)
+        apps = self._hotkey_apps(hk)
         try:
+            callback = self._make_callback(hk)
+
             # Check if suppression is requested, default to False (pass-through)
             should_suppress = hk.get("suppress", False)
-            long_press = hk.get("long_press", False)
-            
-            print(f"DEBUG: Registering '{trigger}' (Action: {action_type}, LongPress: {long_press})")
+            gesture = self._hotkey_gesture(hk)
 
-            if long_press:
-                # Use custom LongPressHandler
+            strokes = compiler.compile(trigger).strokes
+            repeat = hk.get("repeat", "once")
+            repeat_interval = hk.get("repeat_ms", 0) / 1000.0 # ms to s
+            if gesture != GESTURE_PRESS and len(strokes) > 1:
+                print(f"'{gesture}' is not supported for multi-step trigger '{trigger}', registering as a normal hotkey")
+                gesture = GESTURE_PRESS
+            if gesture == GESTURE_HOLD:
+                # Resolved by the dispatcher from key-down/up events and one scheduler deadline
                 delay = self.config_manager.get_long_press_delay() / 1000.0 # ms to s
-                handler = LongPressHandler(trigger, callback, delay, should_suppress)
-                handler.start()
-                self.long_press_handlers.append(handler)
+                binding = Binding(trigger, callback, should_suppress, long_press_delay=delay)
             else:
-                hk_ref = keyboard.add_hotkey(trigger, callback, suppress=should_suppress)
-                self.registered_hotkeys.append(hk_ref)
+                # Taps and double taps are timed by the dispatcher from the event stream
+                binding = Binding(trigger, callback, should_suppress, gesture=gesture,
+                                  repeat=repeat, repeat_interval=repeat_interval)
+            return self._bind(strokes, binding, scope, apps)
         except Exception as e:
             print(f"Failed to register hotkey '{trigger}': {e}")
+            return None
 
-
-class LongPressHandler:
-    def __init__(self, trigger, callback, delay, suppress=True):
-        self.trigger = trigger
-        self.callback = callback
-        self.delay = delay
-        self.suppress = suppress
-        self.timer = None
-        self.is_execution_triggered = False
-        self.active = False
-        self.hotkey_ref = None
-        self.poll_interval = 0.05 # Check every 50ms
-        print(f"DEBUG: LongPressHandler init for '{trigger}' with delay {delay}s")
-
-    def start(self):
-        try:
-            # For long presses, especially multi-key combos, add_hotkey with trigger_on_release=False
-            # can be flaky or raise exceptions depending on the library version
-            # Let's use it but catch specific errors, or just fall back to standard press detection
-            self.hotkey_ref = keyboard.add_hotkey(
-                self.trigger, 
-                self.on_activate, 
-                suppress=self.suppress, 
-                trigger_on_release=False
-            )
-            self.active = True
-        except ValueError as ve:
-            print(f"ValueError starting LongPressHandler for {self.trigger} - likely a combination issue: {ve}")
-            # Fallback for complex triggers that add_hotkey rejects
-            # E.g., ctrl+j+k might not parse well for add_hotkey but hook catches it.
-            # In a real app we might need a custom hook parser, but here we can try a simpler bind
-            try:
-                self.hotkey_ref = keyboard.on_press_key(
-                    self.trigger.split("+")[-1], # hook to the last key
-                    self.on_activate_fallback,
-                    suppress=self.suppress
-                )
-                self.active = True
-            except Exception as e2:
-                print(f"Fallback also failed for {self.trigger}: {e2}")
-        except Exception as e:
-            print(f"Error starting LongPressHandler for {self.trigger}: {e}")
-
-    def on_activate_fallback(self, event):
-        # We only hooked the last key. Check if others are pressed.
-        parts = self.trigger.lower().split('+')
-        modifiers = parts[:-1]
-        for mod in modifiers:
-            if not keyboard.is_pressed(mod):
-                return # Not all keys pressed
-        self.on_activate()
-
-    def stop(self):
-        self.active = False
-        if self.timer:
-            self.timer.cancel()
-        if self.hotkey_ref:
-            try:
-                keyboard.remove_hotkey(self.hotkey_ref)
-            except:
-                pass
-        self.hotkey_ref = None
-
-    def on_activate(self):
-        if not self.active: return
-        
-        # Avoid re-entry if already processing a press
-        if self.timer and self.timer.is_alive():
-            return
-
-        self.is_execution_triggered = False
-        
-        # Start polling for release
-        self.start_time = time.time()
-        self.check_release_loop()
-
-    def check_release_loop(self):
-        if not self.active: return
-        
-        # Check if keys are still pressed
-        is_pressed = keyboard.is_pressed(self.trigger)
-        elapsed = time.time() - self.start_time
-        # print(f"DEBUG: Checking {self.trigger}: pressed={is_pressed}, elapsed={elapsed:.2f}s")
-        
-        if is_pressed:
-            if elapsed >= self.delay:
-                # Long Press Condition Met
-                print(f"DEBUG: Long Press Met! {elapsed:.2f}s >= {self.delay}s")
-                if not self.is_execution_triggered:
-                    self.execute()
-                # We stop polling but don't replay.
-                # User is still holding keys, they might release later.
-                # We can wait for release to reset? 
-                # Or just exit loop and let next press trigger?
-                # If we exit, and user holds for 10s, next "activate" trigger won't fire until release and re-press.
-                # So we just return.
-                return
-            else:
-                # Still holding, but not enough time. Schedule next check.
-                self.timer = threading.Timer(self.poll_interval, self.check_release_loop)
-                self.timer.start()
-        else:
-            # Released!
-            elapsed = time.time() - self.start_time
-            if elapsed < self.delay and not self.is_execution_triggered:
-                # Short Press -> Replay
-                if self.suppress:
-                    self.replay_hotkey()
-
-    def execute(self):
-        self.is_execution_triggered = True
-        if self.callback:
-            self.callback()
-
-    def replay_hotkey(self):
-        # Unhook, Send, Rehook
-        self.active = False # prevent self-trigger
+    @staticmethod
+    def _replay_chord(trigger):
+        # Re-send suppressed strokes that turned out not to be a hotkey: a long
+        # press released early, or the strokes of an abandoned sequence
+        # ("ctrl+k, ctrl+x"). The injection layer tags them so the dispatcher
+        # lets them straight through.
         try:
-            if self.hotkey_ref:
-                keyboard.remove_hotkey(self.hotkey_ref)
-            
-            # Send the combination
-            keyboard.send(self.trigger)
-            
-            # Brief wait to ensure OS processes input before we re-hook
-            time.sleep(0.05)
-            
-            # Re-hook
-            self.hotkey_ref = keyboard.add_hotkey(
-                self.trigger, 
-                self.on_activate, 
-                suppress=self.suppress, 
-                trigger_on_release=False
-            )
-            self.active = True
+            input_injection.send(compiler.compile(trigger))
         except Exception as e:
-            print(f"Error replaying hotkey {self.trigger}: {e}")
-            self.active = True # Restore safety
+            print(f"Error replaying hotkey {trigger}: {e}")
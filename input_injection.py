@@ -0,0 +1,246 @@
+"""
+Shared layer for synthetic keystrokes.
+
+Everything the app types by itself (the replay of a suppressed long-press
+chord, the backspaces and Ctrl+V of a text expansion, ...) goes through
+send()/write() here. Before injecting, each call registers the key events it
+is about to produce; when those events come back through the keyboard hook,
+is_injected() recognises and consumes them, so the hotkey dispatcher and the
+text expander can skip them without unhooking anything.
+
+The keyboard library does not expose dwExtraInfo, so events are matched by
+(key name, up/down) against this local registry instead. Registrations expire
+after INJECTION_TTL so an event that never arrives cannot swallow a real
+keystroke later on.
+
+The result is cached on the event object: the suppressing hook (dispatcher)
+and the plain listeners (text expander) receive the same KeyboardEvent, so
+whichever looks first consumes the registration and the others read the tag.
+
+Every registration belongs to a Batch, which counts its events coming back.
+Batch.wait() therefore works as an acknowledgement: once it returns, the
+system has taken all of the batch's input, so callers need no fixed sleeps.
+
+replace() builds a whole text edit (N backspaces, then a paste or typed
+text) as one input sequence and submits it in a single SendInput call, so
+the edit cannot be interleaved with the user's typing.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import keyboard
+
+from chord_dispatcher import normalize_key, parse_sequence
+
+INJECTION_TTL = 1.0 # seconds a registered event may take to come back through the hook
+
+# keyboard.write() on Windows types everything except these through
+# VK_PACKET unicode input, which never reaches the hook
+_WRITE_KEYS = {"\b": "backspace", "\n": "enter"}
+
+# Virtual-key codes for the keys replace() presses
+_VK = {"backspace": 0x08, "tab": 0x09, "enter": 0x0D, "ctrl": 0x11, "left": 0x25, "v": 0x56}
+
+_lock = threading.Lock()
+_pending = {} # (key name, event type) -> deque of (expiry time, Batch)
+
+
+class Batch:
+    """The events of one injection; wait() returns once the hook has seen them all."""
+
+    def __init__(self, count):
+        self.count = count
+        self.remaining = count
+        self.done = threading.Event()
+        if not count:
+            self.done.set()
+
+    def _seen(self):
+        # Caller holds _lock
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.done.set()
+
+    def wait(self, timeout=INJECTION_TTL):
+        """True if every event came back within the timeout."""
+        return self.done.wait(timeout)
+
+
+def _expect(keys):
+    # Registers one down and one up event for each key name
+    now = time.monotonic()
+    deadline = now + INJECTION_TTL
+    batch = Batch(2 * len(keys))
+    with _lock:
+        # Forget registrations whose events never came back
+        for slot in [slot for slot, entries in _pending.items() if entries[-1][0] < now]:
+            del _pending[slot]
+        for key in keys:
+            for event_type in ("down", "up"):
+                _pending.setdefault((key, event_type), deque()).append((deadline, batch))
+    return batch
+
+
+def is_injected(event):
+    """True if the event is a keystroke we synthesized ourselves."""
+    tag = getattr(event, "_injected", None)
+    if tag is not None:
+        return tag
+    tag = False
+    if _pending and event.name:
+        slot = (normalize_key(event.name), event.event_type)
+        with _lock:
+            entries = _pending.get(slot)
+            if entries:
+                now = time.monotonic()
+                while entries and entries[0][0] < now:
+                    entries.popleft()
+                if entries:
+                    entries.popleft()[1]._seen()
+                    tag = True
+                if not entries:
+                    del _pending[slot]
+    try:
+        event._injected = tag
+    except AttributeError:
+        pass
+    return tag
+
+
+def send(combo):
+    """
+    keyboard.send() for a chord such as 'ctrl+v', or a CompiledTrigger, whose
+    pre-resolved scan codes are sent without parsing the trigger again.
+    """
+    if isinstance(combo, str) or not combo.scan_codes:
+        text = combo if isinstance(combo, str) else combo.text
+        batch = _expect([key for chord in parse_sequence(text) for key in chord])
+        keyboard.send(text)
+        return batch
+    batch = _expect([key for chord in combo.strokes for key in chord])
+    # Pressed here rather than through keyboard.send(): parse_hotkey() takes
+    # any one-element sequence for a single key, so a one-stroke chord would
+    # only press its first key
+    for stroke in combo.scan_codes:
+        for codes in stroke:
+            keyboard.press(codes[0])
+        for codes in reversed(stroke):
+            keyboard.release(codes[0])
+    return batch
+
+
+def write(text, delay=0):
+    """keyboard.write() for literal text."""
+    batch = _expect([_WRITE_KEYS[char] for char in text if char in _WRITE_KEYS])
+    keyboard.write(text, delay=delay)
+    return batch
+
+
+def replace(deletions, text="", paste=False, cursor_back=0):
+    """
+    Deletes `deletions` characters with backspace, then inserts: Ctrl+V if
+    paste is set (the caller has already put the text on the clipboard),
+    otherwise `text` typed out. Finally moves the caret `cursor_back`
+    characters left. The whole edit is one input sequence handed to
+    `backend` in one call. Returns its Batch.
+    """
+    inputs = [("backspace", True), ("backspace", False)] * deletions
+    keys = ["backspace"] * deletions
+    if paste:
+        inputs += [("ctrl", True), ("v", True), ("v", False), ("ctrl", False)]
+        keys += ["ctrl", "v"]
+    else:
+        for char in text:
+            key = _WRITE_KEYS.get(char)
+            if key:
+                inputs += [(key, True), (key, False)]
+                keys.append(key)
+            else:
+                inputs.append((None, char))
+    inputs += [("left", True), ("left", False)] * cursor_back
+    keys += ["left"] * cursor_back
+    batch = _expect(keys)
+    backend(inputs)
+    return batch
+
+
+def _send_with_keyboard(inputs):
+    # Portable fallback: the same sequence through the keyboard library, event by event
+    for key, value in inputs:
+        if key is None:
+            keyboard.write(value)
+        elif value:
+            keyboard.press(key)
+        else:
+            keyboard.release(key)
+
+
+_input_types = None
+
+
+def _send_input(inputs):
+    # inputs: (key name, down) for keys, (None, char) for unicode text
+    import ctypes
+
+    global _input_types
+    if _input_types is None:
+        _input_types = _define_input_types()
+    INPUT, KEYBDINPUT = _input_types
+    KEYEVENTF_KEYUP = 0x0002
+    KEYEVENTF_UNICODE = 0x0004
+
+    events = []
+    for key, value in inputs:
+        if key is None:
+            # Characters outside the BMP are sent as two UTF-16 code units
+            data = value.encode("utf-16-le")
+            for i in range(0, len(data), 2):
+                unit = int.from_bytes(data[i:i + 2], "little")
+                events.append(KEYBDINPUT(0, unit, KEYEVENTF_UNICODE, 0, 0))
+                events.append(KEYBDINPUT(0, unit, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP, 0, 0))
+        else:
+            events.append(KEYBDINPUT(_VK[key], 0, 0 if value else KEYEVENTF_KEYUP, 0, 0))
+    if not events:
+        return
+    array = (INPUT * len(events))()
+    for slot, ki in zip(array, events):
+        slot.type = 1 # INPUT_KEYBOARD
+        slot.ki = ki
+    sent = ctypes.windll.user32.SendInput(len(array), array, ctypes.sizeof(INPUT))
+    if sent != len(array):
+        print(f"ERROR: SendInput injected {sent} of {len(array)} events")
+
+
+def _define_input_types():
+    import ctypes
+    from ctypes import wintypes
+
+    class KEYBDINPUT(ctypes.Structure):
+        _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD), ("dwFlags", wintypes.DWORD),
+                    ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class MOUSEINPUT(ctypes.Structure):
+        # Only here so the union, and so sizeof(INPUT), has the size SendInput expects
+        _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG), ("mouseData", wintypes.DWORD),
+                    ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class _UNION(ctypes.Union):
+        _fields_ = [("ki", KEYBDINPUT), ("mi", MOUSEINPUT)]
+
+    class INPUT(ctypes.Structure):
+        _anonymous_ = ("u",)
+        _fields_ = [("type", wintypes.DWORD), ("u", _UNION)]
+
+    return INPUT, KEYBDINPUT
+
+
+# Takes a list of (key name, down) / (None, char) and injects it in one go;
+# replaceable, e.g. by the injection benchmark
+backend = _send_input if os.name == "nt" else _send_with_keyboard
+
+
+def clear():
+    with _lock:
+        _pending.clear()
@@ -0,0 +1,136 @@
+"""
+Trigger-to-action latency histograms.
+
+The dispatch path stamps each hotkey with a monotonic clock (time.perf_counter_ns)
+at key-down, match, enqueue, action start and action end. When the action has
+finished, the worker records the intervals between those stamps here, once per
+binding and once per action type.
+
+Histograms have fixed memory: log-linear buckets (8 per power of two, so
+values are within ~12.5%) from 1 us up to about a minute, and everything above
+goes into the last bucket.
+"""
+import json
+import threading
+
+# Intervals between the five timestamps, plus the end-to-end total
+STAGES = ("hook", "enqueue", "queue_wait", "action", "total")
+STAGE_LABELS = {
+    "hook": "Key-down → match",
+    "enqueue": "Match → enqueue",
+    "queue_wait": "Enqueue → action start",
+    "action": "Action run time",
+    "total": "Key-down → action end",
+}
+
+SUB_BITS = 3
+SUB_BUCKETS = 1 << SUB_BITS # buckets per power of two
+MAX_EXPONENT = 26 # 2**26 us ~= 67 s
+BUCKET_COUNT = (MAX_EXPONENT + 1) * SUB_BUCKETS
+
+
+def _bucket_index(value_us):
+    if value_us < 2 * SUB_BUCKETS:
+        return max(0, value_us)
+    shift = value_us.bit_length() - (SUB_BITS + 1)
+    index = (shift + 1) * SUB_BUCKETS + (value_us >> shift) - SUB_BUCKETS
+    return min(index, BUCKET_COUNT - 1)
+
+
+def _bucket_value(index):
+    # Midpoint of the bucket, in microseconds
+    if index < 2 * SUB_BUCKETS:
+        return float(index)
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return ((mantissa << shift) + ((mantissa + 1) << shift)) / 2.0
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "total", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.total = 0
+        self.max_us = 0
+
+    def record(self, value_ns):
+        value_us = max(0, value_ns) // 1000
+        self.counts[_bucket_index(value_us)] += 1
+        self.total += 1
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def percentile(self, p):
+        """Approximate p-th percentile (0-100) in milliseconds, None if empty."""
+        if not self.total:
+            return None
+        rank = max(1, int(round(p / 100.0 * self.total)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_value(index), self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_us / 1000.0,
+        }
+
+
+class LatencyStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_binding = {} # binding label -> stage -> LatencyHistogram
+        self.by_action_type = {} # action type -> stage -> LatencyHistogram
+
+    def record(self, binding, action_type, t_down, t_match, t_enqueue, t_start, t_end):
+        """Records one finished action. All timestamps are perf_counter_ns() values."""
+        intervals = (
+            t_match - t_down,
+            t_enqueue - t_match,
+            t_start - t_enqueue,
+            t_end - t_start,
+            t_end - t_down,
+        )
+        with self._lock:
+            for group, key in ((self.by_binding, binding), (self.by_action_type, action_type)):
+                stages = group.get(key)
+                if stages is None:
+                    stages = group[key] = {stage: LatencyHistogram() for stage in STAGES}
+                for stage, value in zip(STAGES, intervals):
+                    stages[stage].record(value)
+
+    def rows(self, stage="total"):
+        """(kind, name, summary) tuples for one stage, for display."""
+        with self._lock:
+            rows = [("Binding", name, stages[stage].summary()) for name, stages in sorted(self.by_binding.items())]
+            rows += [("Action type", name, stages[stage].summary()) for name, stages in sorted(self.by_action_type.items())]
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self.by_binding.clear()
+            self.by_action_type.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "bindings": {name: {stage: h.summary() for stage, h in stages.items()}
+                             for name, stages in self.by_binding.items()},
+                "action_types": {name: {stage: h.summary() for stage, h in stages.items()}
+                                 for name, stages in self.by_action_type.items()},
+            }
+
+    def dump_json(self, file_path):
+        try:
+            with open(file_path, "w") as f:
+                json.dump(self.to_dict(), f, indent=4)
+            return True, "Success"
+        except IOError as e:
+            return False, f"Error writing latency stats: {e}"
@@ -0,0 +1,269 @@
+"""
+Macro actions: an ordered list of steps bound to one hotkey.
+
+A macro hotkey has type "macro" and its steps in the target field, separated
+by ';' (write ';;' for a literal semicolon):
+
+    launch notepad.exe; wait Notepad 5000; focus Notepad; type Hello;; world; send ctrl+s
+
+    launch <command>            utils.run_command
+    open <url>                  utils.open_url
+    focus <window title>        utils.focus_window
+    wait <window title> [ms]    until a window with that title exists (default 5000 ms)
+    type <text>                 types the text
+    snippet <trigger>           types the replacement of a text-expansion snippet
+    send <chord>                sends a key chord such as ctrl+s
+    delay <ms>
+
+The text is compiled once per reload into a Macro. A run executes its steps
+on the ActionExecutor, and every delay becomes a deadline on the
+DeadlineScheduler instead of a sleeping thread. A wait does not poll: the run
+is parked until window_changed() reports a new foreground window (HotkeyManager
+hooks it to the ForegroundContext), and its only deadline is the timeout, which
+checks one last time for windows that opened without coming to the front. So
+a waiting macro holds no worker, and a run can be cancelled between any two
+steps. Pressing the hotkey again while its macro is still running cancels it.
+"""
+import threading
+
+import input_injection
+from chord_dispatcher import parse_sequence
+from utils import run_command, open_url, focus_window, find_window
+
+LAUNCH = "launch"
+OPEN = "open"
+FOCUS = "focus"
+WAIT = "wait"
+TYPE = "type"
+SNIPPET = "snippet"
+SEND = "send"
+DELAY = "delay"
+STEP_OPS = (LAUNCH, OPEN, FOCUS, WAIT, TYPE, SNIPPET, SEND, DELAY)
+
+DEFAULT_WAIT_TIMEOUT = 5000 # ms
+
+
+class MacroStep:
+    __slots__ = ("op", "arg", "ms")
+
+    def __init__(self, op, arg, ms=0):
+        self.op = op
+        self.arg = arg
+        self.ms = ms
+
+    def __repr__(self):
+        return f"MacroStep({self.op!r}, {self.arg!r}, ms={self.ms})"
+
+
+class Macro:
+    __slots__ = ("text", "steps")
+
+    def __init__(self, text, steps):
+        self.text = text
+        self.steps = steps # tuple of MacroStep
+
+
+def _split_steps(text):
+    # ';' separates steps, ';;' is a literal semicolon
+    placeholder = "\0"
+    return [part.replace(placeholder, ";") for part in text.replace(";;", placeholder).split(";")]
+
+
+def compile_macro(text):
+    """Parses macro text into a Macro. Raises ValueError describing the first bad step."""
+    steps = []
+    for number, part in enumerate(_split_steps(text or ""), 1):
+        part = part.strip()
+        if not part:
+            continue
+        op, _, arg = part.partition(" ")
+        op = op.lower()
+        if op not in STEP_OPS:
+            raise ValueError(f"Step {number}: unknown step '{op}'")
+        ms = 0
+        if op == DELAY:
+            if not arg.strip().isdigit():
+                raise ValueError(f"Step {number}: delay needs a number of milliseconds")
+            ms = int(arg)
+            arg = ""
+        elif op == WAIT:
+            title, _, timeout = arg.strip().rpartition(" ")
+            if title and timeout.isdigit():
+                arg, ms = title, int(timeout)
+            else:
+                ms = DEFAULT_WAIT_TIMEOUT
+        elif op == SEND:
+            try:
+                parse_sequence(arg)
+            except ValueError:
+                raise ValueError(f"Step {number}: send needs a key chord such as ctrl+s")
+        if op not in (DELAY, TYPE) and not arg.strip():
+            raise ValueError(f"Step {number}: '{op}' needs an argument")
+        steps.append(MacroStep(op, arg if op == TYPE else arg.strip(), ms))
+    if not steps:
+        raise ValueError("Macro has no steps")
+    return Macro(text, tuple(steps))
+
+
+class MacroRun:
+    __slots__ = ("macro", "label", "index", "cancelled", "call", "waiting", "timed_out")
+
+    def __init__(self, macro, label):
+        self.macro = macro
+        self.label = label
+        self.index = 0
+        self.cancelled = False
+        self.call = None # pending scheduler call: the delay, or the wait timeout
+        self.waiting = False # parked on a wait step until a window change
+        self.timed_out = False
+
+
+class MacroRunner:
+    def __init__(self, executor, scheduler, snippet_lookup=None):
+        self.executor = executor
+        self.scheduler = scheduler
+        # snippet_lookup(trigger) -> replacement text or None
+        self.snippet_lookup = snippet_lookup
+        self._runs = {} # label -> MacroRun
+        self._lock = threading.Lock()
+
+    def start(self, macro, label, t_down=None, t_match=None):
+        """
+        Starts a run of the macro, or cancels the run already in progress for
+        this label. Cheap enough to call from the hook thread.
+        """
+        with self._lock:
+            current = self._runs.get(label)
+            if current is not None:
+                self._cancel(current)
+                print(f"DEBUG: Macro '{label}' cancelled")
+                return None
+            run = self._runs[label] = MacroRun(macro, label)
+        self._submit(run, t_down, t_match)
+        return run
+
+    def cancel(self, label):
+        with self._lock:
+            run = self._runs.get(label)
+            if run is not None:
+                self._cancel(run)
+
+    def cancel_all(self):
+        with self._lock:
+            for run in list(self._runs.values()):
+                self._cancel(run)
+
+    def running(self):
+        with self._lock:
+            return list(self._runs)
+
+    def window_changed(self):
+        """A window came to the front: waiting runs check for their window again."""
+        with self._lock:
+            woken = [run for run in self._runs.values() if run.waiting]
+            for run in woken:
+                run.waiting = False
+        for run in woken:
+            self._submit_check(run)
+
+    def _cancel(self, run):
+        # Caller holds the lock
+        run.cancelled = True
+        self.scheduler.cancel(run.call)
+        self._runs.pop(run.label, None)
+
+    def _finish(self, run):
+        with self._lock:
+            if self._runs.get(run.label) is run:
+                del self._runs[run.label]
+
+    def _submit(self, run, t_down=None, t_match=None):
+        if run.cancelled:
+            return
+        if not self.executor.submit("macro", self._run_steps, run, label=run.label, t_down=t_down, t_match=t_match):
+            print(f"WARNING: Macro '{run.label}' stopped, action queue is full")
+            self._finish(run)
+
+    def _run_steps(self, run):
+        # Worker thread: runs steps until the macro ends or has to wait
+        try:
+            steps = run.macro.steps
+            while run.index < len(steps):
+                if run.cancelled:
+                    return
+                step = steps[run.index]
+                if step.op == DELAY:
+                    run.index += 1
+                    run.call = self.scheduler.schedule(step.ms / 1000.0, self._submit, run)
+                    return
+                if step.op == WAIT:
+                    if find_window(step.arg) is None:
+                        with self._lock:
+                            if run.cancelled:
+                                return
+                            run.waiting = True
+                            run.timed_out = False
+                            run.call = self.scheduler.schedule(step.ms / 1000.0, self._wait_timeout, run, run.index)
+                        return
+                else:
+                    self._run_step(step)
+                run.index += 1
+            self._finish(run)
+        except Exception:
+            self._finish(run)
+            raise
+
+    def _wait_timeout(self, run, index):
+        # Scheduler thread
+        with self._lock:
+            if run.cancelled or run.index != index:
+                return
+            run.timed_out = True
+            check, run.waiting = run.waiting, False
+        # Otherwise a check is already on its way and will see timed_out
+        if check:
+            self._submit_check(run)
+
+    def _submit_check(self, run):
+        if not self.executor.submit("macro", self._check_wait, run, label=run.label):
+            print(f"WARNING: Macro '{run.label}' stopped, action queue is full")
+            self._finish(run)
+
+    def _check_wait(self, run):
+        # Worker thread: the run is on a wait step and not parked
+        if run.cancelled:
+            return
+        step = run.macro.steps[run.index]
+        if find_window(step.arg) is not None:
+            with self._lock:
+                self.scheduler.cancel(run.call)
+                run.call = None
+            run.index += 1
+            self._run_steps(run)
+            return
+        with self._lock:
+            give_up = run.timed_out
+            if not give_up:
+                run.waiting = True
+        if give_up:
+            print(f"WARNING: Macro '{run.label}' gave up waiting for window '{step.arg}'")
+            self._finish(run)
+
+    def _run_step(self, step):
+        print(f"DEBUG: Macro step {step.op} {step.arg}")
+        if step.op == LAUNCH:
+            run_command(step.arg)
+        elif step.op == OPEN:
+            open_url(step.arg)
+        elif step.op == FOCUS:
+            focus_window(step.arg)
+        elif step.op == TYPE:
+            input_injection.write(step.arg)
+        elif step.op == SNIPPET:
+            text = self.snippet_lookup(step.arg) if self.snippet_lookup else None
+            if text is None:
+                print(f"WARNING: Macro snippet '{step.arg}' not found")
+            else:
+                input_injection.write(text)
+        elif step.op == SEND:
+            input_injection.send(step.arg)
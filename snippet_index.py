@@ -0,0 +1,142 @@
+"""
+Ranked prefix index over snippet triggers, for the autocomplete popup.
+
+complete(prefix) returns the best few snippets whose trigger starts with the
+prefix: first the ones the user has expanded, best rank first, then the
+rest in alphabetical order.
+
+- keys: the lower-cased triggers in one sorted list; bisect finds the range
+  for a prefix without touching the others
+- ranked: (-rank, key) of the used triggers, best first, capped at
+  MAX_RANKED
+
+A lookup ranks the keys in the prefix range directly when there are fewer
+of them than ranked triggers, and otherwise walks the ranked list, which
+then finds matches quickly. Either way it touches at most MAX_RANKED keys
+plus a few, whatever the number of snippets.
+
+A rank combines frequency and recency ("frecency"): every use adds 1 to a
+score that halves every HALF_LIFE. It is stored as log2(score) + t/HALF_LIFE,
+which orders triggers the same way at any later time, so ranks never have
+to be recomputed as time passes.
+
+update() applies only the difference to the previous set of snippets, so a
+reload that changes one snippet moves one key. seed() restores the ranking
+from persisted use counts; it counts every past use at the last-use time.
+"""
+import bisect
+import math
+import threading
+import time
+
+HALF_LIFE = 7 * 24 * 3600.0 # seconds after which a use counts half
+MAX_RANKED = 1000 # used triggers kept in rank order
+REBUILD_THRESHOLD = 256 # more changes than this re-sorts instead of inserting one by one
+
+
+class SnippetIndex:
+    def __init__(self, half_life=HALF_LIFE, max_ranked=MAX_RANKED):
+        self.half_life = half_life
+        self.max_ranked = max_ranked
+        self.keys = [] # lower-cased triggers, sorted
+        self.entries = {} # lower-cased trigger -> (trigger, value)
+        self.ranked = [] # (-rank, key), best first
+        self._usage = {} # lower-cased trigger -> (score, last used)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def update(self, snippets):
+        """
+        snippets: iterable of (trigger, value), the value being whatever the
+        caller wants back from complete(). The first of two equal triggers wins.
+        """
+        new = {}
+        for trigger, value in snippets:
+            key = trigger.lower()
+            if key and key not in new:
+                new[key] = (trigger, value)
+        with self._lock:
+            removed = [key for key in self.entries if key not in new]
+            added = [key for key in new if key not in self.entries]
+            if len(removed) + len(added) > REBUILD_THRESHOLD:
+                self.keys = sorted(new)
+            else:
+                for key in removed:
+                    del self.keys[bisect.bisect_left(self.keys, key)]
+                for key in added:
+                    bisect.insort(self.keys, key)
+            self.entries = new
+
+    def complete(self, prefix, limit=5):
+        """Up to `limit` (trigger, value) whose trigger starts with prefix, best first."""
+        prefix = prefix.lower()
+        with self._lock:
+            keys, entries, usage = self.keys, self.entries, self._usage
+            lo = bisect.bisect_left(keys, prefix)
+            hi = bisect.bisect_left(keys, prefix + "\uffff", lo)
+            if hi - lo <= len(self.ranked):
+                # Few triggers share the prefix: rank just those
+                matches = keys[lo:hi]
+                used = sorted((-self._rank(*usage[key]), key) for key in matches if key in usage)
+                found = [key for _, key in used[:limit]]
+                for key in matches:
+                    if len(found) == limit:
+                        break
+                    if key not in usage:
+                        found.append(key)
+                return [entries[key] for key in found]
+
+            # Many do: walk the used triggers best first, then fill up alphabetically
+            found = []
+            for _, key in self.ranked:
+                if key.startswith(prefix) and key in entries:
+                    found.append(key)
+                    if len(found) == limit:
+                        return [entries[key] for key in found]
+            for key in keys[lo:min(hi, lo + 2 * limit)]:
+                if len(found) == limit:
+                    break
+                if key not in found:
+                    found.append(key)
+            return [entries[key] for key in found]
+
+    def seed(self, usage):
+        """
+        Replaces the ranking with persisted usage: iterable of (trigger,
+        count, last used). Only the best max_ranked are kept.
+        """
+        seeded = {}
+        for trigger, count, last in usage:
+            if count > 0 and last:
+                seeded[trigger.lower()] = (float(count), last)
+        ranked = sorted((-self._rank(*value), key) for key, value in seeded.items())[:self.max_ranked]
+        with self._lock:
+            self.ranked = ranked
+            self._usage = {key: seeded[key] for _, key in ranked}
+
+    def record_use(self, trigger, when=None):
+        """Counts one expansion of the trigger."""
+        key = trigger.lower()
+        now = time.time() if when is None else when
+        with self._lock:
+            score, last = self._usage.get(key, (0.0, now))
+            old = self._rank(score, last) if score else None
+            score = score * 2 ** ((last - now) / self.half_life) + 1
+            self._usage[key] = (score, now)
+            self._place(key, old, self._rank(score, now))
+
+    def _rank(self, score, last):
+        return math.log2(score) + last / self.half_life
+
+    def _place(self, key, old, new):
+        # Caller holds the lock
+        if old is not None:
+            i = bisect.bisect_left(self.ranked, (-old, key))
+            if i < len(self.ranked) and self.ranked[i] == (-old, key):
+                del self.ranked[i]
+        bisect.insort(self.ranked, (-new, key))
+        if len(self.ranked) > self.max_ranked:
+            _, dropped = self.ranked.pop()
+            self._usage.pop(dropped, None)
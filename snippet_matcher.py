@@ -0,0 +1,355 @@
+"""
+Incremental snippet matcher for TextExpander.
+
+All active triggers are compiled into one Aho-Corasick automaton (a trie of
+the lower-cased triggers plus failure links). The expander feeds it one
+character per keystroke, so the work per key does not depend on the number of
+snippets. Transitions are memoized per state, so after warm-up a keystroke is
+a single dict lookup.
+
+Triggers may contain spaces and punctuation ("on my way", "e.g."). Each
+snippet expands in one of two modes:
+
+- "delimiter" (default): when a delimiter key is typed right after the
+  trigger, and the trigger starts at a word boundary
+- "immediate": as soon as the last character of the trigger is typed
+
+Overlaps are resolved deterministically: at each position the longest
+matching trigger wins (for delimiter triggers, the longest one that starts
+at a word boundary), and an immediate trigger fires as soon as it is
+complete, before any longer delimiter trigger could. Immediate triggers do
+not need a word boundary, so they usually carry a prefix such as ';sig'.
+
+Matching ignores case, but the case the trigger was typed in is kept: the
+typing buffer counts letters and capitals as characters arrive, so the case
+pattern of a match is known without reading it back, and match_case tells
+the expander how to change the case of the replacement.
+"""
+from collections import deque
+
+from snippet_templates import CASE_LOWER, CASE_CAPITALIZED, CASE_UPPER, CASE_MIXED
+
+MODE_DELIMITER = "delimiter"
+MODE_IMMEDIATE = "immediate"
+MODES = (MODE_DELIMITER, MODE_IMMEDIATE)
+
+# Characters that end a word; a delimiter-mode trigger must start right after one
+WORD_BOUNDARIES = frozenset(" \t\n.,!?;:")
+
+
+def _case(letters, capitals, first_capital):
+    if not capitals:
+        return CASE_LOWER if letters else None
+    if capitals == letters:
+        return CASE_UPPER if letters > 1 else CASE_CAPITALIZED
+    if capitals == 1 and first_capital:
+        return CASE_CAPITALIZED
+    return CASE_MIXED
+
+
+def text_case(text):
+    """The case pattern (CASE_*) of text, or None if it has no letters."""
+    letters = capitals = 0
+    first_capital = None
+    for char in text:
+        if char.isupper():
+            letters += 1
+            capitals += 1
+        elif char.islower():
+            letters += 1
+        else:
+            continue
+        if first_capital is None:
+            first_capital = char.isupper()
+    return _case(letters, capitals, first_capital)
+
+
+def propagated_case(typed, configured):
+    """
+    How to change the case of a replacement whose trigger was typed in case
+    pattern `typed`: CASE_CAPITALIZED, CASE_UPPER, or None to leave it as is.
+    A trigger typed the way it is configured ("BTW" for "BTW") changes nothing.
+    """
+    if typed == configured or typed not in (CASE_CAPITALIZED, CASE_UPPER):
+        return None
+    return typed
+
+
+class SnippetMatch:
+    __slots__ = ("trigger", "replacement", "mode", "length", "case", "first_letter")
+
+    def __init__(self, trigger, replacement, mode):
+        self.trigger = trigger # as configured
+        self.replacement = replacement
+        self.mode = mode
+        self.length = len(trigger)
+        self.case = text_case(trigger)
+        # Offset of the first letter, whose case tells capitalized from mixed
+        self.first_letter = next((i for i, char in enumerate(trigger) if char.isupper() or char.islower()), 0)
+
+    def __repr__(self):
+        return f"SnippetMatch({self.trigger!r}, mode={self.mode})"
+
+
+# A trigger's providers are prefetched once this many of its characters are typed
+PREFETCH_MIN_PREFIX = 2
+
+
+class _State:
+    __slots__ = ("goto", "fail", "next", "own", "delimiters", "immediate", "prefetch")
+
+    def __init__(self):
+        self.goto = {} # trie edges
+        self.fail = None
+        self.next = {} # memoized transitions, trie edges and failure jumps alike
+        self.own = None # delimiter-mode trigger ending exactly here
+        # Delimiter triggers ending at this state, longest first, and the
+        # longest immediate trigger (both following failure links)
+        self.delimiters = ()
+        self.immediate = None
+        self.prefetch = () # providers of the triggers this state is a prefix of
+
+
+class SnippetAutomaton:
+    def __init__(self, snippets=()):
+        """snippets: iterable of (trigger, replacement, mode). The first of two equal triggers wins."""
+        self.root = _State()
+        self.max_length = 0
+        self.count = 0
+        for trigger, replacement, mode in snippets:
+            self._add(trigger, replacement, mode)
+        self._link()
+
+    def _add(self, trigger, replacement, mode):
+        key = trigger.lower()
+        if not key:
+            return
+        # Only side-effect-free providers are fetched while the trigger is typed
+        providers = tuple(p for p in getattr(replacement, "providers", ()) if p.prefetch)
+        state = self.root
+        for depth, char in enumerate(key, 1):
+            state = state.goto.setdefault(char, _State())
+            if providers and depth >= min(PREFETCH_MIN_PREFIX, len(key)):
+                state.prefetch += tuple(p for p in providers if p not in state.prefetch)
+        match = SnippetMatch(trigger, replacement, mode if mode in MODES else MODE_DELIMITER)
+        slot = "immediate" if match.mode == MODE_IMMEDIATE else "own"
+        if getattr(state, slot) is None:
+            setattr(state, slot, match)
+            self.count += 1
+        self.max_length = max(self.max_length, len(key))
+
+    def _link(self):
+        # Breadth-first, so a state's failure target is finished before it is used
+        root = self.root
+        root.fail = root
+        queue = deque()
+        for child in root.goto.values():
+            child.fail = root
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            fail = state.fail
+            # A state's own trigger is longer than anything reached by failing
+            state.delimiters = ((state.own,) if state.own else ()) + fail.delimiters
+            state.immediate = state.immediate or fail.immediate
+            for char, child in state.goto.items():
+                target = fail
+                while target is not root and char not in target.goto:
+                    target = target.fail
+                child.fail = target.goto.get(char, root)
+                queue.append(child)
+
+    def step(self, state, char):
+        """The state after typing `char` (already lower-cased) in `state`."""
+        nxt = state.next.get(char)
+        if nxt is not None:
+            return nxt
+        target = state
+        while target is not self.root and char not in target.goto:
+            target = target.fail
+        nxt = target.goto.get(char, self.root)
+        state.next[char] = nxt
+        return nxt
+
+
+class TypingBuffer:
+    """
+    Fixed-capacity ring of the last typed characters, each with the automaton
+    state before it. Both slot lists are allocated once; push, pop and clear
+    only move indices, so the hook thread allocates nothing per keystroke.
+    When full, the oldest character is overwritten.
+
+    It also keeps running counts of the letters and capitals typed since the
+    last clear, and each slot the counts before its character, so the case
+    pattern of any recent stretch is two subtractions away.
+    """
+    __slots__ = ("capacity", "chars", "states", "letters", "capitals", "letter_count", "capital_count",
+                 "end", "size", "overwrote")
+
+    def __init__(self, capacity):
+        self.capacity = max(1, capacity)
+        self.chars = [None] * self.capacity
+        self.states = [None] * self.capacity
+        self.letters = [0] * self.capacity # letter_count before each character
+        self.capitals = [0] * self.capacity # capital_count before each character
+        self.letter_count = 0
+        self.capital_count = 0
+        self.end = 0 # slot the next character goes into
+        self.size = 0
+        self.overwrote = False # older characters were dropped since the last clear
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        self.end = 0
+        self.size = 0
+        self.letter_count = 0
+        self.capital_count = 0
+        self.overwrote = False
+
+    def push(self, char, state):
+        end = self.end
+        self.chars[end] = char
+        self.states[end] = state
+        self.letters[end] = self.letter_count
+        self.capitals[end] = self.capital_count
+        if char.isupper():
+            self.letter_count += 1
+            self.capital_count += 1
+        elif char.islower():
+            self.letter_count += 1
+        self.end = (end + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.overwrote = True
+
+    def pop(self):
+        """Removes the last character in place; returns the state before it, or None if empty."""
+        if not self.size:
+            return None
+        self.end = (self.end - 1) % self.capacity
+        self.size -= 1
+        self.letter_count = self.letters[self.end]
+        self.capital_count = self.capitals[self.end]
+        return self.states[self.end]
+
+    def case(self, length, first_letter=0):
+        """
+        The case pattern (CASE_*) of the last `length` characters (at most
+        what is held), or None if they have no letters. first_letter is the
+        offset of their first letter, if known.
+        """
+        start = (self.end - min(length, self.size)) % self.capacity
+        letters = self.letter_count - self.letters[start]
+        capitals = self.capital_count - self.capitals[start]
+        if capitals and capitals < letters:
+            # Only a single capital at the first letter counts as capitalized
+            first_capital = self.chars[(start + first_letter) % self.capacity].isupper()
+        else:
+            first_capital = False
+        return _case(letters, capitals, first_capital)
+
+    def char_back(self, offset):
+        """The character typed `offset` keystrokes ago (1 = the last one)."""
+        return self.chars[(self.end - offset) % self.capacity]
+
+    def text(self, length):
+        """The last `length` characters (at most what is held) as one string."""
+        length = min(length, self.size)
+        return "".join(self.chars[(self.end - i) % self.capacity] for i in range(length, 0, -1))
+
+
+class SnippetMatcher:
+    """
+    Keystroke-level cursor over a SnippetAutomaton. A TypingBuffer sized to
+    the longest trigger plus one keeps the characters and states needed to
+    step back on backspace and to check word boundaries.
+    """
+
+    def __init__(self, automaton=None, on_prefix=None):
+        self.automaton = automaton or SnippetAutomaton()
+        # on_prefix(providers) is called when the typed text is a prefix of
+        # triggers whose replacements use prefetchable providers
+        self.on_prefix = on_prefix
+        self.buffer = TypingBuffer(self.automaton.max_length + 1)
+        self.state = self.automaton.root
+        self.word_length = 0 # characters typed since the last word boundary
+        # Case change (CASE_CAPITALIZED, CASE_UPPER or None) for the last match fed
+        self.match_case = None
+
+    def reset(self):
+        self.state = self.automaton.root
+        self.buffer.clear()
+        self.word_length = 0
+
+    def current_word(self):
+        """The word being typed, if it is short enough to still be a trigger prefix."""
+        if self.word_length >= self.buffer.capacity:
+            return ""
+        return self.buffer.text(self.word_length)
+
+    def typed(self, length):
+        """The last `length` characters as they were typed."""
+        if length <= 0:
+            return ""
+        return self.buffer.text(length)
+
+    def feed(self, char):
+        """
+        Advances by one typed character. Returns the SnippetMatch to expand
+        now, or None. A delimiter match does not include the delimiter itself.
+        """
+        match = None
+        if char in WORD_BOUNDARIES:
+            for candidate in self.state.delimiters:
+                if self._at_boundary(candidate.length):
+                    match = candidate
+                    # The trigger is what was typed before this delimiter
+                    self.match_case = self._match_case(candidate)
+                    break
+
+        self.buffer.push(char, self.state)
+        self.word_length = 0 if char in WORD_BOUNDARIES else self.word_length + 1
+        self.state = self.automaton.step(self.state, char.lower())
+        if self.state.prefetch and self.on_prefix is not None:
+            self.on_prefix(self.state.prefetch)
+
+        if match is None:
+            match = self.state.immediate
+            if match is not None:
+                self.match_case = self._match_case(match)
+        return match
+
+    def _match_case(self, match):
+        if match.case is None:
+            return None # nothing to take the case from
+        return propagated_case(self.buffer.case(match.length, match.first_letter), match.case)
+
+    def backspace(self):
+        state = self.buffer.pop()
+        # None: stepped back past what we remember
+        self.state = state if state is not None else self.automaton.root
+        if self.word_length:
+            self.word_length -= 1
+        else:
+            # Deleted a boundary: the word before it is being typed again
+            buffer = self.buffer
+            while self.word_length < len(buffer) and buffer.char_back(self.word_length + 1) not in WORD_BOUNDARIES:
+                self.word_length += 1
+            if self.word_length == len(buffer) and buffer.overwrote:
+                # Its start was dropped from the ring, so it is longer than any trigger
+                self.word_length = buffer.capacity
+
+    def _at_boundary(self, length):
+        # The character before the trigger (if we still have it) must end a word
+        size = len(self.buffer)
+        if size < length:
+            return False
+        if size == length:
+            # The whole trigger was typed since the last reset, and a reset
+            # (start, navigation key, expansion) counts as a word break.
+            # If the ring dropped what came before, we cannot tell
+            return not self.buffer.overwrote
+        return self.buffer.char_back(length + 1) in WORD_BOUNDARIES
@@ -0,0 +1,156 @@
+"""
+Dynamic snippet content: placeholders backed by providers.
+
+    {shell:git branch --show-current}   output of a shell command
+    {file:~/notes/signature.txt}        contents of a file
+    {python:mymodule.greeting}          str() of what a Python function returns
+
+Providers can take tens to hundreds of milliseconds, far too slow to start
+only once the delimiter has been typed. ProviderCache runs them on a small
+ActionExecutor pool and keeps each value for its provider's TTL. The snippet
+matcher prefetches the {file:} providers of every trigger the user has
+started to type, so by the time the trigger is complete the value is usually
+cached. Shell commands and Python functions may have side effects, so they
+are never run on a guess: they run when their snippet expands.
+
+A value that is not ready when the snippet expands is waited for up to
+FETCH_WAIT; after that the stale value (or nothing) is used.
+"""
+import importlib
+import os
+import subprocess
+import threading
+import time
+
+from action_executor import ActionExecutor
+
+SHELL = "shell"
+FILE = "file"
+PYTHON = "python"
+PROVIDER_KINDS = (SHELL, FILE, PYTHON)
+
+# Seconds a fetched value stays fresh, per kind of provider
+PROVIDER_TTLS = {SHELL: 10.0, FILE: 2.0, PYTHON: 10.0}
+# Kinds that are safe to fetch before the user has finished typing the trigger
+PREFETCH_KINDS = (FILE,)
+
+SHELL_TIMEOUT = 5.0 # seconds a command may run
+FETCH_WAIT = 2.0 # seconds an expansion waits for a value that is not cached
+
+
+class Provider:
+    __slots__ = ("kind", "arg", "ttl", "prefetch")
+
+    def __init__(self, kind, arg):
+        self.kind = kind
+        self.arg = arg
+        self.ttl = PROVIDER_TTLS[kind]
+        self.prefetch = kind in PREFETCH_KINDS
+
+    def __eq__(self, other):
+        return isinstance(other, Provider) and (self.kind, self.arg) == (other.kind, other.arg)
+
+    def __hash__(self):
+        return hash((self.kind, self.arg))
+
+    def __repr__(self):
+        return f"{{{self.kind}:{self.arg}}}"
+
+    def fetch(self):
+        """Runs the provider (slow; call off the hook thread). Trailing newlines are dropped."""
+        if self.kind == SHELL:
+            result = subprocess.run(self.arg, shell=True, capture_output=True, text=True, timeout=SHELL_TIMEOUT,
+                                    creationflags=0x08000000 if os.name == "nt" else 0) # CREATE_NO_WINDOW
+            return result.stdout.rstrip("\r\n")
+        if self.kind == FILE:
+            with open(os.path.expandvars(os.path.expanduser(self.arg)), encoding="utf-8") as f:
+                return f.read().rstrip("\r\n")
+        module, _, name = self.arg.rpartition(".")
+        value = getattr(importlib.import_module(module), name)()
+        return "" if value is None else str(value)
+
+
+def make_provider(kind, arg):
+    """Validates a provider placeholder. Raises ValueError."""
+    arg = arg.strip()
+    if not arg:
+        raise ValueError(f"{{{kind}:...}} needs an argument")
+    if kind == PYTHON:
+        module, _, name = arg.rpartition(".")
+        if not module or not name:
+            raise ValueError(f"{{python:{arg}}} must name a function as module.function")
+    return Provider(kind, arg)
+
+
+class _Entry:
+    __slots__ = ("value", "expires", "pending")
+
+    def __init__(self):
+        self.value = None
+        self.expires = 0.0
+        self.pending = None # threading.Event while a fetch is in flight
+
+
+class ProviderCache:
+    def __init__(self, executor=None):
+        self.executor = executor or ActionExecutor(max_workers=2, max_queue=16, name="SnippetProvider")
+        self._entries = {} # Provider -> _Entry
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, providers):
+        """
+        Starts fetching any of the providers whose value is stale. Cheap enough
+        for the hook thread. Providers that may have side effects are skipped.
+        """
+        for provider in providers:
+            if provider.prefetch:
+                self._refresh(provider)
+
+    def get(self, provider, wait=FETCH_WAIT):
+        """The provider's value, fetching it first (up to `wait` seconds) if it is stale."""
+        entry = self._refresh(provider)
+        pending = entry.pending
+        if pending is None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            if not pending.wait(wait):
+                print(f"WARNING: Snippet provider {provider} is slow, using the last value")
+        value = entry.value
+        return "" if value is None else value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"cached": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _refresh(self, provider):
+        with self._lock:
+            entry = self._entries.get(provider)
+            if entry is None:
+                entry = self._entries[provider] = _Entry()
+            if entry.pending is not None or entry.expires > time.monotonic():
+                return entry
+            done = entry.pending = threading.Event()
+        if not self.executor.submit("provider", self._fetch, provider, entry, done, label=repr(provider)):
+            with self._lock:
+                entry.pending = None
+            done.set()
+        return entry
+
+    def _fetch(self, provider, entry, done):
+        try:
+            value = provider.fetch()
+        except Exception as e:
+            # Keep the last good value; try again once the TTL has passed
+            print(f"ERROR: Snippet provider {provider} failed: {e}")
+            value = entry.value
+        with self._lock:
+            entry.value = value
+            entry.expires = time.monotonic() + provider.ttl
+            entry.pending = None
+        done.set()
@@ -0,0 +1,238 @@
+"""
+Disk-backed snippet library.
+
+Snippets live in an SQLite file next to config.json instead of in the config
+itself. Only a compact index stays in memory: one SnippetRecord per snippet
+with its trigger, mode, flags and the providers its template uses (for
+prefetching). Replacement bodies are read on demand by id, through a small
+LRU cache, so memory does not grow with the size of the bodies, and editing
+one snippet writes one row instead of rewriting config.json.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from snippet_providers import make_provider
+from snippet_templates import compile_template
+
+BODY_CACHE_SIZE = 64 # replacement bodies kept in memory
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snippets (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    trigger TEXT NOT NULL,
+    mode TEXT NOT NULL DEFAULT 'delimiter',
+    active INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    providers TEXT NOT NULL DEFAULT '[]',
+    body TEXT NOT NULL
+)
+"""
+
+
+class SnippetRecord:
+    __slots__ = ("id", "trigger", "mode", "active", "created_at", "providers")
+
+    def __init__(self, id, trigger, mode, active, created_at, providers=()):
+        self.id = id
+        self.trigger = trigger
+        self.mode = mode
+        self.active = active
+        self.created_at = created_at
+        self.providers = providers # Providers used by the template, for prefetching
+
+    def __repr__(self):
+        return f"SnippetRecord({self.id}, {self.trigger!r})"
+
+
+def _providers_of(body):
+    # Provider placeholders as stored: [[kind, arg], ...]
+    try:
+        return [[p.kind, p.arg] for p in compile_template(body).providers]
+    except ValueError:
+        return []
+
+
+def _make_providers(pairs):
+    try:
+        return tuple(make_provider(kind, arg) for kind, arg in pairs)
+    except (ValueError, TypeError):
+        return ()
+
+
+class SnippetStore:
+    def __init__(self, path, cache_size=BODY_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+        self._bodies = OrderedDict() # id -> body, least recently used first
+        self._records = []
+        self._by_id = {}
+        self._load_index()
+
+    def _load_index(self):
+        rows = self._db.execute(
+            "SELECT id, trigger, mode, active, created_at, providers FROM snippets ORDER BY position, id")
+        self._records = [SnippetRecord(id, trigger, mode, bool(active), created_at, _make_providers(json.loads(providers)))
+                         for id, trigger, mode, active, created_at, providers in rows]
+        self._by_id = {record.id: record for record in self._records}
+
+    def __len__(self):
+        return len(self._records)
+
+    def records(self):
+        """The in-memory index, in display order. Do not modify it."""
+        return self._records
+
+    def get(self, snippet_id):
+        return self._by_id.get(snippet_id)
+
+    def find(self, trigger):
+        """First record whose trigger matches case-insensitively, or None."""
+        trigger = trigger.lower()
+        for record in self._records:
+            if record.trigger.lower() == trigger:
+                return record
+        return None
+
+    def body(self, snippet_id):
+        """The replacement text of a snippet, or None if it does not exist."""
+        with self._lock:
+            body = self._bodies.get(snippet_id)
+            if body is not None:
+                self._bodies.move_to_end(snippet_id)
+                return body
+            row = self._db.execute("SELECT body FROM snippets WHERE id = ?", (snippet_id,)).fetchone()
+            if row is None:
+                return None
+            self._cache(snippet_id, row[0])
+            return row[0]
+
+    def previews(self, length):
+        """id -> the first `length` characters of each body, read in one query (for tables)."""
+        with self._lock:
+            return dict(self._db.execute("SELECT id, substr(body, 1, ?) FROM snippets", (length,)))
+
+    def search(self, text):
+        """Ids of the snippets whose trigger or body contains text (case-insensitive for ASCII)."""
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM snippets WHERE trigger LIKE ? ESCAPE '\\' OR body LIKE ? ESCAPE '\\'",
+                (pattern, pattern))
+            return {row[0] for row in rows}
+
+    def add(self, trigger, body, mode="delimiter", active=True, created_at=None):
+        with self._lock:
+            position = self._db.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM snippets").fetchone()[0]
+            record = self._insert(trigger, body, mode, active, created_at, position)
+            self._db.commit()
+            self._records.append(record)
+            self._by_id[record.id] = record
+            return record
+
+    def update(self, snippet_id, trigger=None, body=None, mode=None, active=None):
+        record = self._by_id.get(snippet_id)
+        if record is None:
+            return False
+        with self._lock:
+            if trigger is not None:
+                record.trigger = trigger
+            if mode:
+                record.mode = mode
+            if active is not None:
+                record.active = active
+            if body is not None:
+                providers = _providers_of(body)
+                record.providers = _make_providers(providers)
+                self._db.execute("UPDATE snippets SET body = ?, providers = ? WHERE id = ?",
+                                 (body, json.dumps(providers), snippet_id))
+                self._bodies.pop(snippet_id, None)
+            self._db.execute("UPDATE snippets SET trigger = ?, mode = ?, active = ? WHERE id = ?",
+                             (record.trigger, record.mode, int(record.active), snippet_id))
+            self._db.commit()
+            return True
+
+    def remove(self, snippet_id):
+        with self._lock:
+            record = self._by_id.pop(snippet_id, None)
+            if record is None:
+                return False
+            self._records.remove(record)
+            self._bodies.pop(snippet_id, None)
+            self._db.execute("DELETE FROM snippets WHERE id = ?", (snippet_id,))
+            self._db.commit()
+            return True
+
+    def reorder(self, records):
+        """Stores a new display order; `records` must be the current records, reordered."""
+        with self._lock:
+            self._db.executemany("UPDATE snippets SET position = ? WHERE id = ?",
+                                 [(position, record.id) for position, record in enumerate(records)])
+            self._db.commit()
+            self._records = list(records)
+
+    def merge(self, snippets):
+        """
+        Appends snippets given as config dicts (migration from config.json),
+        skipping those whose trigger is already in the library. Returns how
+        many were added.
+        """
+        with self._lock:
+            triggers = {record.trigger.lower() for record in self._records}
+            position = self._db.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM snippets").fetchone()[0]
+            added = 0
+            for s in snippets:
+                key = s["trigger"].lower()
+                if not key or key in triggers:
+                    continue
+                triggers.add(key)
+                self._insert(s["trigger"], s.get("replacement", ""), s.get("mode", "delimiter"),
+                             s.get("active", True), s.get("created_at"), position + added)
+                added += 1
+            self._db.commit()
+            self._load_index()
+            return added
+
+    def replace_all(self, snippets):
+        """Replaces the library with snippets given as config dicts (backup import)."""
+        with self._lock:
+            self._db.execute("DELETE FROM snippets")
+            for position, s in enumerate(snippets):
+                self._insert(s["trigger"], s.get("replacement", ""), s.get("mode", "delimiter"),
+                             s.get("active", True), s.get("created_at"), position)
+            self._db.commit()
+            self._bodies.clear()
+            self._load_index()
+
+    def export(self):
+        """The whole library as config dicts, bodies included (backup export)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT trigger, body, mode, active, created_at FROM snippets ORDER BY position, id")
+            return [{"trigger": trigger, "replacement": body, "mode": mode, "active": bool(active),
+                     "created_at": created_at} for trigger, body, mode, active, created_at in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _insert(self, trigger, body, mode, active, created_at, position):
+        # Caller holds the lock and commits
+        providers = _providers_of(body)
+        created_at = created_at or time.time()
+        cursor = self._db.execute(
+            "INSERT INTO snippets (position, trigger, mode, active, created_at, providers, body) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (position, trigger, mode, int(active), created_at, json.dumps(providers), body))
+        return SnippetRecord(cursor.lastrowid, trigger, mode, bool(active), created_at, _make_providers(providers))
+
+    def _cache(self, snippet_id, body):
+        self._bodies[snippet_id] = body
+        if len(self._bodies) > self.cache_size:
+            self._bodies.popitem(last=False)
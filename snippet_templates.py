@@ -0,0 +1,193 @@
+"""
+Snippet replacement templates.
+
+A replacement may contain placeholders:
+
+    {date}              current date, 2024-05-31
+    {date:%d/%m/%Y}     current date in a strftime format
+    {time}              current time, 14:05
+    {time:%H:%M:%S}     current time in a strftime format
+    {clipboard}         text the user had on the clipboard
+    {cursor}            where the caret is left after the expansion
+    {shell:command}     output of a shell command
+    {file:path}         contents of a file
+    {python:mod.func}   what a Python function returns
+
+The shell, file and python placeholders are providers (snippet_providers),
+fetched ahead of time and cached. Write {{ and }} for literal braces. Text
+without placeholders expands as is.
+
+compile_template() parses a replacement once (at reload, or when a snippet
+is saved) into a CompiledTemplate. Rendering only joins the literal parts
+with the output of the few placeholders present, so an expansion does no
+parsing.
+
+The case of the typed trigger carries over to the expansion: typing "Addr"
+for the trigger "addr" capitalises the first letter, "ADDR" gives the whole
+replacement in capitals. The matcher works out which (CASE_*), and render()
+applies it; templates without dynamic placeholders cache each variant.
+"""
+import time
+
+from snippet_providers import PROVIDER_KINDS, make_provider
+
+DEFAULT_FORMATS = {"date": "%Y-%m-%d", "time": "%H:%M"}
+PLACEHOLDERS = ("date", "time", "clipboard", "cursor") + PROVIDER_KINDS
+
+# Case patterns of a typed trigger
+CASE_LOWER = "lower" # no capitals
+CASE_CAPITALIZED = "capitalized" # first letter only
+CASE_UPPER = "upper" # all letters
+CASE_MIXED = "mixed" # anything else
+
+
+class CompiledTemplate:
+    """
+    before / after: the parts on either side of {cursor} (after is empty if
+    there is none). A part is a literal string or a function taking the
+    clipboard-text getter and the ProviderCache.
+    providers: the Providers the template uses, for prefetching
+    """
+    __slots__ = ("source", "before", "after", "dynamic", "has_cursor", "providers", "_variants")
+
+    def __init__(self, source, before, after, has_cursor, providers=()):
+        self.source = source
+        self.before = tuple(before)
+        self.after = tuple(after)
+        self.has_cursor = has_cursor
+        self.providers = tuple(providers)
+        self.dynamic = any(not isinstance(part, str) for part in self.before + self.after)
+        self._variants = {} # case -> (text, cursor_back), static templates only
+
+    def render(self, clipboard_text=None, provider_cache=None, case=None):
+        """
+        Returns (text, cursor_back): the text to insert and how many
+        characters the caret has to move back from its end for {cursor}.
+        clipboard_text() is only called if the template uses {clipboard}.
+        Providers are read from provider_cache, or run directly without one.
+        case: CASE_CAPITALIZED or CASE_UPPER to change the case of the result.
+        """
+        if case and not self.dynamic:
+            variant = self._variants.get(case)
+            if variant is None:
+                variant = self._variants[case] = self._render(None, None, case)
+            return variant
+        return self._render(clipboard_text, provider_cache, case)
+
+    def _render(self, clipboard_text, provider_cache, case):
+        before = _join(self.before, clipboard_text, provider_cache)
+        after = _join(self.after, clipboard_text, provider_cache)
+        if case == CASE_UPPER:
+            before, after = before.upper(), after.upper()
+        elif case == CASE_CAPITALIZED:
+            before, found = _capitalize(before)
+            if not found:
+                after, _ = _capitalize(after) # no letters before {cursor}
+        return before + after, len(after)
+
+    def __repr__(self):
+        return f"CompiledTemplate({self.source!r})"
+
+
+def _join(parts, clipboard_text, provider_cache):
+    if len(parts) == 1 and isinstance(parts[0], str):
+        return parts[0]
+    return "".join(part if isinstance(part, str) else part(clipboard_text, provider_cache) for part in parts)
+
+
+def _capitalize(text):
+    # Upper-cases the first letter after any leading spaces and punctuation
+    # ("(hello" -> "(Hello", but "123 main" stays). Also returns whether the
+    # text had anything to capitalise
+    for i, char in enumerate(text):
+        if char.islower():
+            return text[:i] + char.upper() + text[i + 1:], True
+        if char.isalnum():
+            return text, True
+    return text, False
+
+
+def _clipboard(clipboard_text, provider_cache):
+    text = clipboard_text() if clipboard_text else None
+    return text or ""
+
+
+def _strftime(fmt):
+    return lambda clipboard_text, provider_cache: time.strftime(fmt)
+
+
+def _provided(provider):
+    def part(clipboard_text, provider_cache):
+        if provider_cache is not None:
+            return provider_cache.get(provider)
+        try:
+            return provider.fetch()
+        except Exception as e:
+            print(f"ERROR: Snippet provider {provider} failed: {e}")
+            return ""
+    part.provider = provider
+    return part
+
+
+def _placeholder(body, position):
+    name, _, fmt = body.partition(":")
+    name = name.strip().lower()
+    if name not in PLACEHOLDERS:
+        raise ValueError(f"Unknown placeholder {{{body}}} at position {position}")
+    if name in DEFAULT_FORMATS:
+        fmt = fmt or DEFAULT_FORMATS[name]
+        try:
+            time.strftime(fmt)
+        except ValueError:
+            raise ValueError(f"Invalid {name} format '{fmt}' at position {position}")
+        return _strftime(fmt)
+    if name in PROVIDER_KINDS:
+        try:
+            return _provided(make_provider(name, fmt))
+        except ValueError as e:
+            raise ValueError(f"{e} (position {position})")
+    if fmt:
+        raise ValueError(f"{{{name}}} takes no format (position {position})")
+    return name
+
+
+def compile_template(text):
+    """Parses a replacement into a CompiledTemplate. Raises ValueError describing the first error."""
+    before, after = [], []
+    parts = before
+    literal = []
+    has_cursor = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char in "{}" and text[i + 1:i + 2] == char:
+            literal.append(char) # {{ or }}
+            i += 2
+            continue
+        if char == "}":
+            raise ValueError(f"Unmatched '}}' at position {i + 1}; write '}}}}' for a literal brace")
+        if char != "{":
+            literal.append(char)
+            i += 1
+            continue
+        end = text.find("}", i)
+        if end == -1:
+            raise ValueError(f"Unclosed '{{' at position {i + 1}; write '{{{{' for a literal brace")
+        part = _placeholder(text[i + 1:end], i + 1)
+        if literal:
+            parts.append("".join(literal))
+            literal = []
+        if part == "cursor":
+            if has_cursor:
+                raise ValueError(f"{{cursor}} can only appear once (position {i + 1})")
+            has_cursor = True
+            parts = after
+        elif part == "clipboard":
+            parts.append(_clipboard)
+        else:
+            parts.append(part)
+        i = end + 1
+    if literal:
+        parts.append("".join(literal))
+    providers = [part.provider for part in before + after if hasattr(part, "provider")]
+    return CompiledTemplate(text, before or [""], after, has_cursor, providers)
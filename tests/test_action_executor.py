@@ -0,0 +1,174 @@
+import threading
+import time
+
+import pytest
+
+from action_executor import ActionExecutor, DROP_OLDEST
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+class BlockingAction:
+    """An action that runs until release(); records which labels started and on which thread."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, label):
+        with self._lock:
+            self.started.append(label)
+            self.threads.add(threading.current_thread().name)
+        assert self.gate.wait(5)
+
+    def release(self):
+        self.gate.set()
+
+
+@pytest.fixture
+def executors():
+    made = []
+
+    def make(**options):
+        executor = ActionExecutor(**options)
+        made.append(executor)
+        return executor
+
+    yield make
+    for executor in made:
+        executor.shutdown()
+
+
+def test_actions_run_on_the_workers_not_the_caller(executors):
+    executor = executors(max_workers=2, name="TestAction")
+    action = BlockingAction()
+    action.release()
+
+    assert executor.submit("run", action, "a")
+    assert wait_for(lambda: executor.stats()["completed"] == 1)
+    assert action.threads and all(name.startswith("TestAction-") for name in action.threads)
+
+
+def test_at_most_max_workers_run_at_once(executors):
+    executor = executors(max_workers=2)
+    action = BlockingAction()
+
+    for label in "abc":
+        executor.submit("run", action, label)
+    assert wait_for(lambda: executor.stats()["running"] == 2)
+    assert executor.stats()["queued"] == 1
+
+    action.release()
+    assert wait_for(lambda: executor.stats()["completed"] == 3)
+    assert sorted(action.started) == ["a", "b", "c"]
+
+
+def test_type_limit_runs_other_types_past_a_busy_one(executors):
+    executor = executors(max_workers=3, type_limits={"focus": 1})
+    focus = BlockingAction()
+    run = BlockingAction()
+    run.release()
+
+    executor.submit("focus", focus, "focus 1")
+    executor.submit("focus", focus, "focus 2")
+    executor.submit("run", run, "run")
+
+    # The run action overtakes the second focus, which waits for the first
+    assert wait_for(lambda: run.started == ["run"])
+    assert focus.started == ["focus 1"]
+    assert executor.stats()["queued"] == 1
+
+    focus.release()
+    assert wait_for(lambda: executor.stats()["completed"] == 3)
+    assert focus.started == ["focus 1", "focus 2"]
+
+
+def test_full_queue_drops_the_newest_action(executors):
+    executor = executors(max_workers=1, max_queue=2)
+    action = BlockingAction()
+
+    executor.submit("run", action, "running")
+    assert wait_for(lambda: executor.stats()["running"] == 1)
+    assert executor.submit("run", action, "a")
+    assert executor.submit("run", action, "b")
+    assert not executor.submit("run", action, "c")
+
+    action.release()
+    assert wait_for(lambda: executor.stats()["completed"] == 3)
+    assert action.started == ["running", "a", "b"]
+    assert executor.stats()["dropped"] == 1
+
+
+def test_full_queue_can_drop_the_oldest_action_instead(executors):
+    executor = executors(max_workers=1, max_queue=2, drop_policy=DROP_OLDEST)
+    action = BlockingAction()
+
+    executor.submit("run", action, "running")
+    assert wait_for(lambda: executor.stats()["running"] == 1)
+    for label in "abc":
+        assert executor.submit("run", action, label)
+
+    action.release()
+    assert wait_for(lambda: executor.stats()["completed"] == 3)
+    assert action.started == ["running", "b", "c"]
+    assert executor.stats()["dropped"] == 1
+
+
+def test_unknown_drop_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ActionExecutor(drop_policy="drop_random")
+
+
+def test_failing_action_is_counted_and_the_worker_goes_on(executors):
+    executor = executors(max_workers=1)
+    done = []
+
+    def broken():
+        raise RuntimeError("boom")
+
+    executor.submit("run", broken)
+    executor.submit("run", done.append, "after")
+
+    assert wait_for(lambda: executor.stats()["completed"] == 1)
+    assert done == ["after"]
+    assert executor.stats()["failed"] == 1
+
+
+def test_latency_is_recorded_for_actions_with_timestamps(executors):
+    recorded = []
+
+    class Latency:
+        def record(self, label, action_type, t_down, t_match, t_enqueue, t_start, t_end):
+            recorded.append((label, action_type, t_down <= t_match <= t_enqueue <= t_start <= t_end))
+
+    executor = executors(max_workers=1, latency=Latency())
+    now = time.perf_counter_ns()
+    executor.submit("run", lambda: None, label="ctrl+alt+t", t_down=now, t_match=now)
+    executor.submit("run", lambda: None) # no timestamps: not a hotkey, not recorded
+
+    assert wait_for(lambda: executor.stats()["completed"] == 2)
+    assert recorded == [("ctrl+alt+t", "run", True)]
+
+
+def test_shutdown_drops_the_queue_and_refuses_new_actions(executors):
+    executor = executors(max_workers=1)
+    action = BlockingAction()
+
+    executor.submit("run", action, "running")
+    assert wait_for(lambda: executor.stats()["running"] == 1)
+    executor.submit("run", action, "queued")
+
+    executor.shutdown()
+    assert not executor.submit("run", action, "late")
+    action.release()
+    executor.shutdown(wait=True)
+
+    assert action.started == ["running"]
+    assert executor.stats() == {"queued": 0, "running": 0, "dropped": 0, "completed": 1, "failed": 0}
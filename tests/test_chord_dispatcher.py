@@ -0,0 +1,555 @@
+import types
+
+import pytest
+
+import chord_dispatcher
+from chord_dispatcher import (Binding, BindingTable, ChordDispatcher, parse_sequence,
+                              GESTURE_TAP, GESTURE_DOUBLE_TAP, REPEAT_ALWAYS, REPEAT_RATE)
+
+
+class FakeClock:
+    """Stands in for the `time` module inside chord_dispatcher, so tests set the event times."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter_ns(self):
+        return int(self.now * 1e9)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeScheduler:
+    """Keeps the scheduled calls until the test runs them with run_due()."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = []
+
+    def schedule(self, delay, callback, *args):
+        return self.schedule_at(self.clock.now + delay, callback, *args)
+
+    def schedule_at(self, deadline, callback, *args):
+        call = types.SimpleNamespace(deadline=deadline, callback=callback, args=args, cancelled=False)
+        self.calls.append(call)
+        return call
+
+    @staticmethod
+    def cancel(call):
+        if call is not None:
+            call.cancelled = True
+
+    def run_due(self):
+        # Calls scheduled by the calls run here run too, if already due
+        while True:
+            due = [c for c in self.calls if c.deadline <= self.clock.now]
+            if not due:
+                return
+            self.calls = [c for c in self.calls if c.deadline > self.clock.now]
+            for call in due:
+                if not call.cancelled:
+                    call.callback(*call.args)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(chord_dispatcher, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def dispatcher(clock):
+    return ChordDispatcher(scheduler=FakeScheduler(clock))
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, t_down, t_match):
+        self.calls.append((t_down, t_match))
+
+    def __len__(self):
+        return len(self.calls)
+
+
+def bind(dispatcher, trigger, **options):
+    fired = Recorder()
+    dispatcher.table.add(parse_sequence(trigger), Binding(trigger, fired, **options))
+    return fired
+
+
+# Scan codes as `keyboard` reports them: the same for a key whatever its name
+SCAN_CODES = {"!": 2, "1": 2, "ctrl": 29, "left ctrl": 29, "right ctrl": 29, "shift": 42, "left shift": 42,
+              "alt": 56, "right alt": 56, "windows": 91, "l": 38}
+
+
+def event(name, event_type):
+    return types.SimpleNamespace(name=name, event_type=event_type, scan_code=SCAN_CODES.get(name))
+
+
+def down(dispatcher, name):
+    return dispatcher.handle_event(event(name, "down"))
+
+
+def up(dispatcher, name):
+    return dispatcher.handle_event(event(name, "up"))
+
+
+def press(dispatcher, *names):
+    """Presses the keys in order, then releases them in reverse. Returns the key-down results."""
+    results = [down(dispatcher, name) for name in names]
+    for name in reversed(names):
+        up(dispatcher, name)
+    return results
+
+
+def test_chord_matches_whatever_the_key_order_and_spelling(dispatcher):
+    fired = bind(dispatcher, "ctrl+alt+t")
+
+    press(dispatcher, "ctrl", "alt", "t")
+    press(dispatcher, "t", "right alt", "Left Ctrl")
+
+    assert len(fired) == 2
+
+
+def test_only_the_exact_chord_fires(dispatcher):
+    fired = bind(dispatcher, "ctrl+t")
+
+    assert press(dispatcher, "ctrl", "shift", "t") == [True, True, True]
+    press(dispatcher, "t")
+    assert len(fired) == 0
+
+    press(dispatcher, "ctrl", "t")
+    assert len(fired) == 1
+
+
+def test_callback_gets_the_key_down_and_match_times(dispatcher, clock):
+    fired = bind(dispatcher, "f9")
+
+    press(dispatcher, "f9")
+
+    t = clock.perf_counter_ns()
+    assert fired.calls == [(t, t)]
+
+
+def test_suppressed_chord_blocks_the_key_down_and_its_key_up(dispatcher):
+    bind(dispatcher, "ctrl+q", suppress=True)
+
+    assert down(dispatcher, "ctrl") is True
+    assert down(dispatcher, "q") is False
+    assert up(dispatcher, "q") is False
+    assert up(dispatcher, "ctrl") is True
+
+
+def test_autorepeat_follows_the_repeat_policy(dispatcher, clock):
+    once = bind(dispatcher, "f1")
+    always = bind(dispatcher, "f2", repeat=REPEAT_ALWAYS)
+    rate = bind(dispatcher, "f3", repeat=REPEAT_RATE, repeat_interval=0.1)
+
+    for key in ("f1", "f2", "f3"):
+        for _ in range(4):
+            down(dispatcher, key) # first press, then three autorepeats
+            clock.advance(0.04)
+        up(dispatcher, key)
+
+    assert len(once) == 1
+    assert len(always) == 4
+    assert len(rate) == 2 # the press, and the repeat 0.12s later
+    assert dispatcher.table[frozenset(["f1"])].bindings[0].coalesced == 3
+
+
+def test_injected_events_pass_through_untouched(dispatcher):
+    fired = bind(dispatcher, "ctrl+q", suppress=True)
+    dispatcher.injected = lambda event: True
+
+    assert press(dispatcher, "ctrl", "q") == [True, True]
+    assert len(fired) == 0
+    assert dispatcher._held == {}
+
+
+def test_set_table_swaps_every_binding_at_once(dispatcher):
+    old = bind(dispatcher, "f5")
+    table = BindingTable()
+    new = Recorder()
+    table.add(parse_sequence("f6"), Binding("f6", new))
+
+    dispatcher.set_table(table)
+    press(dispatcher, "f5")
+    press(dispatcher, "f6")
+
+    assert (len(old), len(new)) == (0, 1)
+
+
+def test_shift_released_before_the_symbol_key(dispatcher):
+    fired = bind(dispatcher, "ctrl+alt+t")
+
+    # `keyboard` names the key after the shift state: down as "!", up as "1"
+    down(dispatcher, "shift")
+    down(dispatcher, "!")
+    up(dispatcher, "shift")
+    up(dispatcher, "1")
+    assert dispatcher._held == {}
+
+    press(dispatcher, "ctrl", "alt", "t")
+    assert len(fired) == 1
+
+
+def test_shifted_key_matches_by_scan_code(dispatcher):
+    fired = bind(dispatcher, "ctrl+shift+1")
+    dispatcher.scan_names = {2: "1", 29: "ctrl", 42: "shift"}
+
+    press(dispatcher, "ctrl", "shift", "!")
+
+    assert len(fired) == 1
+
+
+def test_keys_the_os_reports_up_are_dropped(dispatcher):
+    fired = bind(dispatcher, "ctrl+alt+t")
+    suppressed = bind(dispatcher, "ctrl+l", suppress=True)
+    released = set() # scan codes the OS sees as up although we got no up event
+
+    dispatcher.key_state = lambda scan_code: scan_code not in released
+    # Win+L locks the workstation: the up events go to the lock screen
+    down(dispatcher, "windows")
+    down(dispatcher, "l")
+    released.update((91, 38))
+
+    press(dispatcher, "ctrl", "alt", "t")
+    assert len(fired) == 1
+    assert dispatcher._held == {}
+
+    # A key we suppressed never went down as far as the OS knows: kept
+    down(dispatcher, "ctrl")
+    assert down(dispatcher, "l") is False
+    down(dispatcher, "alt")
+    assert set(dispatcher._held.values()) == {"ctrl", "l", "alt"}
+    assert len(suppressed) == 1
+
+
+def test_discard_prunes_nodes_that_lead_nowhere():
+    table = BindingTable()
+    single = Binding("ctrl+k", Recorder())
+    sequence = Binding("ctrl+k, ctrl+c", Recorder())
+    table.add(parse_sequence("ctrl+k"), single)
+    table.add(parse_sequence("ctrl+k, ctrl+c"), sequence)
+    assert table.binding_count() == 2
+
+    table.discard(parse_sequence("ctrl+k, ctrl+c"), sequence)
+    node = table[frozenset(["ctrl", "k"])]
+    assert node.children is None and node.bindings == (single,)
+
+    table.discard(parse_sequence("ctrl+k"), single)
+    assert len(table) == 0
+
+
+def test_sequence_fires_on_its_last_stroke(dispatcher):
+    fired = bind(dispatcher, "ctrl+k, ctrl+c")
+
+    press(dispatcher, "ctrl", "k")
+    assert len(fired) == 0
+    press(dispatcher, "ctrl", "c")
+    assert len(fired) == 1
+
+    # The sequence starts over from the root afterwards
+    press(dispatcher, "ctrl", "c")
+    assert len(fired) == 1
+
+
+def test_modifier_held_across_strokes(dispatcher):
+    fired = bind(dispatcher, "ctrl+k, ctrl+c")
+
+    down(dispatcher, "ctrl")
+    down(dispatcher, "k")
+    up(dispatcher, "k")
+    down(dispatcher, "c")
+    up(dispatcher, "c")
+    up(dispatcher, "ctrl")
+
+    assert len(fired) == 1
+
+
+def test_sequences_sharing_a_leader(dispatcher):
+    comment = bind(dispatcher, "ctrl+k, ctrl+c")
+    uncomment = bind(dispatcher, "ctrl+k, ctrl+u")
+    leader = bind(dispatcher, "ctrl+k")
+
+    press(dispatcher, "ctrl", "k")
+    press(dispatcher, "ctrl", "u")
+
+    # The leader's own binding fires on the way to the sequence
+    assert (len(leader), len(comment), len(uncomment)) == (1, 0, 1)
+
+
+def test_sequence_times_out_between_strokes(dispatcher, clock):
+    fired = bind(dispatcher, "ctrl+k, ctrl+c")
+
+    press(dispatcher, "ctrl", "k")
+    clock.advance(dispatcher.sequence_timeout + 0.01)
+    press(dispatcher, "ctrl", "c")
+
+    assert len(fired) == 0
+
+
+def test_a_stroke_with_no_continuation_restarts_from_the_root(dispatcher):
+    sequence = bind(dispatcher, "ctrl+k, ctrl+c")
+    single = bind(dispatcher, "ctrl+j")
+
+    press(dispatcher, "ctrl", "k")
+    press(dispatcher, "ctrl", "j") # not a continuation, but a root binding
+    press(dispatcher, "ctrl", "c") # the sequence was dropped
+
+    assert (len(sequence), len(single)) == (0, 1)
+    assert dispatcher._sequence_node is None
+
+
+@pytest.fixture
+def replayed(dispatcher):
+    replayed = []
+    dispatcher.replay = replayed.append
+    return replayed
+
+
+def test_suppressing_sequence_holds_back_every_stroke(dispatcher, replayed):
+    fired = bind(dispatcher, "ctrl+k, ctrl+c", suppress=True)
+
+    assert press(dispatcher, "ctrl", "k") == [True, False]
+    assert press(dispatcher, "ctrl", "c") == [True, False]
+    dispatcher.scheduler.run_due()
+
+    assert len(fired) == 1
+    assert replayed == []
+
+
+def test_abandoned_sequence_gives_the_strokes_back_in_order(dispatcher, replayed):
+    bind(dispatcher, "ctrl+k, ctrl+c", suppress=True)
+
+    press(dispatcher, "ctrl", "k")
+    # Matches nothing: held back as well, so it cannot overtake ctrl+k
+    assert press(dispatcher, "ctrl", "x") == [True, False]
+    dispatcher.scheduler.run_due()
+
+    assert replayed == ["ctrl+k, ctrl+x"]
+
+
+def test_abandoned_sequence_then_another_hotkey(dispatcher, replayed):
+    bind(dispatcher, "ctrl+k, ctrl+c", suppress=True)
+    other = bind(dispatcher, "ctrl+j")
+
+    press(dispatcher, "ctrl", "k")
+    assert press(dispatcher, "ctrl", "j") == [True, True]
+    dispatcher.scheduler.run_due()
+
+    assert replayed == ["ctrl+k"]
+    assert len(other) == 1
+
+
+def test_timed_out_sequence_gives_the_strokes_back(dispatcher, clock, replayed):
+    fired = bind(dispatcher, "g, g, x", suppress=True)
+
+    press(dispatcher, "g")
+    clock.advance(0.5)
+    press(dispatcher, "g")
+    # The deadline moves with each stroke
+    clock.advance(dispatcher.sequence_timeout - 0.1)
+    dispatcher.scheduler.run_due()
+    assert replayed == []
+
+    clock.advance(0.2)
+    dispatcher.scheduler.run_due()
+    assert replayed == ["g, g"]
+
+    assert press(dispatcher, "x") == [True]
+    assert len(fired) == 0
+
+
+def test_held_back_stroke_autorepeat_is_swallowed(dispatcher, replayed):
+    fired = bind(dispatcher, "ctrl+k, ctrl+c", suppress=True)
+
+    down(dispatcher, "ctrl")
+    assert down(dispatcher, "k") is False
+    assert down(dispatcher, "k") is False # autorepeat
+    up(dispatcher, "k")
+    press(dispatcher, "c")
+    up(dispatcher, "ctrl")
+
+    assert len(fired) == 1
+    assert replayed == []
+
+
+def test_leader_suppressed_by_its_own_binding_is_not_replayed(dispatcher, replayed):
+    leader = bind(dispatcher, "ctrl+k", suppress=True)
+    bind(dispatcher, "ctrl+k, ctrl+c", suppress=True)
+
+    assert press(dispatcher, "ctrl", "k") == [True, False]
+    press(dispatcher, "ctrl", "x")
+    dispatcher.scheduler.run_due()
+
+    assert len(leader) == 1
+    assert replayed == []
+
+
+def test_passing_sequence_lets_its_strokes_through(dispatcher, replayed):
+    bind(dispatcher, "ctrl+k, ctrl+c")
+
+    assert press(dispatcher, "ctrl", "k") == [True, True]
+    assert press(dispatcher, "ctrl", "c") == [True, True]
+
+
+def test_suppressing_count_follows_add_and_discard():
+    table = BindingTable()
+    passing = Binding("ctrl+k, ctrl+c", Recorder())
+    blocking = Binding("ctrl+k, ctrl+u", Recorder(), suppress=True)
+    for binding in (passing, blocking):
+        table.add(parse_sequence(binding.trigger), binding)
+    leader = table[frozenset(["ctrl", "k"])]
+    assert leader.suppressing == 1
+    assert table.copy()[frozenset(["ctrl", "k"])].suppressing == 1
+
+    table.discard(parse_sequence(blocking.trigger), blocking)
+    assert leader.suppressing == 0
+    # Discarding what is not there changes nothing
+    table.discard(parse_sequence(blocking.trigger), blocking)
+    assert leader.suppressing == 0
+
+
+def test_three_stroke_sequence(dispatcher):
+    fired = bind(dispatcher, "g, g, g")
+
+    press(dispatcher, "g")
+    press(dispatcher, "g")
+    press(dispatcher, "x")
+    press(dispatcher, "g")
+    press(dispatcher, "g")
+    assert len(fired) == 0
+    press(dispatcher, "g")
+    assert len(fired) == 1
+
+
+def test_tap_fires_on_a_quick_release_only(dispatcher, clock):
+    fired = bind(dispatcher, "ctrl", gesture=GESTURE_TAP)
+
+    assert down(dispatcher, "ctrl") is True
+    assert len(fired) == 0
+    clock.advance(0.1)
+    up(dispatcher, "ctrl")
+    assert len(fired) == 1
+
+    # Held past tap_timeout
+    down(dispatcher, "ctrl")
+    clock.advance(dispatcher.tap_timeout + 0.01)
+    up(dispatcher, "ctrl")
+    assert len(fired) == 1
+
+    # Used as a modifier for another key
+    press(dispatcher, "ctrl", "c")
+    assert len(fired) == 1
+
+
+def test_tap_never_suppresses(dispatcher):
+    bind(dispatcher, "ctrl", gesture=GESTURE_TAP, suppress=True)
+
+    assert press(dispatcher, "ctrl") == [True]
+
+
+def test_double_tap_fires_on_the_second_press(dispatcher, clock):
+    fired = bind(dispatcher, "shift", gesture=GESTURE_DOUBLE_TAP)
+
+    press(dispatcher, "shift")
+    clock.advance(0.1)
+    down(dispatcher, "shift")
+    assert len(fired) == 1
+    up(dispatcher, "shift")
+
+    # A third tap starts over instead of completing another double tap
+    clock.advance(0.1)
+    press(dispatcher, "shift")
+    assert len(fired) == 1
+    clock.advance(0.1)
+    press(dispatcher, "shift")
+    assert len(fired) == 2
+
+
+def test_double_tap_needs_two_taps_close_together(dispatcher, clock):
+    fired = bind(dispatcher, "shift", gesture=GESTURE_DOUBLE_TAP)
+
+    press(dispatcher, "shift")
+    clock.advance(dispatcher.double_tap_interval + 0.01)
+    press(dispatcher, "shift")
+    assert len(fired) == 0
+
+    # The first press was held too long to be a tap
+    clock.advance(1.0)
+    down(dispatcher, "shift")
+    clock.advance(dispatcher.tap_timeout + 0.01)
+    up(dispatcher, "shift")
+    press(dispatcher, "shift")
+    assert len(fired) == 0
+
+    # Another key in between
+    clock.advance(1.0)
+    press(dispatcher, "shift")
+    press(dispatcher, "a")
+    press(dispatcher, "shift")
+    assert len(fired) == 0
+
+
+def test_tap_and_double_tap_on_one_key(dispatcher, clock):
+    tap = bind(dispatcher, "alt", gesture=GESTURE_TAP)
+    double = bind(dispatcher, "alt", gesture=GESTURE_DOUBLE_TAP)
+
+    press(dispatcher, "alt")
+    clock.advance(0.1)
+    press(dispatcher, "alt")
+
+    assert (len(tap), len(double)) == (2, 1)
+
+
+def test_hold_fires_at_the_deadline_while_held(dispatcher, clock):
+    fired = bind(dispatcher, "ctrl+space", long_press_delay=0.5)
+
+    down(dispatcher, "ctrl")
+    down(dispatcher, "space")
+    clock.advance(0.4)
+    dispatcher.scheduler.run_due()
+    assert len(fired) == 0
+    clock.advance(0.1)
+    dispatcher.scheduler.run_due()
+    assert len(fired) == 1
+
+    # Autorepeat of the held key does not fire it again
+    down(dispatcher, "space")
+    up(dispatcher, "space")
+    up(dispatcher, "ctrl")
+    assert len(fired) == 1
+
+
+def test_hold_released_early_replays_the_suppressed_press(dispatcher, clock):
+    fired = bind(dispatcher, "f8", long_press_delay=0.5, suppress=True)
+    replayed = []
+    dispatcher.replay = replayed.append
+
+    assert down(dispatcher, "f8") is False
+    clock.advance(0.2)
+    assert up(dispatcher, "f8") is False
+    clock.advance(1.0)
+    dispatcher.scheduler.run_due()
+
+    assert len(fired) == 0
+    assert replayed == ["f8"]
+
+
+def test_hold_is_cancelled_when_another_key_joins(dispatcher, clock):
+    fired = bind(dispatcher, "ctrl", long_press_delay=0.5)
+
+    down(dispatcher, "ctrl")
+    down(dispatcher, "c")
+    clock.advance(1.0)
+    dispatcher.scheduler.run_due()
+
+    assert len(fired) == 0
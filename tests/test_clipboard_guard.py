@@ -0,0 +1,126 @@
+import types
+
+from clipboard_guard import CF_UNICODETEXT, ClipboardGuard, FakeClipboard
+
+CF_HTML = 49330
+CF_PRIVATE = 0x200
+
+USER_FORMATS = {CF_UNICODETEXT: "copied", CF_HTML: b"<b>copied</b>", CF_PRIVATE: b"\x00\x01"}
+
+
+class ManualScheduler:
+    """Holds scheduled calls until run() is called, in place of the scheduler thread."""
+
+    def __init__(self):
+        self.calls = []
+
+    def schedule(self, delay, callback, *args):
+        call = types.SimpleNamespace(delay=delay, callback=callback, args=args, cancelled=False)
+        self.calls.append(call)
+        return call
+
+    @staticmethod
+    def cancel(call):
+        if call is not None:
+            call.cancelled = True
+
+    def pending(self):
+        return [c for c in self.calls if not c.cancelled]
+
+    def run(self):
+        calls, self.calls = self.pending(), []
+        for call in calls:
+            call.callback(*call.args)
+
+
+def make_guard(formats=USER_FORMATS):
+    clipboard = FakeClipboard(formats)
+    return ClipboardGuard(clipboard, ManualScheduler(), restore_delay=0.5), clipboard
+
+
+def expand(guard, text):
+    assert guard.set_text(text)
+    guard.pasted()
+
+
+def test_every_format_is_snapshotted_and_restored():
+    guard, clipboard = make_guard()
+
+    expand(guard, "snippet")
+    assert clipboard.formats == {CF_UNICODETEXT: "snippet"}
+    assert [c.delay for c in guard.scheduler.pending()] == [0.5]
+
+    guard.scheduler.run()
+    assert clipboard.formats == USER_FORMATS
+
+
+def test_user_text_is_the_snapshot_while_an_expansion_is_pending():
+    guard, clipboard = make_guard()
+
+    expand(guard, "snippet")
+    assert guard.user_text() == "copied"
+
+    guard.scheduler.run()
+    assert guard.user_text() == "copied"
+
+
+def test_back_to_back_expansions_share_one_snapshot_and_one_restore():
+    guard, clipboard = make_guard()
+
+    expand(guard, "first")
+    expand(guard, "second")
+    expand(guard, "third")
+    assert clipboard.formats == {CF_UNICODETEXT: "third"}
+    # Each expansion pushed the restore back; only the last one is still scheduled
+    assert len(guard.scheduler.pending()) == 1
+
+    restores = clipboard.sequence
+    guard.scheduler.run()
+    assert clipboard.formats == USER_FORMATS
+    assert clipboard.sequence == restores + 1
+
+
+def test_restore_is_skipped_when_the_user_copied_something_meanwhile():
+    guard, clipboard = make_guard()
+
+    expand(guard, "snippet")
+    clipboard.copy("newer")
+    guard.scheduler.run()
+
+    assert clipboard.formats == {CF_UNICODETEXT: "newer"}
+    assert guard.user_text() == "newer"
+
+
+def test_copy_between_expansions_is_what_gets_restored():
+    guard, clipboard = make_guard()
+
+    expand(guard, "first")
+    clipboard.copy("newer")
+    # The snapshot no longer matches the clipboard: take a new one
+    expand(guard, "second")
+    guard.scheduler.run()
+
+    assert clipboard.formats == {CF_UNICODETEXT: "newer"}
+
+
+def test_restore_now_cancels_the_scheduled_restore():
+    guard, clipboard = make_guard()
+
+    expand(guard, "snippet")
+    guard.restore_now()
+    assert clipboard.formats == USER_FORMATS
+    assert guard.scheduler.pending() == []
+
+    # Nothing left to restore
+    guard.restore_now()
+    assert clipboard.formats == USER_FORMATS
+
+
+def test_empty_clipboard_is_restored_empty():
+    guard, clipboard = make_guard({})
+
+    expand(guard, "snippet")
+    guard.scheduler.run()
+
+    assert clipboard.formats == {}
+    assert guard.user_text() is None
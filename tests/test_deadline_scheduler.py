@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from deadline_scheduler import DeadlineScheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = DeadlineScheduler(name="TestScheduler")
+    yield scheduler
+    scheduler.shutdown()
+
+
+class Calls:
+    def __init__(self, expected):
+        self.order = []
+        self.expected = expected
+        self.done = threading.Event()
+
+    def __call__(self, label):
+        self.order.append((label, time.monotonic()))
+        if len(self.order) >= self.expected:
+            self.done.set()
+
+    def labels(self):
+        return [label for label, _ in self.order]
+
+
+def test_thread_is_started_on_first_use(scheduler):
+    assert scheduler._thread is None
+    calls = Calls(1)
+    scheduler.schedule(0, calls, "a")
+    assert calls.done.wait(2)
+    assert scheduler._thread.name == "TestScheduler"
+
+
+def test_calls_run_in_deadline_order(scheduler):
+    calls = Calls(4)
+    now = time.monotonic()
+    scheduler.schedule_at(now + 0.06, calls, "c")
+    scheduler.schedule_at(now + 0.02, calls, "a")
+    scheduler.schedule_at(now + 0.04, calls, "b1")
+    scheduler.schedule_at(now + 0.04, calls, "b2") # same deadline: in scheduling order
+
+    assert calls.done.wait(2)
+    assert calls.labels() == ["a", "b1", "b2", "c"]
+    # None ran before its deadline
+    deadlines = {"a": 0.02, "b1": 0.04, "b2": 0.04, "c": 0.06}
+    assert all(ran >= now + deadlines[label] for label, ran in calls.order)
+
+
+def test_earlier_deadline_wakes_the_sleeping_thread(scheduler):
+    calls = Calls(1)
+    scheduler.schedule(5, calls, "late")
+    time.sleep(0.02) # the thread is now sleeping towards the late deadline
+    start = time.monotonic()
+    scheduler.schedule(0.01, calls, "early")
+
+    assert calls.done.wait(2)
+    assert calls.labels() == ["early"]
+    assert calls.order[0][1] - start < 1
+
+
+def test_cancelled_call_never_runs(scheduler):
+    calls = Calls(1)
+    cancelled = scheduler.schedule(0.01, calls, "cancelled")
+    scheduler.schedule(0.03, calls, "kept")
+    assert scheduler.pending() == 2
+
+    scheduler.cancel(cancelled)
+    scheduler.cancel(None) # nothing scheduled: allowed
+    assert scheduler.pending() == 1
+
+    assert calls.done.wait(2)
+    time.sleep(0.02)
+    assert calls.labels() == ["kept"]
+
+
+def test_rescheduling_earlier_by_cancel_and_schedule(scheduler):
+    calls = Calls(1)
+    first = scheduler.schedule(5, calls, "moved")
+    scheduler.cancel(first)
+    scheduler.schedule(0.01, calls, "moved")
+
+    assert calls.done.wait(2)
+    assert calls.labels() == ["moved"]
+
+
+def test_failing_callback_does_not_stop_the_thread(scheduler):
+    calls = Calls(1)
+
+    def broken():
+        raise RuntimeError("boom")
+
+    scheduler.schedule(0, broken)
+    scheduler.schedule(0.01, calls, "after")
+
+    assert calls.done.wait(2)
+
+
+def test_shutdown_drops_pending_calls_and_stops_the_thread(scheduler):
+    calls = Calls(1)
+    scheduler.schedule(0.05, calls, "never")
+    scheduler.shutdown()
+
+    scheduler._thread.join(2)
+    assert not scheduler._thread.is_alive()
+    assert scheduler.pending() == 0
+    time.sleep(0.1)
+    assert calls.order == []
@@ -0,0 +1,124 @@
+import threading
+
+from edit_queue import Edit, EditQueue
+
+
+def apply_to(text, edit):
+    """What `text` becomes (caret at its end) after the edit; cursor_back is ignored."""
+    return text[:len(text) - edit.deletions] + edit.text
+
+
+def test_then_with_a_deletion_inside_the_previous_text():
+    first = Edit(3, "by the way", expansion="btw")
+    second = Edit(3, "WAY", expansion="way")
+
+    merged = first.then(second)
+
+    assert (merged.deletions, merged.text, merged.expansion) == (3, "by the WAY", "way")
+    assert apply_to("so btw", merged) == apply_to(apply_to("so btw", first), second)
+
+
+def test_then_with_a_deletion_reaching_past_the_previous_text():
+    first = Edit(2, "ab")
+    second = Edit(5, "xyz")
+
+    merged = first.then(second)
+
+    assert (merged.deletions, merged.text) == (5, "xyz")
+    assert apply_to("hello12", merged) == apply_to(apply_to("hello12", first), second)
+
+
+def test_then_keeps_paste_and_the_last_cursor_move():
+    merged = Edit(1, "a", paste=True).then(Edit(0, "()", cursor_back=1))
+
+    assert (merged.text, merged.paste, merged.cursor_back) == ("a()", True, 1)
+
+
+def test_then_refuses_after_a_cursor_move():
+    assert Edit(0, "()", cursor_back=1).then(Edit(1, "x")) is None
+
+
+class BlockingApply:
+    """Records applied edits; holds the first one until release() so others queue up behind it."""
+
+    def __init__(self):
+        self.edits = []
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        self.done = threading.Event()
+        self.expected = 0
+
+    def __call__(self, edit):
+        self.started.set()
+        self.gate.wait(5)
+        self.edits.append(edit)
+        if len(self.edits) >= self.expected:
+            self.done.set()
+
+    def release(self, expected):
+        self.expected = expected
+        self.gate.set()
+        assert self.done.wait(5)
+
+
+def test_operations_queued_behind_a_slow_edit_go_out_as_one():
+    apply = BlockingApply()
+    queue = EditQueue(apply, name="TestEditQueue")
+    try:
+        queue.submit(lambda: Edit(3, "first"))
+        assert apply.started.wait(5)
+        queue.submit(lambda: Edit(3, "second"))
+        queue.submit(lambda: None) # nothing to do
+        queue.submit(lambda: Edit(1, "third"))
+        apply.release(expected=2)
+
+        assert [(e.deletions, e.text) for e in apply.edits] == [(3, "first"), (3, "seconthird")]
+        queue.shutdown(wait=True)
+        stats = queue.stats()
+        assert (stats["completed"], stats["injected"], stats["coalesced"]) == (4, 2, 1)
+    finally:
+        queue.shutdown()
+
+
+def test_undo_barrier_sees_the_edits_before_it():
+    apply = BlockingApply()
+    queue = EditQueue(apply, name="TestEditQueue")
+    applied_before_undo = []
+
+    def undo():
+        applied_before_undo.extend(e.text for e in apply.edits)
+        return Edit(len("second"), "2nd")
+
+    try:
+        queue.submit(lambda: Edit(3, "first"))
+        assert apply.started.wait(5)
+        queue.submit(lambda: Edit(3, "second"))
+        queue.submit(undo, barrier=True)
+        queue.submit(lambda: Edit(0, " third"))
+        apply.release(expected=3)
+
+        # The undo was not merged into "second", but what followed it joined the undo
+        assert applied_before_undo == ["first", "second"]
+        assert [(e.deletions, e.text) for e in apply.edits] == [(3, "first"), (3, "second"), (6, "2nd third")]
+    finally:
+        queue.shutdown()
+
+
+def test_failing_operation_does_not_stop_the_queue():
+    apply = BlockingApply()
+    queue = EditQueue(apply, name="TestEditQueue")
+
+    def broken():
+        raise RuntimeError("boom")
+
+    try:
+        queue.submit(broken)
+        queue.submit(lambda: Edit(0, "after"))
+        apply.release(expected=1)
+
+        assert [e.text for e in apply.edits] == ["after"]
+        queue.shutdown(wait=True)
+        assert queue.stats()["failed"] == 1
+        assert not queue.submit(lambda: Edit(0, "late"))
+    finally:
+        queue.shutdown()
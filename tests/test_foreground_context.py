@@ -0,0 +1,71 @@
+from foreground_context import FakeForegroundProvider, ForegroundContext, normalize_app
+
+
+def test_normalize_app():
+    assert normalize_app(" Code.EXE ") == "code.exe"
+    assert normalize_app("Class: Notepad") == "class:notepad"
+
+
+def test_fake_provider_reports_focus_changes_lower_cased():
+    provider = FakeForegroundProvider("Explorer.EXE", "CabinetWClass")
+    context = ForegroundContext(provider)
+    changes = []
+    context.add_listener(lambda exe, window_class: changes.append((exe, window_class)))
+
+    context.start()
+    provider.set_foreground("Code.exe", "Chrome_WidgetWin_1")
+
+    assert changes == [("explorer.exe", "cabinetwclass"), ("code.exe", "chrome_widgetwin_1")]
+    assert (context.exe, context.window_class) == ("code.exe", "chrome_widgetwin_1")
+
+
+def test_same_app_again_is_not_reported():
+    provider = FakeForegroundProvider("code.exe")
+    context = ForegroundContext(provider)
+    changes = []
+    context.add_listener(lambda exe, window_class: changes.append(exe))
+
+    context.start()
+    provider.set_foreground("CODE.EXE")
+    provider.set_foreground(None)
+
+    assert changes == ["code.exe", None]
+
+
+def test_failing_listener_does_not_stop_the_others():
+    provider = FakeForegroundProvider()
+    context = ForegroundContext(provider)
+    changes = []
+
+    def broken(exe, window_class):
+        raise RuntimeError("boom")
+
+    context.add_listener(broken)
+    context.add_listener(lambda exe, window_class: changes.append(exe))
+    context.start()
+    provider.set_foreground("notepad.exe")
+
+    assert changes == ["notepad.exe"]
+
+
+def test_stopped_provider_reports_nothing():
+    provider = FakeForegroundProvider("code.exe")
+    context = ForegroundContext(provider)
+    context.start()
+    context.stop()
+    provider.set_foreground("notepad.exe")
+
+    assert context.exe == "code.exe"
+
+
+def test_window_listeners_hear_every_foreground_window():
+    provider = FakeForegroundProvider("notepad.exe")
+    context = ForegroundContext(provider)
+    windows = []
+    context.add_window_listener(lambda: windows.append(provider.exe))
+
+    context.start()
+    provider.set_foreground("notepad.exe") # a second Notepad window
+    provider.set_foreground("code.exe")
+
+    assert windows == ["notepad.exe", "notepad.exe", "code.exe"]
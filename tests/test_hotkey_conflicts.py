@@ -0,0 +1,73 @@
+from hotkey_conflicts import build_conflict_index, DUPLICATE, LONG_PRESS, PREFIX
+
+
+def hotkey(trigger, name, **fields):
+    return dict(trigger=trigger, name=name, type="run", target=name, **fields)
+
+
+def kinds(index):
+    return sorted((c.kind, tuple(e.label for e in c.entries)) for c in index.conflicts)
+
+
+def test_duplicates_are_found_whatever_the_key_order_and_case():
+    index = build_conflict_index([
+        hotkey("ctrl+alt+t", "terminal"),
+        hotkey("Alt+Ctrl+T", "other"),
+        hotkey("ctrl+alt+e", "editor"),
+    ])
+
+    assert kinds(index) == [(DUPLICATE, ("hotkey 'terminal'", "hotkey 'other'"))]
+    assert index.messages_for_hotkey(0) == index.messages_for_hotkey(1) != []
+    assert index.messages_for_hotkey(2) == []
+
+
+def test_inactive_and_invalid_hotkeys_are_ignored():
+    index = build_conflict_index([
+        hotkey("ctrl+alt+t", "terminal"),
+        hotkey("ctrl+alt+t", "off", active=False),
+        hotkey(" , ", "broken"),
+    ])
+
+    assert len(index) == 0
+
+
+def test_long_and_short_press_on_one_trigger():
+    index = build_conflict_index([
+        hotkey("ctrl+q", "short"),
+        hotkey("ctrl+q", "long", long_press=True),
+    ])
+
+    assert kinds(index) == [(LONG_PRESS, ("hotkey 'short'", "hotkey 'long'"))]
+
+
+def test_a_trigger_shadowing_a_sequence_is_a_prefix_conflict():
+    index = build_conflict_index([
+        hotkey("ctrl+k, ctrl+c", "comment"),
+        hotkey("ctrl+k", "kill"),
+        hotkey("ctrl+j, ctrl+c", "other sequence"),
+    ])
+
+    assert kinds(index) == [(PREFIX, ("hotkey 'kill'", "hotkey 'comment'"))]
+    assert "shadows sequence 'ctrl+k, ctrl+c'" in index.messages()[0]
+
+
+def test_scoped_bindings_see_the_global_ones_but_not_each_other():
+    index = build_conflict_index([
+        hotkey("ctrl+k, ctrl+c", "global sequence"),
+        hotkey("ctrl+k", "in code", apps=["Code.exe"]),
+        hotkey("ctrl+b", "in code too", apps=["code.exe"]),
+        hotkey("ctrl+b", "in notepad", apps=["notepad.exe"]),
+    ])
+
+    # The app-scoped prefix clashes with the global sequence; two apps
+    # binding the same trigger never run at the same time
+    assert kinds(index) == [(PREFIX, ("hotkey 'in code'", "hotkey 'global sequence'"))]
+    assert index.conflicts[0].scope == (None, "code.exe")
+
+
+def test_workspace_launch_hotkeys_take_part():
+    workspaces = [{"id": "w1", "name": "Writing", "launch_hotkey": "ctrl+alt+w"}]
+    index = build_conflict_index([hotkey("ctrl+alt+w", "word")], workspaces)
+
+    assert kinds(index) == [(DUPLICATE, ("hotkey 'word'", "workspace 'Writing' launch hotkey"))]
+    assert index.messages_for_hotkey(0)
@@ -0,0 +1,222 @@
+import json
+
+import pytest
+
+from chord_compiler import compiler
+from chord_dispatcher import parse_sequence
+from config_manager import ConfigManager
+from foreground_context import FakeForegroundProvider
+from hotkey_manager import HotkeyManager
+
+
+def hotkey(trigger, **fields):
+    fields.setdefault("target", trigger)
+    return dict(trigger=trigger, type="run", **fields)
+
+
+@pytest.fixture
+def make_manager(tmp_path):
+    managers = []
+
+    def make(hotkeys, exe=None, window_class=None, workspaces=()):
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps({"hotkeys": hotkeys, "workspaces": list(workspaces)}))
+        config = ConfigManager(str(path))
+        provider = FakeForegroundProvider(exe, window_class)
+        manager = HotkeyManager(config, foreground_provider=provider)
+        manager.set_workspace_switcher(manager.set_current_workspace)
+        manager.reload_hotkeys()
+        # The foreground side of start_listener(), without the keyboard hook
+        manager.foreground.start()
+        managers.append(manager)
+        return manager, provider
+
+    yield make
+    for manager in managers:
+        manager.executor.shutdown()
+        manager.dispatcher.scheduler.shutdown()
+        manager.config_manager.close()
+        manager.config_manager.snippet_store.close()
+
+
+def bound(manager):
+    """Triggers the dispatcher would match right now."""
+    return sorted(b.trigger for node in manager.dispatcher.table.values() for b in node.bindings)
+
+
+HOTKEYS = [
+    hotkey("ctrl+alt+g"),
+    hotkey("ctrl+alt+c", apps=["Code.exe"]),
+    hotkey("ctrl+alt+n", apps=["class:Notepad"]),
+]
+
+
+def test_foreground_app_selects_its_binding_table(make_manager):
+    manager, provider = make_manager(HOTKEYS, exe="explorer.exe")
+    assert manager.current_app is None
+    assert bound(manager) == ["ctrl+alt+g"]
+
+    provider.set_foreground("CODE.EXE", "Chrome_WidgetWin_1")
+    assert manager.current_app == "code.exe"
+    assert manager.dispatcher.table is manager.tables[(None, "code.exe")]
+    assert bound(manager) == ["ctrl+alt+c", "ctrl+alt+g"]
+
+    # Matched by window class when the executable is not scoped
+    provider.set_foreground("notepad.exe", "Notepad")
+    assert manager.current_app == "class:notepad"
+    assert bound(manager) == ["ctrl+alt+g", "ctrl+alt+n"]
+
+
+def test_unscoped_app_falls_back_to_the_global_bindings(make_manager):
+    manager, provider = make_manager(HOTKEYS, exe="code.exe")
+    assert bound(manager) == ["ctrl+alt+c", "ctrl+alt+g"]
+
+    provider.set_foreground("explorer.exe")
+    assert manager.current_app is None
+    assert manager.dispatcher.table is manager.tables[(None, None)]
+    assert bound(manager) == ["ctrl+alt+g"]
+
+    provider.set_foreground(None)
+    assert bound(manager) == ["ctrl+alt+g"]
+
+
+def test_app_binding_is_added_to_the_global_one_on_the_same_trigger(make_manager):
+    manager, provider = make_manager([
+        hotkey("ctrl+alt+g"),
+        hotkey("ctrl+alt+g", target="in code", apps=["code.exe"]),
+    ], exe="code.exe")
+
+    bindings = manager.dispatcher.table[parse_sequence("ctrl+alt+g")[0]].bindings
+    assert len(bindings) == 2
+
+    provider.set_foreground("explorer.exe")
+    bindings = manager.dispatcher.table[parse_sequence("ctrl+alt+g")[0]].bindings
+    assert len(bindings) == 1
+
+
+def test_reload_drops_the_table_of_an_app_no_longer_scoped(make_manager):
+    manager, provider = make_manager(HOTKEYS, exe="code.exe")
+    assert manager.current_app == "code.exe"
+
+    config = manager.config_manager
+    config.config["hotkeys"] = [hk for hk in config.get_hotkeys() if not hk.get("apps")]
+    manager.reload_hotkeys()
+
+    # Code is still in front, but nothing is scoped to it any more
+    assert manager.current_app is None
+    assert "code.exe" not in manager.app_keys
+    assert bound(manager) == ["ctrl+alt+g"]
+
+
+def test_workspace_selects_its_table_on_top_of_the_app_scope(make_manager):
+    workspaces = [{"id": "w1", "name": "Writing", "launch_hotkey": "ctrl+alt+1"},
+                  {"id": "w2", "name": "Coding"}]
+    manager, provider = make_manager([
+        hotkey("ctrl+alt+g"),
+        hotkey("ctrl+alt+w", workspaces=["w1"]),
+        hotkey("ctrl+alt+c", workspaces=["w1"], apps=["code.exe"]),
+        hotkey("ctrl+alt+e", workspaces=["global"]),
+    ], exe="explorer.exe", workspaces=workspaces)
+    assert bound(manager) == ["ctrl+alt+1", "ctrl+alt+e", "ctrl+alt+g"]
+
+    manager.set_current_workspace("w1")
+    assert bound(manager) == ["ctrl+alt+1", "ctrl+alt+e", "ctrl+alt+g", "ctrl+alt+w"]
+    provider.set_foreground("code.exe")
+    assert bound(manager) == ["ctrl+alt+1", "ctrl+alt+c", "ctrl+alt+e", "ctrl+alt+g", "ctrl+alt+w"]
+
+    manager.set_current_workspace("w2")
+    assert manager.dispatcher.table is manager.tables[("w2", "code.exe")]
+    assert bound(manager) == ["ctrl+alt+1", "ctrl+alt+e", "ctrl+alt+g"]
+
+
+def test_reload_registers_only_what_changed(make_manager):
+    manager, provider = make_manager(HOTKEYS + [hotkey("ctrl+alt+g")])
+    assert len(manager.registrations) == 4
+    before = dict(manager.registrations)
+    kept = {b for b in manager.bindings if b.trigger != "ctrl+alt+n"}
+
+    config = manager.config_manager
+    config.get_hotkeys()[2]["target"] = "edited"
+    manager.reload_hotkeys()
+
+    added = [key for key in manager.registrations if key not in before]
+    removed = [key for key in before if key not in manager.registrations]
+    assert (len(added), len(removed)) == (1, 1)
+    assert added[0][0][3] == "edited" and removed[0][0][3] == "ctrl+alt+n"
+    # The other registrations, identical duplicates included, were left alone
+    assert all(manager.registrations[key] is remove for key, remove in before.items() if key not in removed)
+    assert kept <= set(manager.bindings)
+
+    # Nothing changed: nothing is registered again
+    after = dict(manager.registrations)
+    manager.reload_hotkeys()
+    assert manager.registrations == after
+
+
+def test_toggle_adds_or_removes_just_that_binding(make_manager):
+    manager, provider = make_manager(HOTKEYS, exe="code.exe")
+    manager.is_running = True # the keyboard hook itself is not needed here
+    others = dict(manager.registrations)
+    hk = manager.config_manager.get_hotkeys()[1]
+
+    hk["active"] = False
+    manager.update_hotkey_status(hk)
+    assert bound(manager) == ["ctrl+alt+g"]
+    assert manager.current_app is None # nothing is scoped to code.exe any more
+    assert all(manager.registrations[key] is remove for key, remove in others.items() if key in manager.registrations)
+    assert len(manager.registrations) == 2
+
+    hk["active"] = True
+    manager.update_hotkey_status(hk)
+    assert bound(manager) == ["ctrl+alt+c", "ctrl+alt+g"]
+    assert len(manager.registrations) == 3
+
+
+def test_workspace_tables_are_built_ahead_and_kept_up_to_date(make_manager):
+    workspaces = [{"id": "w1", "name": "Writing"}, {"id": "w2", "name": "Coding"}]
+    manager, provider = make_manager([
+        hotkey("ctrl+alt+g"),
+        hotkey("ctrl+alt+w", workspaces=["w1"]),
+    ], workspaces=workspaces)
+    # Every workspace has its table before it is ever switched to
+    w1, w2 = manager.tables[("w1", None)], manager.tables[("w2", None)]
+
+    manager.set_current_workspace("w1")
+    assert manager.dispatcher.table is w1
+    assert bound(manager) == ["ctrl+alt+g", "ctrl+alt+w"]
+    manager.set_current_workspace("w2")
+    assert manager.dispatcher.table is w2
+    assert bound(manager) == ["ctrl+alt+g"]
+
+    # A reload updates the compiled tables in place instead of rebuilding them
+    manager.config_manager.get_hotkeys().append(hotkey("ctrl+alt+x", workspaces=["w2"]))
+    manager.reload_hotkeys()
+    assert manager.tables[("w2", None)] is w2
+    assert bound(manager) == ["ctrl+alt+g", "ctrl+alt+x"]
+    manager.set_current_workspace(None)
+    assert bound(manager) == ["ctrl+alt+g"]
+
+
+def test_scan_codes_of_the_configured_keys_reach_the_dispatcher(make_manager, monkeypatch):
+    codes = {"ctrl": (29,), "shift": (42, 54), "1": (2, 79), "f5": (63,)}
+    monkeypatch.setattr(compiler, "resolver", lambda name: codes[name])
+    compiler.clear()
+    try:
+        manager, provider = make_manager([hotkey("ctrl+shift+1"), hotkey("f5", active=False)])
+        # First scan code of each key; inactive hotkeys too, so a toggle needs no reload
+        assert manager.dispatcher.scan_names == {29: "ctrl", 42: "shift", 2: "1", 63: "f5"}
+    finally:
+        compiler.clear()
+
+
+def test_timeouts_from_the_settings_reach_the_live_dispatcher(make_manager):
+    manager, _ = make_manager(HOTKEYS)
+    config = manager.config_manager
+
+    config.set_sequence_timeout(1500)
+    config.set_tap_timeout(200)
+    config.set_double_tap_interval(400)
+    manager.apply_timeouts()
+
+    dispatcher = manager.dispatcher
+    assert (dispatcher.sequence_timeout, dispatcher.tap_timeout, dispatcher.double_tap_interval) == (1.5, 0.2, 0.4)
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import keyboard
+import pytest
+
+import input_injection
+from chord_dispatcher import parse_sequence
+
+NAMES = {29: "ctrl", 56: "alt", 20: "t", 37: "k", 46: "c"}
+
+
+class Event:
+    def __init__(self, name, event_type):
+        self.name = name
+        self.event_type = event_type
+
+
+@pytest.fixture
+def echo(monkeypatch):
+    """Fake system: every pressed/released scan code comes straight back through the hook."""
+    sent = []
+
+    def press(code):
+        sent.append(("down", code))
+        input_injection.is_injected(Event(NAMES[code], "down"))
+
+    def release(code):
+        sent.append(("up", code))
+        input_injection.is_injected(Event(NAMES[code], "up"))
+
+    monkeypatch.setattr(keyboard, "press", press)
+    monkeypatch.setattr(keyboard, "release", release)
+    monkeypatch.setattr(input_injection, "_pending", {})
+    return sent
+
+
+def compiled(trigger, scan_codes):
+    # What ChordCompiler produces: per stroke, per key, the scan codes
+    return SimpleNamespace(strokes=parse_sequence(trigger), scan_codes=scan_codes, text=trigger)
+
+
+def test_one_stroke_chord_presses_every_key(echo):
+    batch = input_injection.send(compiled("ctrl+alt+t", (((29,), (56,), (20,)),)))
+
+    assert echo == [("down", 29), ("down", 56), ("down", 20), ("up", 20), ("up", 56), ("up", 29)]
+    assert batch.wait(0)
+    assert input_injection._pending == {}
+    # The user's next real key is not mistaken for ours
+    assert not input_injection.is_injected(Event("t", "down"))
+
+
+def test_multi_stroke_chord_is_sent_stroke_by_stroke(echo):
+    batch = input_injection.send(compiled("ctrl+k, ctrl+c", (((29,), (37,)), ((29,), (46,)))))
+
+    assert echo == [("down", 29), ("down", 37), ("up", 37), ("up", 29),
+                    ("down", 29), ("down", 46), ("up", 46), ("up", 29)]
+    assert batch.wait(0)
+    assert input_injection._pending == {}
+
+
+def test_unresolved_chord_falls_back_to_its_text(monkeypatch):
+    monkeypatch.setattr(input_injection, "_pending", {})
+    sent = []
+    monkeypatch.setattr(keyboard, "send", sent.append)
+
+    batch = input_injection.send(compiled("ctrl+t", None))
+
+    assert sent == ["ctrl+t"]
+    assert not batch.wait(0)
+    assert input_injection.is_injected(Event("ctrl", "down"))
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from latency_stats import (BUCKET_COUNT, STAGES, LatencyHistogram, LatencyStats, _bucket_index,
+                           _bucket_value)
+
+US = 1000
+MS = 1000 * US
+
+
+def histogram(values_ns):
+    h = LatencyHistogram()
+    for value in values_ns:
+        h.record(value)
+    return h
+
+
+def test_small_values_have_a_bucket_each():
+    # Below 16 us every microsecond is its own bucket, so percentiles are exact
+    h = histogram(value * US for value in range(1, 11))
+
+    assert h.summary() == {"count": 10, "p50_ms": 0.005, "p95_ms": 0.010, "p99_ms": 0.010, "max_ms": 0.010}
+    assert h.percentile(10) == 0.001
+    assert h.percentile(0) == 0.001 # rank is at least 1
+
+
+def test_percentiles_of_1_to_100_ms_are_within_the_bucket_width():
+    h = histogram(value * MS for value in range(1, 101))
+
+    summary = h.summary()
+    assert summary["count"] == 100
+    assert summary["max_ms"] == 100.0
+    for key, expected in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99)):
+        assert summary[key] == pytest.approx(expected, rel=0.125)
+
+
+def test_percentile_never_exceeds_the_maximum():
+    # One sample: the bucket midpoint is above it, so the maximum is reported
+    h = histogram([100 * MS])
+
+    assert h.percentile(50) == 100.0
+    assert h.percentile(99) == 100.0
+
+
+def test_skewed_samples():
+    # 98 fast hotkeys and two slow ones: p50 and p95 stay fast, p99 sees the slow ones
+    h = histogram([2 * MS] * 98 + [500 * MS] * 2)
+
+    assert h.percentile(50) == pytest.approx(2, rel=0.125)
+    assert h.percentile(95) == pytest.approx(2, rel=0.125)
+    assert h.percentile(99) == pytest.approx(500, rel=0.125)
+    assert h.summary()["max_ms"] == 500.0
+
+
+def test_empty_histogram():
+    assert LatencyHistogram().summary() == {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None,
+                                            "max_ms": 0.0}
+
+
+def test_negative_and_huge_values_are_clamped():
+    h = histogram([-5 * US, 10 ** 12]) # a clock that went backwards, and ~17 minutes
+
+    assert h.counts[0] == 1
+    assert h.counts[BUCKET_COUNT - 1] == 1
+    assert h.summary()["max_ms"] == 10 ** 6
+
+
+@pytest.mark.parametrize("value_us", [16, 17, 100, 1000, 12345, 2 ** 20 + 1, 2 ** 26 - 1])
+def test_bucket_midpoint_is_within_an_eighth_of_the_value(value_us):
+    index = _bucket_index(value_us)
+    assert abs(_bucket_value(index) - value_us) / value_us <= 0.125
+    # Buckets go up with the value
+    assert _bucket_index(value_us - 1) <= index <= _bucket_index(value_us + 1)
+
+
+def test_record_splits_the_timestamps_into_stages():
+    stats = LatencyStats()
+    # key-down at 0, match at 1 ms, enqueue at 1.01 ms, start at 3 ms, end at 13 ms
+    stats.record("ctrl+alt+t", "run", 0, 1 * MS, 1 * MS + 10 * US, 3 * MS, 13 * MS)
+
+    stages = stats.by_binding["ctrl+alt+t"]
+    assert set(stages) == set(STAGES)
+    maxima = {stage: stages[stage].summary()["max_ms"] for stage in STAGES}
+    assert maxima == {"hook": 1.0, "enqueue": 0.01, "queue_wait": 1.99, "action": 10.0, "total": 13.0}
+    assert stats.by_action_type["run"]["total"].total == 1
+
+
+def test_bindings_and_action_types_are_counted_separately():
+    stats = LatencyStats()
+    stats.record("ctrl+1", "run", 0, 0, 0, 0, 1 * MS)
+    stats.record("ctrl+2", "run", 0, 0, 0, 0, 3 * MS)
+    stats.record("ctrl+2", "text", 0, 0, 0, 0, 5 * MS)
+
+    rows = [(kind, name, summary["count"], summary["max_ms"]) for kind, name, summary in stats.rows()]
+    assert rows == [
+        ("Binding", "ctrl+1", 1, 1.0),
+        ("Binding", "ctrl+2", 2, 5.0),
+        ("Action type", "run", 2, 3.0),
+        ("Action type", "text", 1, 5.0),
+    ]
+
+    stats.clear()
+    assert stats.rows() == []
+
+
+def test_dump_json(tmp_path):
+    stats = LatencyStats()
+    stats.record("ctrl+1", "run", 0, 1 * MS, 1 * MS, 1 * MS, 2 * MS)
+    path = tmp_path / "latency.json"
+
+    assert stats.dump_json(str(path)) == (True, "Success")
+    data = json.loads(path.read_text())
+    assert data["bindings"]["ctrl+1"]["hook"]["max_ms"] == 1.0
+    assert data["action_types"]["run"]["total"]["count"] == 1
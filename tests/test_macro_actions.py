@@ -0,0 +1,260 @@
+import types
+
+import pytest
+
+import macro_actions
+from macro_actions import DEFAULT_WAIT_TIMEOUT, MacroRunner, MacroStep, compile_macro
+
+
+def steps(text):
+    return [(s.op, s.arg, s.ms) for s in compile_macro(text).steps]
+
+
+def test_compile_macro_parses_every_step():
+    text = ("launch notepad.exe; wait Untitled - Notepad 3000; focus Notepad; type Hello;; world;"
+            " snippet btw; send ctrl+s; delay 250; open https://example.com")
+
+    assert steps(text) == [
+        ("launch", "notepad.exe", 0),
+        ("wait", "Untitled - Notepad", 3000),
+        ("focus", "Notepad", 0),
+        ("type", "Hello; world", 0),
+        ("snippet", "btw", 0),
+        ("send", "ctrl+s", 0),
+        ("delay", "", 250),
+        ("open", "https://example.com", 0),
+    ]
+
+
+def test_compile_macro_defaults_and_case():
+    assert steps("WAIT Notepad") == [("wait", "Notepad", DEFAULT_WAIT_TIMEOUT)]
+    # A title ending in a number needs the timeout spelled out
+    assert steps("wait Calculator 2") == [("wait", "Calculator", 2)]
+    assert steps(" ; launch calc.exe ;") == [("launch", "calc.exe", 0)]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("", "Macro has no steps"),
+    (" ; ", "Macro has no steps"),
+    ("launch calc.exe; jump 3", "Step 2: unknown step 'jump'"),
+    ("delay soon", "Step 1: delay needs a number of milliseconds"),
+    ("send +", "Step 1: send needs a key chord such as ctrl+s"),
+    ("focus", "Step 1: 'focus' needs an argument"),
+])
+def test_compile_macro_rejects_bad_steps(text, message):
+    with pytest.raises(ValueError) as error:
+        compile_macro(text)
+    assert str(error.value) == message
+
+
+class FakeExecutor:
+    """Queues submitted actions until run() is called, in place of the worker threads."""
+
+    def __init__(self, accept=True):
+        self.queue = []
+        self.accept = accept
+
+    def submit(self, action_type, func, *args, **kwargs):
+        if self.accept:
+            self.queue.append((func, args))
+        return self.accept
+
+    def run(self):
+        while self.queue:
+            func, args = self.queue.pop(0)
+            func(*args)
+
+
+class FakeScheduler:
+    """Keeps the scheduled calls until the test advances its clock."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.calls = []
+
+    def schedule(self, delay, callback, *args):
+        call = types.SimpleNamespace(deadline=self.now + delay, callback=callback, args=args, cancelled=False)
+        self.calls.append(call)
+        return call
+
+    @staticmethod
+    def cancel(call):
+        if call is not None:
+            call.cancelled = True
+
+    def pending(self):
+        return [c for c in self.calls if not c.cancelled]
+
+    def advance(self, seconds):
+        self.now += seconds
+        due = [c for c in self.calls if c.deadline <= self.now]
+        self.calls = [c for c in self.calls if c.deadline > self.now]
+        for call in due:
+            if not call.cancelled:
+                call.callback(*call.args)
+
+
+@pytest.fixture
+def windows(monkeypatch):
+    """Titles of the open windows; find_window looks them up here and counts the lookups."""
+    open_windows = set()
+    lookups = []
+
+    def find_window(title):
+        lookups.append(title)
+        return 1 if title in open_windows else None
+
+    monkeypatch.setattr(macro_actions, "find_window", find_window)
+    return types.SimpleNamespace(open=open_windows, lookups=lookups)
+
+
+@pytest.fixture
+def done(monkeypatch):
+    """Steps that ran, as (op, arg)."""
+    done = []
+    monkeypatch.setattr(macro_actions, "run_command", lambda arg: done.append(("launch", arg)))
+    monkeypatch.setattr(macro_actions, "focus_window", lambda arg: done.append(("focus", arg)))
+    monkeypatch.setattr(macro_actions.input_injection, "write", lambda text: done.append(("type", text)))
+    monkeypatch.setattr(macro_actions.input_injection, "send", lambda chord: done.append(("send", chord)))
+    return done
+
+
+@pytest.fixture
+def runner():
+    snippets = {"btw": "by the way"}
+    return MacroRunner(FakeExecutor(), FakeScheduler(), snippet_lookup=snippets.get)
+
+
+def test_steps_run_in_order_and_delays_are_deadlines(runner, done, windows):
+    runner.start(compile_macro("launch calc.exe; delay 500; type 12; snippet btw; send enter"), "ctrl+1")
+    runner.executor.run()
+    assert done == [("launch", "calc.exe")]
+    assert [c.deadline for c in runner.scheduler.pending()] == [0.5]
+
+    runner.scheduler.advance(0.4)
+    assert runner.executor.queue == []
+    runner.scheduler.advance(0.1)
+    runner.executor.run()
+
+    assert done == [("launch", "calc.exe"), ("type", "12"), ("type", "by the way"), ("send", "enter")]
+    assert runner.running() == []
+
+
+def test_wait_is_woken_by_a_window_change_not_by_polling(runner, done, windows):
+    runner.start(compile_macro("launch notepad.exe; wait Notepad 5000; type hi"), "ctrl+1")
+    runner.executor.run()
+    assert windows.lookups == ["Notepad"]
+    # Only the timeout is scheduled
+    assert [(c.deadline, c.callback) for c in runner.scheduler.pending()] == [(5.0, runner._wait_timeout)]
+
+    # Windows that are not the one waited for: one lookup each, still waiting
+    runner.window_changed()
+    runner.executor.run()
+    runner.scheduler.advance(1)
+    assert len(windows.lookups) == 2
+    assert done == [("launch", "notepad.exe")]
+
+    windows.open.add("Notepad")
+    runner.window_changed()
+    runner.executor.run()
+
+    assert done == [("launch", "notepad.exe"), ("type", "hi")]
+    assert runner.scheduler.pending() == []
+    assert runner.running() == []
+
+
+def test_window_already_open_does_not_wait(runner, done, windows):
+    windows.open.add("Notepad")
+    runner.start(compile_macro("wait Notepad; type hi"), "ctrl+1")
+    runner.executor.run()
+
+    assert done == [("type", "hi")]
+    assert runner.scheduler.calls == []
+
+
+def test_timeout_checks_once_more_then_gives_up(runner, done, windows):
+    runner.start(compile_macro("wait Notepad 2000; type hi"), "ctrl+1")
+    runner.executor.run()
+
+    runner.scheduler.advance(2)
+    runner.executor.run()
+
+    assert windows.lookups == ["Notepad", "Notepad"]
+    assert done == []
+    assert runner.running() == []
+    # Nothing left to wake
+    runner.window_changed()
+    assert runner.executor.queue == []
+
+
+def test_window_opened_in_the_background_is_found_at_the_timeout(runner, done, windows):
+    runner.start(compile_macro("wait Notepad 2000; type hi"), "ctrl+1")
+    runner.executor.run()
+
+    windows.open.add("Notepad") # no foreground change reported
+    runner.scheduler.advance(2)
+    runner.executor.run()
+
+    assert done == [("type", "hi")]
+
+
+def test_timeout_while_a_check_is_queued_gives_up_after_that_check(runner, done, windows):
+    runner.start(compile_macro("wait Notepad 2000; type hi"), "ctrl+1")
+    runner.executor.run()
+
+    runner.window_changed()
+    runner.scheduler.advance(2)
+    # The queued check covers the timeout too
+    assert len(runner.executor.queue) == 1
+    runner.executor.run()
+
+    assert done == []
+    assert runner.running() == []
+
+
+def test_pressing_the_hotkey_again_cancels_a_waiting_run(runner, done, windows):
+    macro = compile_macro("wait Notepad 2000; type hi")
+    runner.start(macro, "ctrl+1")
+    runner.executor.run()
+
+    assert runner.start(macro, "ctrl+1") is None
+    assert runner.running() == []
+    assert runner.scheduler.pending() == []
+
+    windows.open.add("Notepad")
+    runner.window_changed()
+    runner.executor.run()
+    assert done == []
+
+
+def test_cancel_all_between_steps(runner, done, windows):
+    runner.start(compile_macro("type a; delay 100; type b"), "ctrl+1")
+    runner.start(compile_macro("wait Notepad; type c"), "ctrl+2")
+    runner.executor.run()
+    assert sorted(runner.running()) == ["ctrl+1", "ctrl+2"]
+
+    runner.cancel_all()
+    runner.scheduler.advance(10)
+    runner.executor.run()
+
+    assert done == [("type", "a")]
+    assert runner.running() == []
+
+
+def test_full_queue_stops_the_run(done, windows):
+    runner = MacroRunner(FakeExecutor(accept=False), FakeScheduler())
+
+    runner.start(compile_macro("type a"), "ctrl+1")
+
+    assert runner.running() == []
+
+
+def test_missing_snippet_is_skipped(runner, done, windows):
+    runner.start(compile_macro("snippet nope; type a"), "ctrl+1")
+    runner.executor.run()
+
+    assert done == [("type", "a")]
+
+
+def test_step_repr():
+    assert repr(MacroStep("delay", "", 5)) == "MacroStep('delay', '', ms=5)"
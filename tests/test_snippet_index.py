@@ -0,0 +1,64 @@
+from snippet_index import SnippetIndex, HALF_LIFE
+
+NOW = 1_700_000_000.0
+
+
+def make_index(triggers, max_ranked=1000):
+    index = SnippetIndex(max_ranked=max_ranked)
+    index.update((t, t.upper()) for t in triggers)
+    return index
+
+
+def test_complete_lists_used_triggers_first_then_alphabetical():
+    index = make_index(["addr", "address", "adieu", "admin", "bye"])
+    index.record_use("admin", when=NOW)
+    index.record_use("adieu", when=NOW - 10)
+
+    assert [t for t, _ in index.complete("ad", limit=4)] == ["admin", "adieu", "addr", "address"]
+    assert index.complete("AD", limit=1) == [("admin", "ADMIN")]
+    assert index.complete("zz") == []
+
+
+def test_frequency_and_recency_both_count():
+    index = make_index(["often", "recent"])
+    for i in range(4):
+        index.record_use("often", when=NOW - 3 * HALF_LIFE + i)
+    index.record_use("recent", when=NOW)
+
+    # Four uses three half-lives ago weigh half a use today
+    assert [t for t, _ in index.complete("")] == ["recent", "often"]
+
+
+def test_walks_the_ranked_list_when_the_prefix_range_is_large():
+    triggers = [f"a{i:03d}" for i in range(200)]
+    index = make_index(triggers, max_ranked=10)
+    index.record_use("a150", when=NOW)
+    index.record_use("a020", when=NOW - 1)
+
+    assert [t for t, _ in index.complete("a", limit=4)] == ["a150", "a020", "a000", "a001"]
+
+
+def test_update_applies_only_the_difference():
+    index = make_index(["one", "two"])
+    index.update([("two", "TWO"), ("three", "THREE"), ("Three", "dup")])
+
+    assert index.keys == ["three", "two"]
+    assert index.complete("th") == [("three", "THREE")]
+
+
+def test_seed_restores_the_ranking():
+    index = make_index(["addr", "address", "admin"])
+    index.seed([("ADDRESS", 5, NOW), ("admin", 1, NOW), ("addr", 0, None)])
+
+    assert [t for t, _ in index.complete("ad")] == ["address", "admin", "addr"]
+    # Later uses build on the seeded score
+    index.record_use("admin", when=NOW + 1)
+    assert [t for t, _ in index.complete("ad")][:2] == ["address", "admin"]
+
+
+def test_seed_keeps_only_the_best_ranked():
+    index = make_index(["a", "b", "c"], max_ranked=2)
+    index.seed([("a", 1, NOW), ("b", 3, NOW), ("c", 2, NOW)])
+
+    assert [key for _, key in index.ranked] == ["b", "c"]
+    assert set(index._usage) == {"b", "c"}
@@ -0,0 +1,174 @@
+from snippet_matcher import (MODE_DELIMITER, MODE_IMMEDIATE, SnippetAutomaton, SnippetMatcher,
+                             TypingBuffer)
+from snippet_templates import CASE_CAPITALIZED, CASE_LOWER, CASE_MIXED, CASE_UPPER
+
+
+def make_matcher(*snippets):
+    """snippets: (trigger, mode) pairs; the replacement is the trigger in brackets."""
+    return SnippetMatcher(SnippetAutomaton((t, f"<{t}>", mode) for t, mode in snippets))
+
+
+def feed(matcher, text):
+    """Types text; returns (position, trigger) for every match. '\\b' is a backspace."""
+    matches = []
+    for i, char in enumerate(text):
+        if char == "\b":
+            matcher.backspace()
+            continue
+        match = matcher.feed(char)
+        if match is not None:
+            matches.append((i, match.trigger))
+    return matches
+
+
+def test_delimiter_trigger_needs_a_delimiter_and_a_word_boundary():
+    matcher = make_matcher(("btw", MODE_DELIMITER))
+
+    assert feed(matcher, "btw") == []
+    assert feed(matcher, " ") == [(0, "btw")]
+    assert feed(matcher, "xbtw btwx ") == []
+    assert feed(matcher, "ok,btw.") == [(6, "btw")]
+
+
+def test_start_of_input_counts_as_a_boundary_until_the_ring_drops_it():
+    matcher = make_matcher(("btw", MODE_DELIMITER))
+    assert feed(matcher, "btw ") == [(3, "btw")]
+
+    # Longer than the buffer: what came before "btw" is unknown
+    matcher.reset()
+    assert feed(matcher, "xxxxxxxxbtw ") == []
+
+
+def test_immediate_trigger_fires_on_its_last_character_even_mid_word():
+    matcher = make_matcher((";sig", MODE_IMMEDIATE))
+
+    assert feed(matcher, "abc;sig") == [(6, ";sig")]
+
+
+def test_longest_delimiter_trigger_at_a_boundary_wins():
+    matcher = make_matcher(("tw", MODE_DELIMITER), ("btw", MODE_DELIMITER),
+                           ("on my way", MODE_DELIMITER), ("way", MODE_DELIMITER))
+
+    assert feed(matcher, " btw ") == [(4, "btw")]
+    assert feed(matcher, " tw ") == [(3, "tw")]
+    assert feed(matcher, " on my way ") == [(10, "on my way")]
+    # "on my way" does not start at a boundary here, so the shorter one wins
+    assert feed(matcher, " gon my way ") == [(11, "way")]
+
+
+def test_immediate_trigger_fires_before_a_longer_delimiter_trigger():
+    matcher = make_matcher((";s", MODE_IMMEDIATE), (";sig", MODE_DELIMITER))
+
+    # The expander resets the matcher once it has expanded ";s"
+    assert feed(matcher, " ;s") == [(2, ";s")]
+
+
+def test_triggers_with_punctuation():
+    matcher = make_matcher(("e.g.", MODE_DELIMITER))
+
+    assert feed(matcher, " e.g. ") == [(5, "e.g.")]
+    assert feed(matcher, " e.g ") == []
+
+
+def test_first_of_two_equal_triggers_wins():
+    automaton = SnippetAutomaton([("BTW", "first", MODE_DELIMITER), ("btw", "second", MODE_DELIMITER)])
+    matcher = SnippetMatcher(automaton)
+
+    assert matcher.feed("b") is None
+    matcher.feed("t")
+    matcher.feed("w")
+    assert matcher.feed(" ").replacement == "first"
+    assert automaton.count == 1
+
+
+def test_matching_ignores_case_and_reports_the_typed_case():
+    matcher = make_matcher(("btw", MODE_DELIMITER), ("NASA", MODE_DELIMITER))
+
+    assert feed(matcher, "Btw ") == [(3, "btw")]
+    assert matcher.match_case == CASE_CAPITALIZED
+    assert feed(matcher, "BTW ") == [(3, "btw")]
+    assert matcher.match_case == CASE_UPPER
+    assert feed(matcher, "bTw ") == [(3, "btw")]
+    assert matcher.match_case is None
+    # Typed the way it is configured
+    assert feed(matcher, "NASA ") == [(4, "NASA")]
+    assert matcher.match_case is None
+
+
+def test_backspace_steps_the_automaton_back():
+    matcher = make_matcher(("btw", MODE_DELIMITER))
+
+    assert feed(matcher, "btx\bw ") == [(5, "btw")]
+    assert feed(matcher, "btw\b\b\btw ") == []
+    # Deleting the space brings the word before it back
+    matcher.reset()
+    assert feed(matcher, "btw \b ") == [(3, "btw"), (5, "btw")]
+
+
+def push_text(buffer, text):
+    for i, char in enumerate(text):
+        buffer.push(char, i)
+
+
+def test_typing_buffer_wraps_around_keeping_the_newest_characters():
+    buffer = TypingBuffer(4)
+    push_text(buffer, "abc")
+    assert (len(buffer), buffer.text(10), buffer.overwrote) == (3, "abc", False)
+
+    push_text(buffer, "defg")
+    assert (len(buffer), buffer.text(10), buffer.overwrote) == (4, "defg", True)
+    assert buffer.text(2) == "fg"
+    assert [buffer.char_back(i) for i in (1, 2, 3, 4)] == ["g", "f", "e", "d"]
+
+
+def test_typing_buffer_backspace_across_the_wrap_returns_the_states_before():
+    buffer = TypingBuffer(3)
+    push_text(buffer, "abcde") # states 0..4; "cde" is left
+    assert [buffer.pop() for _ in range(3)] == [4, 3, 2]
+    # Stepped back past what the ring remembers
+    assert buffer.pop() is None
+    assert (len(buffer), buffer.text(3)) == (0, "")
+
+    # Still dropped: a clear is what forgets it
+    assert buffer.overwrote
+    buffer.clear()
+    assert not buffer.overwrote
+
+    push_text(buffer, "xy")
+    assert buffer.text(3) == "xy"
+
+
+def test_typing_buffer_case_counts_survive_backspace_and_wraparound():
+    buffer = TypingBuffer(4)
+    push_text(buffer, "aBtw")
+    assert buffer.case(3) == CASE_CAPITALIZED # "Btw"
+    assert buffer.case(4, first_letter=0) == CASE_MIXED # "aBtw"
+
+    buffer.pop()
+    buffer.pop()
+    push_text(buffer, "TW") # "aBTW"
+    assert buffer.case(3) == CASE_UPPER
+    push_text(buffer, "xy") # wraps to "TWxy"
+    assert buffer.case(2) == CASE_LOWER
+    assert buffer.case(4) == CASE_MIXED
+    assert buffer.case(10) == CASE_MIXED # at most what is held
+
+
+def test_typing_buffer_has_no_case_without_letters():
+    buffer = TypingBuffer(4)
+    push_text(buffer, "a;1")
+    assert buffer.case(2) is None
+
+
+def test_current_word_after_backspacing_into_a_word_longer_than_the_ring():
+    matcher = make_matcher(("btw", MODE_DELIMITER))
+
+    feed(matcher, "bt")
+    assert matcher.current_word() == "bt"
+    feed(matcher, "abcdefgh \b")
+    # Its start was dropped, so it cannot be a trigger prefix
+    assert matcher.current_word() == ""
+
+    matcher.reset()
+    feed(matcher, "ab \b")
+    assert matcher.current_word() == "ab"
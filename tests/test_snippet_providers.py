@@ -0,0 +1,164 @@
+import types
+
+import pytest
+
+import snippet_providers
+from snippet_matcher import MODE_DELIMITER, SnippetAutomaton, SnippetMatcher
+from snippet_providers import FILE, PYTHON, SHELL, Provider, ProviderCache, make_provider
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(snippet_providers, "time", clock)
+    return clock
+
+
+class InlineExecutor:
+    """Runs submitted fetches at once, on the calling thread."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, action_type, func, *args, label=None):
+        self.submitted.append(label)
+        func(*args)
+        return True
+
+
+class CountingProvider(Provider):
+    """Returns 'value 1', 'value 2', ... instead of running anything."""
+
+    def __init__(self, kind, arg="x"):
+        super().__init__(kind, arg)
+        self.fetches = 0
+        self.fail = False
+
+    def fetch(self):
+        if self.fail:
+            raise OSError("gone")
+        self.fetches += 1
+        return f"value {self.fetches}"
+
+
+@pytest.fixture
+def cache(clock):
+    return ProviderCache(InlineExecutor())
+
+
+def test_only_file_providers_are_prefetched():
+    assert make_provider(FILE, "~/notes.txt").prefetch
+    assert not make_provider(SHELL, "git branch").prefetch
+    assert not make_provider(PYTHON, "mod.func").prefetch
+
+
+def test_value_is_cached_for_the_ttl(cache, clock):
+    provider = CountingProvider(FILE)
+
+    assert cache.get(provider) == "value 1"
+    clock.now += provider.ttl - 0.1
+    assert cache.get(provider) == "value 1"
+    clock.now += 0.1
+    assert cache.get(provider) == "value 2"
+    assert cache.stats()["cached"] == 1
+
+
+def test_ttl_depends_on_the_kind(cache, clock):
+    file, shell = CountingProvider(FILE), CountingProvider(SHELL)
+    cache.get(file)
+    cache.get(shell)
+
+    clock.now += 5
+    assert (cache.get(file), cache.get(shell)) == ("value 2", "value 1")
+
+
+def test_failed_fetch_keeps_the_last_value_until_the_ttl_passes(cache, clock):
+    provider = CountingProvider(FILE)
+    cache.get(provider)
+    provider.fail = True
+
+    clock.now += provider.ttl
+    assert cache.get(provider) == "value 1"
+    # Not retried straight away
+    provider.fail = False
+    assert cache.get(provider) == "value 1"
+    clock.now += provider.ttl
+    assert cache.get(provider) == "value 2"
+
+
+def test_first_fetch_failing_gives_empty_text(cache):
+    provider = CountingProvider(FILE)
+    provider.fail = True
+
+    assert cache.get(provider) == ""
+
+
+def test_prefetch_fetches_file_providers_only(cache, clock):
+    file, shell, python = CountingProvider(FILE), CountingProvider(SHELL), CountingProvider(PYTHON)
+
+    cache.prefetch((file, shell, python))
+
+    assert (file.fetches, shell.fetches, python.fetches) == (1, 0, 0)
+    assert cache.executor.submitted == [repr(file)]
+    # The expansion then finds the file cached and runs the others itself
+    assert cache.get(file) == "value 1"
+    assert cache.get(shell) == "value 1"
+    assert file.fetches == 1
+
+
+def test_prefetch_skips_fresh_values(cache, clock):
+    provider = CountingProvider(FILE)
+    cache.prefetch([provider])
+    cache.prefetch([provider])
+    assert provider.fetches == 1
+
+    clock.now += provider.ttl
+    cache.prefetch([provider])
+    assert provider.fetches == 2
+
+
+def test_full_executor_leaves_the_value_stale(clock):
+    executor = types.SimpleNamespace(submit=lambda *args, **kwargs: False)
+    cache = ProviderCache(executor)
+    provider = CountingProvider(FILE)
+
+    assert cache.get(provider, wait=0) == ""
+    assert provider.fetches == 0
+
+
+def test_clear_forgets_cached_values(cache):
+    provider = CountingProvider(FILE)
+    cache.get(provider)
+    cache.clear()
+
+    assert cache.get(provider) == "value 2"
+
+
+def test_file_provider_reads_the_file(tmp_path):
+    path = tmp_path / "signature.txt"
+    path.write_text("Regards\r\n", encoding="utf-8")
+
+    assert make_provider(FILE, f" {path} ").fetch() == "Regards"
+
+
+def test_matcher_only_reports_prefetchable_providers():
+    file, shell = CountingProvider(FILE, "sig.txt"), CountingProvider(SHELL, "git branch")
+    replacement = types.SimpleNamespace(providers=(shell, file))
+    reported = []
+    matcher = SnippetMatcher(SnippetAutomaton([("sig", replacement, MODE_DELIMITER),
+                                               ("branch", types.SimpleNamespace(providers=(shell,)), MODE_DELIMITER)]),
+                             on_prefix=reported.append)
+
+    for char in "si br":
+        matcher.feed(char)
+
+    # From the second character of "sig"; "br" only uses a shell provider
+    assert reported == [(file,)]
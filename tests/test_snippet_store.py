@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from config_manager import ConfigManager
+from snippet_store import SnippetStore
+
+
+@pytest.fixture
+def config(tmp_path):
+    manager = ConfigManager(str(tmp_path / "config.json"))
+    yield manager
+    manager.close()
+    manager.snippet_store.close()
+
+
+def write_config(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def triggers(manager):
+    return [s.trigger for s in manager.get_snippets()]
+
+
+def test_config_snippets_are_merged_into_the_store(config):
+    config.add_snippet("omw", "On my way")
+    config.add_snippet("brb", "be right back")
+
+    write_config(config.config_file, {"hotkeys": [], "snippets": [
+        {"trigger": "OMW", "replacement": "changed"},
+        {"trigger": "ty", "replacement": "thank you"},
+        {"trigger": "ty", "replacement": "duplicate"},
+    ]})
+    config.reload_config()
+
+    assert triggers(config) == ["omw", "brb", "ty"]
+    assert config.get_snippet_text(config.find_snippet("omw")) == "On my way"
+    assert config.get_snippet_text(config.find_snippet("ty")) == "thank you"
+    # Moved out of config.json, so the next reload adds nothing
+    with open(config.config_file) as f:
+        assert "snippets" not in json.load(f)
+    config.reload_config()
+    assert len(config.get_snippets()) == 3
+
+
+def test_backup_import_replaces_the_library(config, tmp_path):
+    config.add_snippet("omw", "On my way")
+    backup = tmp_path / "backup.json"
+    write_config(backup, {"hotkeys": [], "snippets": [{"trigger": "ty", "replacement": "thank you"}]})
+
+    ok, _ = config.import_from_file(str(backup))
+
+    assert ok
+    assert triggers(config) == ["ty"]
+
+
+def test_export_includes_bodies(config, tmp_path):
+    config.add_snippet("sig", "Best,\nBob", "immediate")
+    backup = tmp_path / "backup.json"
+
+    config.export_to_file(str(backup))
+
+    with open(backup) as f:
+        snippets = json.load(f)["snippets"]
+    assert [(s["trigger"], s["replacement"], s["mode"]) for s in snippets] == [("sig", "Best,\nBob", "immediate")]
+
+
+def test_store_reads_bodies_on_demand_through_a_bounded_cache(tmp_path):
+    store = SnippetStore(str(tmp_path / "snippets.db"), cache_size=2)
+    records = [store.add(f"t{i}", f"body {i}") for i in range(4)]
+
+    assert [store.body(r.id) for r in records] == ["body 0", "body 1", "body 2", "body 3"]
+    assert len(store._bodies) == 2
+    store.update(records[0].id, body="new {shell:echo hi}")
+    assert store.body(records[0].id) == "new {shell:echo hi}"
+    assert [p.kind for p in store.get(records[0].id).providers] == ["shell"]
+    store.close()
+
+
+def test_store_search_and_previews(tmp_path):
+    store = SnippetStore(str(tmp_path / "snippets.db"))
+    a = store.add("addr", "123 Main Street, 100% sure")
+    b = store.add("sig", "Best regards")
+
+    assert store.search("main") == {a.id}
+    assert store.search("100%") == {a.id}
+    assert store.search("%") == {a.id}
+    assert store.search("sig") == {b.id}
+    assert store.previews(4) == {a.id: "123 ", b.id: "Best"}
+    store.remove(a.id)
+    assert store.search("main") == set()
+    # Appended after the remaining ones, whatever was removed
+    store.add("x", "y")
+    assert [r.trigger for r in store.records()] == ["sig", "x"]
+    assert [r.trigger for r in SnippetStore(store.path).records()] == ["sig", "x"]
+    store.close()
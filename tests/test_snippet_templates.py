@@ -0,0 +1,131 @@
+import types
+
+import pytest
+
+import snippet_templates
+from snippet_providers import FILE, SHELL, Provider
+from snippet_templates import CASE_CAPITALIZED, CASE_UPPER, compile_template
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """strftime returns its format in angle brackets, so dates are predictable."""
+    monkeypatch.setattr(snippet_templates, "time", types.SimpleNamespace(strftime=lambda fmt: f"<{fmt}>"))
+
+
+def render(text, clipboard=None, case=None):
+    return compile_template(text).render(lambda: clipboard, None, case)
+
+
+def test_plain_text_is_static_and_expands_as_is():
+    template = compile_template("by the way")
+
+    assert template.before == ("by the way",)
+    assert (template.after, template.has_cursor, template.dynamic, template.providers) == ((), False, False, ())
+    assert template.render() == ("by the way", 0)
+
+
+def test_empty_replacement():
+    assert compile_template("").render() == ("", 0)
+
+
+def test_date_and_time_placeholders(clock):
+    template = compile_template("On {date} at {TIME}, {date:%d/%m/%Y}")
+
+    assert template.dynamic
+    assert template.render() == ("On <%Y-%m-%d> at <%H:%M>, <%d/%m/%Y>", 0)
+
+
+def test_clipboard_is_only_read_when_used():
+    reads = []
+
+    def clipboard():
+        reads.append(1)
+        return "copied"
+
+    assert compile_template("Re: {clipboard}!").render(clipboard) == ("Re: copied!", 0)
+    assert compile_template("no clipboard").render(clipboard) == ("no clipboard", 0)
+    assert len(reads) == 1
+    # Nothing on the clipboard, or no getter
+    assert render("[{clipboard}]") == ("[]", 0)
+    assert compile_template("[{clipboard}]").render() == ("[]", 0)
+
+
+def test_doubled_braces_are_literal():
+    assert render("{{date}} is {{literal}}") == ("{date} is {literal}", 0)
+    assert render("}}{{") == ("}{", 0)
+
+
+def test_cursor_offset_counts_the_text_after_it(clock):
+    assert compile_template("<b>{cursor}</b>").render() == ("<b></b>", 4)
+    assert compile_template("{cursor}").render() == ("", 0)
+    assert compile_template("Dear {cursor},").has_cursor
+    # Dynamic parts after the cursor count at their rendered length
+    assert compile_template("({cursor}) {date}").render() == ("() <%Y-%m-%d>", 12)
+
+
+def test_providers_are_collected_for_prefetching(tmp_path):
+    path = tmp_path / "signature.txt"
+    path.write_text("Regards\n", encoding="utf-8")
+    template = compile_template(f"{{shell:git branch}} {{cursor}}{{file:{path}}}")
+
+    assert template.providers == (Provider(SHELL, "git branch"), Provider(FILE, str(path)))
+    # No cache: the file provider runs directly, trailing newline dropped
+    assert compile_template(f"--\n{{file:{path}}}").render() == ("--\nRegards", 0)
+
+
+def test_provider_reads_go_through_the_cache():
+    class Cache:
+        def get(self, provider):
+            return f"cached {provider.kind}"
+
+    assert compile_template("{shell:whoami}").render(None, Cache()) == ("cached shell", 0)
+
+
+def test_failing_provider_renders_empty_without_a_cache(tmp_path):
+    template = compile_template(f"[{{file:{tmp_path / 'missing.txt'}}}]")
+
+    assert template.render() == ("[]", 0)
+
+
+@pytest.mark.parametrize("text, case, expected", [
+    ("by the way", CASE_CAPITALIZED, ("By the way", 0)),
+    ("by the way", CASE_UPPER, ("BY THE WAY", 0)),
+    ("(hello)", CASE_CAPITALIZED, ("(Hello)", 0)),
+    ("123 main st", CASE_CAPITALIZED, ("123 main st", 0)), # a digit comes first: unchanged
+    ("{cursor}hello", CASE_CAPITALIZED, ("Hello", 5)), # nothing before the cursor to capitalise
+    ("x{cursor}y", CASE_UPPER, ("XY", 1)),
+    ("by the way", None, ("by the way", 0)),
+])
+def test_case_variants(text, case, expected):
+    assert render(text, case=case) == expected
+
+
+def test_static_case_variants_are_cached():
+    template = compile_template("by the way")
+
+    first = template.render(case=CASE_UPPER)
+    assert template.render(case=CASE_UPPER) is first
+
+
+def test_dynamic_case_variants_are_rendered_each_time():
+    template = compile_template("re: {clipboard}")
+
+    assert template.render(lambda: "one", case=CASE_UPPER) == ("RE: ONE", 0)
+    assert template.render(lambda: "two", case=CASE_CAPITALIZED) == ("Re: two", 0)
+
+
+@pytest.mark.parametrize("text, message", [
+    ("{nope}", "Unknown placeholder {nope} at position 1"),
+    ("ab}", "Unmatched '}' at position 3; write '}}' for a literal brace"),
+    ("a{date", "Unclosed '{' at position 2; write '{{' for a literal brace"),
+    ("{cursor}x{cursor}", "{cursor} can only appear once (position 10)"),
+    ("{clipboard:upper}", "{clipboard} takes no format (position 1)"),
+    ("{date:%Y\0}", "Invalid date format '%Y\0' at position 1"),
+    ("x {shell: }", "{shell:...} needs an argument (position 3)"),
+    ("{python:greeting}", "{python:greeting} must name a function as module.function (position 1)"),
+])
+def test_malformed_templates_raise_value_error(text, message):
+    with pytest.raises(ValueError) as error:
+        compile_template(text)
+    assert str(error.value) == message
@@ -0,0 +1,124 @@
+import pytest
+
+from clipboard_guard import FakeClipboard
+from config_manager import ConfigManager
+from text_expander import TextExpander
+
+
+@pytest.fixture
+def config(tmp_path):
+    manager = ConfigManager(str(tmp_path / "config.json"))
+    yield manager
+    manager.close()
+    manager.snippet_store.close()
+
+
+def test_reload_ranks_suggestions_from_persisted_usage(config, tmp_path):
+    for trigger in ("addr", "address", "admin"):
+        config.add_snippet(trigger, trigger.upper())
+    config.record_snippet_use("admin")
+    config.record_snippet_use("address")
+    config.record_snippet_use("address")
+    config.close()
+
+    # A fresh start reads usage_stats.json back
+    restarted = ConfigManager(config.config_file)
+    expander = TextExpander(restarted, FakeClipboard())
+    expander.reload_snippets()
+
+    assert [t for t, _ in expander.index.complete("ad")] == ["address", "admin", "addr"]
+    restarted.close()
+    restarted.snippet_store.close()
+
+
+def test_recorded_uses_feed_the_ranking(config):
+    for trigger in ("addr", "address"):
+        config.add_snippet(trigger, trigger.upper())
+    expander = TextExpander(config, FakeClipboard())
+    expander.reload_snippets()
+
+    config.record_snippet_use("Address", saved=5)
+
+    assert [t for t, _ in expander.index.complete("ad")] == ["address", "addr"]
+    assert config.get_snippet_usage()["address"].count == 1
+
+
+class Key:
+    def __init__(self, name, event_type="down"):
+        self.name = name
+        self.event_type = event_type
+
+
+@pytest.fixture
+def injected(monkeypatch):
+    import input_injection
+    import text_expander
+    sent = []
+    monkeypatch.setattr(input_injection, "backend", sent.append)
+    monkeypatch.setattr(input_injection, "_pending", {})
+    monkeypatch.setattr(text_expander, "EDIT_ACK_TIMEOUT", 0.01)
+    return sent
+
+
+def typed_text(inputs):
+    return "".join(value if key is None else f"<{key}>" for key, value in inputs if key is None or value is True)
+
+
+def wait_for(condition, timeout=2.0):
+    import time
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_accepted_suggestion_replaces_the_word_on_the_edit_worker(config, injected, monkeypatch):
+    import input_injection
+    config.add_snippet("address", "main street")
+    clipboard = FakeClipboard()
+    pasted = []
+    monkeypatch.setattr(input_injection, "backend", lambda inputs: pasted.append((inputs, clipboard.get_text())))
+    expander = TextExpander(config, clipboard)
+    expander.reload_snippets()
+    expander.is_running = True
+    for name in "Addr":
+        expander._on_key_event(Key(name))
+
+    expander.accept_suggestion("address")
+
+    assert wait_for(lambda: expander.edits.stats()["completed"] == 1)
+    inputs, text = pasted[0]
+    # Four backspaces for "Addr", then the paste, capitalised like the prefix
+    assert typed_text(inputs) == "<backspace>" * 4 + "<ctrl><v>"
+    assert text == "Main street"
+    assert expander.matcher.current_word() == ""
+    assert expander._undo_armed
+
+
+def test_edit_is_acknowledged_by_the_expander_hook_alone(config, injected, monkeypatch):
+    import input_injection
+    import text_expander
+    config.add_snippet("btw", "by the way")
+    expander = TextExpander(config, FakeClipboard())
+    expander.reload_snippets()
+    expander.is_running = True
+    # No dispatcher hook: the injected downs and ups only come back through the expander's
+    monkeypatch.setattr(text_expander, "EDIT_ACK_TIMEOUT", 5.0)
+    monkeypatch.setattr(input_injection, "backend", lambda inputs: [
+        expander._on_key_event(Key(key, "down" if value else "up")) for key, value in inputs if key is not None])
+    acknowledged = []
+    monkeypatch.setattr(input_injection.Batch, "wait",
+                        lambda batch, timeout: acknowledged.append(batch.done.is_set()) or True)
+
+    for name in ["b", "t", "w", "space"]:
+        expander._on_key_event(Key(name))
+        expander._on_key_event(Key(name, "up"))
+
+    assert wait_for(lambda: expander.edits.stats()["completed"] == 1)
+    assert acknowledged == [True]
+    assert input_injection._pending == {}
+    # The user's next keys are not taken for ours
+    for name in "ok":
+        expander._on_key_event(Key(name))
+        expander._on_key_event(Key(name, "up"))
+    assert expander.matcher.current_word() == "ok"
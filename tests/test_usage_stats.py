@@ -0,0 +1,78 @@
+import json
+import os
+import time
+
+import pytest
+
+from usage_stats import UsageStats, KIND_SNIPPET, KIND_HOTKEY, format_last_used
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "usage_stats.json")
+
+
+def test_record_stays_in_memory_until_flushed(path):
+    stats = UsageStats(path, flush_interval=60)
+    stats.record(KIND_SNIPPET, "OMW", saved=6, when=100.0)
+    stats.record(KIND_SNIPPET, "omw", saved=-3, when=200.0)
+    stats.record(KIND_HOTKEY, "ctrl+alt+t", when=150.0)
+
+    assert not os.path.exists(path)
+    counter = stats.get(KIND_SNIPPET, "Omw")
+    assert (counter.count, counter.saved, counter.last_used) == (2, 6, 200.0)
+
+    stats.close()
+    with open(path) as f:
+        data = json.load(f)
+    assert data[KIND_SNIPPET]["omw"] == {"count": 2, "saved": 6, "last_used": 200.0}
+    assert data[KIND_HOTKEY]["ctrl+alt+t"]["count"] == 1
+
+
+def test_background_flush_writes_in_batches(path):
+    stats = UsageStats(path, flush_interval=0.05)
+    for _ in range(10):
+        stats.record(KIND_HOTKEY, "f1")
+    deadline = time.time() + 2
+    while not os.path.exists(path) and time.time() < deadline:
+        time.sleep(0.01)
+    stats.close()
+
+    with open(path) as f:
+        assert json.load(f)[KIND_HOTKEY]["f1"]["count"] == 10
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_counts_survive_a_restart(path):
+    stats = UsageStats(path, flush_interval=60)
+    stats.record(KIND_SNIPPET, "sig", saved=10, when=5.0)
+    stats.close()
+
+    reloaded = UsageStats(path, flush_interval=60)
+    snapshot = reloaded.snapshot(KIND_SNIPPET)
+    reloaded.close()
+    assert (snapshot["sig"].count, snapshot["sig"].saved, snapshot["sig"].last_used) == (1, 10, 5.0)
+
+
+def test_listeners_hear_every_use(path):
+    stats = UsageStats(path, flush_interval=60)
+    heard = []
+    stats.add_listener(lambda kind, key, when: heard.append((kind, key, when)))
+    stats.record(KIND_SNIPPET, "BRB", when=7.0)
+    stats.close()
+
+    assert heard == [(KIND_SNIPPET, "brb", 7.0)]
+
+
+def test_unreadable_file_starts_empty(path):
+    with open(path, "w") as f:
+        f.write("{not json")
+    stats = UsageStats(path, flush_interval=60)
+    assert stats.snapshot(KIND_SNIPPET) == {}
+    stats.close()
+
+
+def test_format_last_used():
+    assert format_last_used(None) == "-"
+    assert format_last_used(0) == "-"
+    assert format_last_used(time.mktime((2024, 5, 31, 14, 5, 0, 0, 0, -1))) == "2024-05-31 14:05"
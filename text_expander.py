@@ -1,21 +1,66 @@
 import keyboard
 import time
 import threading
-from utils import set_clipboard
+from collections import OrderedDict
+import input_injection
+from clipboard_guard import ClipboardGuard
+from snippet_matcher import SnippetAutomaton, SnippetMatcher, MODE_IMMEDIATE, text_case, propagated_case
+from snippet_templates import compile_template
+from snippet_providers import ProviderCache
+from snippet_index import SnippetIndex
+from edit_queue import EditQueue, Edit
+from usage_stats import KIND_SNIPPET
+
+# Key names that type a delimiter, and the character each one types
+DELIMITER_KEYS = {"space": " ", "enter": "\n", "tab": "\t",
+                  ".": ".", ",": ",", "!": "!", "?": "?", ";": ";", ":": ":"}
+
+# Seconds to wait for an injected edit to come back through the hook
+EDIT_ACK_TIMEOUT = 1.0
+
+# Compiled templates kept in memory; bodies are loaded from the snippet store on demand
+TEMPLATE_CACHE_SIZE = 64
 
 class TextExpander:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, clipboard=None):
         self.config_manager = config_manager
-        self.current_word = ""
+        # Saves the user's clipboard around paste expansions and restores it
+        self.clipboard_guard = ClipboardGuard(clipboard)
+        # Values of {shell:...}, {file:...} and {python:...} placeholders
+        self.providers = ProviderCache()
         self.is_running = False
-        self.snippets = {} # trigger -> replacement
+        # Advanced one character per keystroke against every active trigger
+        self.matcher = SnippetMatcher()
+        # Guards the matcher, _undo_armed and _suggested: the hook thread holds
+        # it per keystroke; an accepted suggestion takes it on the edit worker
+        self._state_lock = threading.Lock()
+        # Every expansion and undo is injected in order by this queue's one
+        # worker thread, which alone reads and writes last_expansion
+        self.edits = EditQueue(self._apply_edit)
         self.last_expansion = None
+        # An expansion was queued and nothing typed since, so the next
+        # backspace undoes it (under _state_lock)
+        self._undo_armed = False
+        # Autocomplete: trigger prefix index, and on_suggest(prefix) to show the
+        # popup for a prefix ("" hides it). Set by the UI; called on the hook thread
+        self.index = SnippetIndex()
+        # Ranked from the persisted usage counts: seeded at reload, then fed
+        # every use the config manager records
+        config_manager.add_usage_listener(self._on_usage)
+        self.snippets = {} # lower-cased trigger -> SnippetRecord
+        self._templates = OrderedDict() # snippet id -> CompiledTemplate, least recently used first
+        self._templates_lock = threading.Lock()
+        self.on_suggest = None
+        self.autocomplete_min_chars = 0
+        self._suggested = ""
 
     def start_listener(self):
         if self.is_running:
             return
         self.reload_snippets()
-        keyboard.on_press(self._on_key_press)
+        # Key-ups too: an injected edit is only acknowledged once its up
+        # events have come back, and the dispatcher's hook may not be running
+        keyboard.hook(self._on_key_event)
         self.is_running = True
         print("Text Expander Listener Started")
 
@@ -29,140 +74,239 @@ class TextExpander:
         # to stop/start everything together.
         # For now, we'll assume stop_listener is called when the whole system stops.
         
-        # To remove ONLY our hook, we'd need to store the return value of on_press.
+        # To remove ONLY our hook, we'd need to store the return value of hook.
         # But `keyboard` doesn't make unhooking specific callbacks super easy without unhook_all usually.
         # Let's rely on the global unhook_all strategy used in main.py for now.
-        pass
+
+        # Don't leave a snippet on the clipboard in place of the user's contents
+        self.clipboard_guard.restore_now()
 
     def reload_snippets(self):
-        raw_snippets = self.config_manager.get_snippets()
-        # Store lowercased triggers for case-insensitive matching
-        self.snippets = {s["trigger"].lower(): s["replacement"] for s in raw_snippets if s.get("active", True)}
+        # Only the in-memory index (triggers, modes, providers) is read here;
+        # replacement bodies stay in the snippet store until expanded
+        records = [s for s in self.config_manager.get_snippets() if s.active]
+        # Triggers are matched case-insensitively
+        automaton = SnippetAutomaton((s.trigger, s, s.mode) for s in records)
+        # Swapped in whole, so the listener thread never sees a half-built matcher
+        matcher = SnippetMatcher(automaton, on_prefix=self.providers.prefetch)
+        with self._state_lock:
+            self.matcher = matcher
+
+        self.snippets = {s.trigger.lower(): s for s in reversed(records)}
+        self.index.update((s.trigger, s) for s in records)
+        # Suggestions keep their usage ranking across restarts
+        self.index.seed((key, c.count, c.last_used) for key, c in self.config_manager.get_snippet_usage().items())
+        with self._templates_lock:
+            self._templates.clear() # bodies may have changed
+        self.autocomplete_min_chars = self.config_manager.get_autocomplete_min_chars()
+        with self._state_lock:
+            self._show_suggestions("")
 
-    def _on_key_press(self, event):
+    def _on_key_event(self, event):
         if not self.is_running:
             return
 
+        # Our own backspaces/paste coming back through the hook, downs and ups
+        if input_injection.is_injected(event):
+            return
+        if event.event_type != keyboard.KEY_DOWN:
+            return
+
         name = event.name
         
         # Ignore modifiers being pressed alone
         if name in ("ctrl", "alt", "shift", "windows", "caps lock", "shift", "right shift"):
             return
 
+        with self._state_lock:
+            self._handle_key(name)
+
+    def _handle_key(self, name):
+        # Caller holds _state_lock
         if name == "backspace":
             # Check for undo first
-            if self.last_expansion:
+            if self._undo_armed:
+                self._undo_armed = False
                 # The FIRST backspace press after expansion triggers the undo.
-                # However, this backspace event is NOT suppressed by on_press.
+                # However, this backspace event is NOT suppressed by our hook.
                 # So the system will delete the last char of the replacement.
                 # We need to take that into account.
-                
-                # Wait a tiny bit to let the system process the physical backspace
-                # (which removes 1 char)
-                # But since we are in the callback, we are parallel.
-                # It's safer to let it happen, then fix up.
+
+                # The undo is queued behind the expansion it undoes, so it
+                # never runs before (or alongside) that expansion's edit
                 self._perform_undo()
                 return 
 
-            # Remove last char from buffer
-            if len(self.current_word) > 0:
-                self.current_word = self.current_word[:-1]
-                # print(f"DEBUG: Backspace. Buffer: '{self.current_word}'", flush=True)
+            # Step the matcher back one character
+            self.matcher.backspace()
+            self._suggest()
         
         else:
             # Any other key clears the undo window
             # EXCEPT maybe navigation keys? But safer to clear.
-            if self.last_expansion:
-                 self.last_expansion = None
-
-            # Delimiters: Space, Enter, Tab, and Punctuation
-            if name in ("space", "enter", "tab", ".", ",", "!", "?", ";", ":"):
-                # Check for match (case-insensitive)
-                # print(f"DEBUG: Delimiter '{name}'. Checking match for '{self.current_word}'", flush=True)
-                candidate = self.current_word.lower()
-                if candidate in self.snippets:
-                    # print(f"DEBUG: Match found! Swapping '{self.current_word}' -> '{self.snippets[candidate]}'", flush=True)
-                    delimiter_char = name
-                    if name == "space": delimiter_char = " "
-                    elif name == "enter": delimiter_char = "\n"
-                    elif name == "tab": delimiter_char = "\t"
-                    
-                    self._perform_swap(self.current_word, self.snippets[candidate], delimiter_char)
-                    self.current_word = "" # Reset after swap
-                else:
-                    self.current_word = "" # Reset on delimiter if no match
-            elif len(name) == 1:
-                # Regular character
-                self.current_word += name
-                # print(f"DEBUG: Appended '{name}'. Buffer: '{self.current_word}'", flush=True)
-            else:
+            self._undo_armed = False
+
+            # Delimiters (Space, Enter, Tab, Punctuation) and regular characters
+            # both advance the matcher: triggers may contain spaces and punctuation
+            char = DELIMITER_KEYS.get(name)
+            if char is None and len(name) == 1:
+                char = name
+            if char is None:
                 # Other navigation keys resets buffer
-                # print(f"DEBUG: Resetting buffer due to key '{name}'", flush=True)
-                self.current_word = ""
-
-
-    def _perform_swap(self, trigger, replacement, delimiter):
-        def worker():
-            # Calculate backspaces needed: len(trigger) + 1 (for the delimiter)
-            backspaces = len(trigger) + 1
-            
-            # Use simple backspace chars instead of individual send commands for speed/reliability
-            print(f"DEBUG: Swapping. Sending {backspaces} backspaces, then '{replacement}'", flush=True)
-            
-            # Sending backspaces to remove the trigger and the delimiter
-            # Note: We need to ensure the system has processed the 'space' before we backspace it
-            time.sleep(0.05) 
-            
-            keyboard.write('\b' * backspaces)
-            time.sleep(0.05) # Small buffer between delete and write
-            
-            # Use Clipboard Paste for reliability
-            if set_clipboard(replacement):
-                keyboard.send('ctrl+v')
-            else:
-                # Fallback to write if clipboard fails
-                keyboard.write(replacement, delay=0.01)
-                
-            # Record this expansion for potential undo
-            self.last_expansion = {
-                'trigger': trigger,
-                'replacement': replacement,
-                'delimiter': delimiter,
-                'time': time.time()
-            }
-        threading.Thread(target=worker, daemon=True).start()
+                self.matcher.reset()
+                self._suggest()
+                return
+
+            match = self.matcher.feed(char)
+            if match is not None:
+                if match.mode == MODE_IMMEDIATE:
+                    typed, delimiter = self.matcher.typed(match.length), ""
+                else:
+                    # The delimiter that completed the match is typed too
+                    typed, delimiter = self.matcher.typed(match.length + 1)[:-1], char
+                # "Addr" and "ADDR" expand capitalised and in capitals
+                self._perform_swap(typed, match.replacement, delimiter, self.matcher.match_case)
+                self.matcher.reset() # Reset after swap
+            self._suggest()
+
+    def _suggest(self):
+        # Cheap unless the word being typed is long enough to look up
+        if not self.autocomplete_min_chars:
+            return
+        if self.matcher.word_length >= self.autocomplete_min_chars:
+            self._show_suggestions(self.matcher.current_word())
+        else:
+            self._show_suggestions("")
+
+    def _show_suggestions(self, prefix):
+        if prefix != self._suggested:
+            self._suggested = prefix
+            if self.on_suggest is not None:
+                self.on_suggest(prefix)
+
+    def accept_suggestion(self, trigger):
+        """
+        Expands a snippet picked from the autocomplete popup in place of the
+        word being typed. Called on the UI thread; the word is read when the
+        edit queue gets to it, so after any edit queued before.
+        """
+        snippet = self.snippets.get(trigger.lower())
+        if snippet is None:
+            return
+
+        def prepare():
+            with self._state_lock:
+                typed = self.matcher.current_word()
+                self.matcher.reset()
+                self._show_suggestions("")
+                self._undo_armed = True
+            # The typed prefix sets the case, as for a typed trigger
+            case = propagated_case(text_case(typed), text_case(snippet.trigger[:len(typed)])) if typed else None
+            return self._swap_edit(typed, snippet, "", case)
+
+        self.edits.submit(prepare)
+
+    def _on_usage(self, kind, key, when):
+        if kind == KIND_SNIPPET:
+            self.index.record_use(key, when)
+
+    def _template(self, snippet):
+        # Templates are parsed once per load of their body; an expansion only renders them
+        with self._templates_lock:
+            template = self._templates.get(snippet.id)
+            if template is not None:
+                self._templates.move_to_end(snippet.id)
+                return template
+        text = self.config_manager.get_snippet_text(snippet)
+        if text is None:
+            return None
+        template = compile_template(text)
+        with self._templates_lock:
+            self._templates[snippet.id] = template
+            if len(self._templates) > TEMPLATE_CACHE_SIZE:
+                self._templates.popitem(last=False)
+        return template
+
+
+    def _perform_swap(self, trigger, snippet, delimiter, case=None):
+        # Hook thread, holding _state_lock
+        self._undo_armed = True
+        self.edits.submit(lambda: self._swap_edit(trigger, snippet, delimiter, case))
+
+    def _swap_edit(self, trigger, snippet, delimiter, case):
+        # Runs on the edit queue's worker, after every edit queued before it
+        self.last_expansion = None
+        try:
+            template = self._template(snippet)
+        except ValueError as e:
+            print(f"ERROR: Snippet '{snippet.trigger}' not expanded: {e}")
+            return None
+        if template is None:
+            return None
+        # Only the dynamic placeholders ({date}, {clipboard}, ...) run here;
+        # static replacements come from the template's cached case variants
+        replacement, cursor_back = template.render(self.clipboard_guard.user_text, self.providers, case)
+
+        # The trigger and its delimiter (none for immediate snippets) are
+        # deleted and the replacement pasted in one batched edit. The typed
+        # keys were delivered before this runs, and the batch is queued
+        # behind them, so no settling sleep is needed first
+        backspaces = len(trigger) + len(delimiter)
+        print(f"DEBUG: Swapping. Sending {backspaces} backspaces, then '{replacement}'", flush=True)
+        # Keystrokes saved: what was inserted minus the keys typed for it
+        self.config_manager.record_snippet_use(snippet.trigger, len(replacement) - backspaces)
+
+        # If the caret ends up inside the replacement ({cursor}), backspace
+        # there must not be taken as an undo
+        expansion = None if cursor_back else {
+            'trigger': trigger,
+            'replacement': replacement,
+            'delimiter': delimiter,
+            'time': time.time()
+        }
+        # Use Clipboard Paste for reliability
+        return Edit(backspaces, replacement, cursor_back, paste=True, expansion=expansion)
 
     def _perform_undo(self):
-        def worker():
+        def prepare():
             print("DEBUG: Undoing expansion...")
-            try:
-                data = self.last_expansion
-                self.last_expansion = None # prevent recursion or double undo
-                
-                # We assume the user just pressed Backspace, removing 1 char of replacement.
-                # So we need to remove len(replacement) - 1 chars.
-                remaining_len = len(data['replacement']) - 1
-                
-                print(f"DEBUG: Undo - Deleting {remaining_len} chars")
-                
-                # Use a loop for reliability
-                if remaining_len > 0:
-                    for _ in range(remaining_len):
-                        keyboard.send('backspace')
-                        time.sleep(0.01) # 10ms delay per char to prevent buffer overflow/skips
-                
-                # Restore Trigger + Delimiter
-                # Wait a tiny bit for deletions to register
-                time.sleep(0.05)
-                
-                # Write back the original trigger and delimiter
-                to_restore = data['trigger'] + data['delimiter']
-                keyboard.write(to_restore)
-                print(f"DEBUG: Undo - Restored '{to_restore}'")
-                
-            except Exception as e:
-                print(f"ERROR in _perform_undo: {e}")
-                import traceback
-                traceback.print_exc()
-        threading.Thread(target=worker, daemon=True).start()
+            data = self.last_expansion
+            self.last_expansion = None # prevent double undo
+            if data is None:
+                # Nothing undoable was expanded ({cursor} snippet, or it failed)
+                return None
+
+            # We assume the user just pressed Backspace, removing 1 char of replacement.
+            # So we need to remove len(replacement) - 1 chars.
+            remaining_len = max(0, len(data['replacement']) - 1)
+
+            # Delete the rest of the replacement and write back the original
+            # trigger and delimiter, all in one batched edit
+            to_restore = data['trigger'] + data['delimiter']
+            print(f"DEBUG: Undo - Deleting {remaining_len} chars, restoring '{to_restore}'")
+            return Edit(remaining_len, to_restore)
+
+        # Must see the expansion it undoes injected first
+        self.edits.submit(prepare, barrier=True)
+
+    def _apply_edit(self, edit):
+        # Called on the edit queue's worker only
+        pasted = edit.paste and self.clipboard_guard.set_text(edit.text)
+        if pasted:
+            batch = input_injection.replace(edit.deletions, paste=True, cursor_back=edit.cursor_back)
+        else:
+            # Typed out: undo, or the clipboard failed
+            batch = input_injection.replace(edit.deletions, edit.text, cursor_back=edit.cursor_back)
+
+        # Acknowledged once the hook has seen the whole edit come back
+        if not batch.wait(EDIT_ACK_TIMEOUT):
+            print("WARNING: Expansion was not acknowledged in time")
+        if pasted:
+            # The user's own clipboard comes back shortly after the paste
+            self.clipboard_guard.pasted()
+
+        # Record this expansion for potential undo
+        self.last_expansion = edit.expansion
 
+    def get_edit_stats(self):
+        return self.edits.stats()
@@ -1,9 +1,11 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QLineEdit,
                              QComboBox, QCheckBox, QPushButton, QHBoxLayout,
-                             QFileDialog, QDialogButtonBox, QMessageBox, QFrame)
+                             QFileDialog, QDialogButtonBox, QMessageBox, QFrame,
+                             QSpinBox)
 from PyQt6.QtCore import Qt
 from ui.key_recorder import KeyRecorder
 from ui.blur_effect import apply_acrylic_blur, GRADIENT_DEEP_BLUE
+from macro_actions import compile_macro
 
 class AddHotkeyDialog(QDialog):
     def __init__(self, parent=None, hotkey_data=None):
@@ -48,10 +50,15 @@ class AddHotkeyDialog(QDialog):
         self.trigger_input = KeyRecorder()
         layout.addWidget(self.trigger_input)
 
+        self.sequence_cb = QCheckBox("Multi-step sequence (e.g., ctrl+k, ctrl+c)")
+        self.sequence_cb.setToolTip("Record several key combinations pressed one after another. Click the field to start over.")
+        self.sequence_cb.toggled.connect(self.trigger_input.set_sequence_mode)
+        layout.addWidget(self.sequence_cb)
+
         # 2. Action Type (Create first, setup later)
         layout.addWidget(QLabel("Action Type:"))
         self.type_combo = QComboBox()
-        self.type_combo.addItems(["File", "Folder", "focus", "open_url", "Ai Voice Mode"])
+        self.type_combo.addItems(["File", "Folder", "focus", "open_url", "Ai Voice Mode", "macro"])
         layout.addWidget(self.type_combo)
 
         # 3. Target (Create first)
@@ -72,6 +79,14 @@ class AddHotkeyDialog(QDialog):
         self.name_input.setPlaceholderText("Custom display name for the hotkey")
         layout.addWidget(self.name_input)
 
+        # 3.6. App Scope (Optional)
+        layout.addWidget(QLabel("Only in apps (Optional):"))
+        self.apps_input = QLineEdit()
+        self.apps_input.setPlaceholderText("e.g. code.exe, class:Notepad")
+        self.apps_input.setToolTip("Comma-separated executables or window classes (prefix 'class:'). "
+                                   "The hotkey only works while one of them is in the foreground.")
+        layout.addWidget(self.apps_input)
+
         # Note Label (Dynamic)
         self.note_label = QLabel("")
         self.note_label.setStyleSheet("color: gray; font-style: italic;")
@@ -84,15 +99,43 @@ class AddHotkeyDialog(QDialog):
         self.block_cb.setToolTip("If checked, the key combination will NOT be passed to other applications.")
         layout.addWidget(self.block_cb)
 
-        # 5. Long Press Trigger
-        self.long_press_cb = QCheckBox("Long Press Trigger")
-        self.long_press_cb.setToolTip("Trigger action only if key is held down for the configured delay.")
-        self.long_press_cb = QCheckBox("Long Press Trigger")
-        self.long_press_cb.setToolTip("Trigger action only if key is held down for the configured delay.")
-        # self.long_press_cb.toggled.connect(self.on_long_press_toggled) # Removed enforcement
-        layout.addWidget(self.long_press_cb)
+        # 5. Trigger Type (press / long press / tap / double-tap)
+        layout.addWidget(QLabel("Trigger Type:"))
+        self.gesture_combo = QComboBox()
+        self.gesture_combo.addItem("Press", "press")
+        self.gesture_combo.addItem("Long press (hold)", "hold")
+        self.gesture_combo.addItem("Tap alone", "tap")
+        self.gesture_combo.addItem("Double-tap", "double_tap")
+        self.gesture_combo.setToolTip(
+            "Long press: key held down for the configured delay.\n"
+            "Tap alone: key pressed and released on its own, e.g. tap Ctrl.\n"
+            "Double-tap: key tapped twice in quick succession, e.g. double-tap Shift.")
+        self.gesture_combo.currentIndexChanged.connect(self.on_gesture_changed)
+        layout.addWidget(self.gesture_combo)
+
+        # 6. Key Repeat
+        layout.addWidget(QLabel("When the key is held down (auto-repeat):"))
+        repeat_layout = QHBoxLayout()
+        self.repeat_combo = QComboBox()
+        self.repeat_combo.addItem("Fire once per press", "once")
+        self.repeat_combo.addItem("Debounce", "debounce")
+        self.repeat_combo.addItem("Capped repeat rate", "rate")
+        self.repeat_combo.addItem("Repeat every time", "always")
+        self.repeat_combo.currentIndexChanged.connect(self.on_repeat_changed)
+        repeat_layout.addWidget(self.repeat_combo)
 
-        # 6. Buttons
+        self.repeat_spin = QSpinBox()
+        self.repeat_spin.setRange(10, 5000)
+        self.repeat_spin.setSingleStep(10)
+        self.repeat_spin.setValue(250)
+        self.repeat_spin.setSuffix(" ms")
+        self.repeat_spin.setToolTip("Debounce: quiet time before firing again. Capped rate: minimum time between fires.")
+        repeat_layout.addWidget(self.repeat_spin)
+        layout.addLayout(repeat_layout)
+        self.on_repeat_changed()
+        self.on_gesture_changed()
+
+        # 7. Buttons
         button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         button_box.accepted.connect(self.validate_and_accept)
         button_box.rejected.connect(self.reject)
@@ -107,10 +150,17 @@ class AddHotkeyDialog(QDialog):
         if self.hotkey_data:
             # Pre-fill data
             self.trigger_input.setText(self.hotkey_data.get("trigger", ""))
+            self.sequence_cb.setChecked("," in self.hotkey_data.get("trigger", ""))
             self.target_input.setText(self.hotkey_data.get("target", ""))
             self.name_input.setText(self.hotkey_data.get("name", ""))
+            self.apps_input.setText(", ".join(self.hotkey_data.get("apps", [])))
             self.block_cb.setChecked(self.hotkey_data.get("suppress", False))
-            self.long_press_cb.setChecked(self.hotkey_data.get("long_press", False))
+            gesture = self.hotkey_data.get("gesture") or ("hold" if self.hotkey_data.get("long_press", False) else "press")
+            self.gesture_combo.setCurrentIndex(max(0, self.gesture_combo.findData(gesture)))
+            repeat_index = self.repeat_combo.findData(self.hotkey_data.get("repeat", "once"))
+            self.repeat_combo.setCurrentIndex(max(0, repeat_index))
+            if self.hotkey_data.get("repeat_ms"):
+                self.repeat_spin.setValue(int(self.hotkey_data["repeat_ms"]))
             
             # Set Type last to trigger on_type_changed correctly with data
             current_type = self.hotkey_data.get("type", "File")
@@ -139,6 +189,15 @@ class AddHotkeyDialog(QDialog):
             self.target_input.setPlaceholderText("AI Bot URL (e.g., https://chatgpt.com/)")
             self.note_label.setText("Note: This feature will launch the selected AI bot in voice mode.")
             self.note_label.setVisible(True)
+        elif text == "macro":
+            self.browse_btn.setEnabled(False)
+            self.browse_btn.setVisible(False)
+            self.target_input.setPlaceholderText("launch notepad.exe; wait Notepad; type Hello")
+            self.note_label.setText(
+                "Steps separated by ';' (';;' for a literal semicolon): launch <command>, open <url>, "
+                "focus <title>, wait <title> [ms], type <text>, snippet <trigger>, send <keys>, delay <ms>. "
+                "Press the hotkey again to cancel a running macro.")
+            self.note_label.setVisible(True)
         else: # focus
             self.browse_btn.setEnabled(False)
             self.browse_btn.setVisible(False)
@@ -146,6 +205,22 @@ class AddHotkeyDialog(QDialog):
 
             self.target_input.setPlaceholderText("Window Title to match")
 
+    def on_repeat_changed(self, index=None):
+        # The interval only means something for the throttling policies
+        self.repeat_spin.setEnabled(self.repeat_combo.currentData() in ("debounce", "rate"))
+
+    def on_gesture_changed(self, index=None):
+        gesture = self.gesture_combo.currentData()
+        # Taps never block the key, and only a plain press auto-repeats
+        tap = gesture in ("tap", "double_tap")
+        self.block_cb.setEnabled(not tap)
+        if tap:
+            self.block_cb.setChecked(False)
+        self.repeat_combo.setEnabled(gesture == "press")
+        self.on_repeat_changed()
+        if gesture != "press":
+            self.repeat_spin.setEnabled(False)
+
     # def on_long_press_toggled(self, checked):
     #     if checked:
     #         self.block_cb.setChecked(True)
@@ -171,6 +246,15 @@ class AddHotkeyDialog(QDialog):
         if not self.target_input.text().strip():
             QMessageBox.warning(self, "Validation Error", "Target is required.")
             return
+        if self.type_combo.currentText() == "macro":
+            try:
+                compile_macro(self.target_input.text())
+            except ValueError as e:
+                QMessageBox.warning(self, "Validation Error", f"Invalid macro: {e}")
+                return
+        if "," in self.trigger_input.text() and self.gesture_combo.currentData() != "press":
+            QMessageBox.warning(self, "Validation Error", f"{self.gesture_combo.currentText()} cannot be used with a multi-step sequence.")
+            return
         self.accept()
 
     def get_data(self):
@@ -179,8 +263,12 @@ class AddHotkeyDialog(QDialog):
             "type": self.type_combo.currentText(),
             "target": self.target_input.text().strip(),
             "name": self.name_input.text().strip(),
+            "apps": [app.strip() for app in self.apps_input.text().split(",") if app.strip()],
             "suppress": self.block_cb.isChecked(),
-            "long_press": self.long_press_cb.isChecked()
+            "long_press": self.gesture_combo.currentData() == "hold",
+            "gesture": self.gesture_combo.currentData(),
+            "repeat": self.repeat_combo.currentData(),
+            "repeat_ms": self.repeat_spin.value() if self.repeat_spin.isEnabled() else 0
         }
 
     def mousePressEvent(self, event):
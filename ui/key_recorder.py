@@ -3,11 +3,19 @@ from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QKeyEvent, QKeySequence
 
 class KeyRecorder(QLineEdit):
+    MAX_STROKES = 4 # Longest multi-step sequence we record
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setPlaceholderText("Click here and press keys...")
         self.setReadOnly(True) # Prevent manual typing
         self.held_keys = set()
+
+        # Sequence mode records several chords in a row, e.g. "ctrl+k, ctrl+c".
+        # A chord is committed once all its keys are released.
+        self.sequence_mode = False
+        self.strokes = []
+        self.current_chord = ""
         
         # Map certain keys to names compatible with 'keyboard' library
         self.key_map = {
@@ -29,7 +37,10 @@ class KeyRecorder(QLineEdit):
             Qt.Key.Key_Left: "left",
             Qt.Key.Key_Right: "right",
             Qt.Key.Key_Up: "up",
-            Qt.Key.Key_Down: "down"
+            Qt.Key.Key_Down: "down",
+            # ',' and '+' are separators in trigger strings
+            Qt.Key.Key_Comma: "comma",
+            Qt.Key.Key_Plus: "plus"
         }
 
     def keyPressEvent(self, event: QKeyEvent):
@@ -51,6 +62,9 @@ class KeyRecorder(QLineEdit):
             key_name = QKeySequence(key).toString().lower()
 
         if key_name:
+            if self.sequence_mode and not self.held_keys and len(self.strokes) >= self.MAX_STROKES:
+                # Sequence is full: start over
+                self.strokes = []
             self.held_keys.add(key_name)
             self.update_display()
             
@@ -66,6 +80,11 @@ class KeyRecorder(QLineEdit):
 
         if key_name in self.held_keys:
             self.held_keys.remove(key_name)
+
+        if self.sequence_mode and not self.held_keys and self.current_chord:
+            # All keys of this stroke released: commit it, the next press starts a new one
+            self.strokes.append(self.current_chord)
+            self.current_chord = ""
             
         # NOTE: We do NOT update display on release.
         # This allows the user to release keys and the last full combo remains.
@@ -95,7 +114,23 @@ class KeyRecorder(QLineEdit):
         
         final_parts = presence_mods + others
         if final_parts:
-            self.setText("+".join(final_parts))
+            chord = "+".join(final_parts)
+            if self.sequence_mode:
+                self.current_chord = chord
+                self.setText(", ".join(self.strokes + [chord]))
+            else:
+                self.setText(chord)
+
+    def set_sequence_mode(self, enabled):
+        self.sequence_mode = enabled
+        self.strokes = []
+        self.current_chord = ""
+
+    def focusInEvent(self, event):
+        # Clicking back into the recorder starts a fresh sequence
+        self.strokes = []
+        self.current_chord = ""
+        super().focusInEvent(event)
 
     def focusOutEvent(self, event):
         # Reset held keys when losing focus to prevent getting stuck
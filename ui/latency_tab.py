@@ -0,0 +1,130 @@
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QLabel,
+                             QAbstractItemView, QComboBox, QFileDialog, QMessageBox)
+from PyQt6.QtCore import Qt
+from latency_stats import STAGES, STAGE_LABELS
+
+class LatencyTab(QWidget):
+    def __init__(self, hotkey_manager, text_expander=None, parent=None):
+        super().__init__(parent)
+        self.hotkey_manager = hotkey_manager
+        self.text_expander = text_expander
+        self.latency_stats = hotkey_manager.latency
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 12, 0, 12)
+
+        # Stage selector
+        stage_layout = QHBoxLayout()
+        stage_layout.addWidget(QLabel("Stage:"))
+        self.stage_combo = QComboBox()
+        for stage in STAGES:
+            self.stage_combo.addItem(STAGE_LABELS[stage], stage)
+        self.stage_combo.setCurrentIndex(STAGES.index("total"))
+        self.stage_combo.currentIndexChanged.connect(self.refresh_table)
+        stage_layout.addWidget(self.stage_combo)
+        stage_layout.addStretch()
+        layout.addLayout(stage_layout)
+
+        # Action executor counters
+        self.actions_label = QLabel()
+        self.actions_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.actions_label)
+
+        # Text expansion edit queue counters
+        self.edits_label = QLabel()
+        self.edits_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.edits_label)
+        self.edits_label.setVisible(self.text_expander is not None)
+
+        # Table
+        self.table = QTableWidget()
+        self.table.setColumnCount(7)
+        self.table.setHorizontalHeaderLabels(["Kind", "Name", "Count", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Coalesced"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        # Buttons
+        btn_layout = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.refresh_table)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset_stats)
+        dump_btn = QPushButton("Dump to JSON")
+        dump_btn.clicked.connect(self.dump_json)
+
+        btn_layout.addWidget(refresh_btn)
+        btn_layout.addWidget(reset_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(dump_btn)
+        layout.addLayout(btn_layout)
+
+        self.refresh_table()
+
+    def showEvent(self, event):
+        # Numbers change all the time; refresh whenever the tab is shown
+        super().showEvent(event)
+        self.refresh_table()
+
+    def refresh_table(self):
+        stats = self.hotkey_manager.get_action_stats()
+        self.actions_label.setText(
+            f"Actions: {stats['queued']} queued, {stats['running']} running, "
+            f"{stats['completed']} completed, {stats['failed']} failed, {stats['dropped']} dropped"
+        )
+
+        if self.text_expander is not None:
+            edits = self.text_expander.get_edit_stats()
+            latency = edits["latency"]
+            p50 = "-" if latency["p50_ms"] is None else f"{latency['p50_ms']:.2f}"
+            p95 = "-" if latency["p95_ms"] is None else f"{latency['p95_ms']:.2f}"
+            self.edits_label.setText(
+                f"Expansions: {edits['queued']} queued (max {edits['max_queued']}), "
+                f"{edits['completed']} done in {edits['injected']} edits ({edits['coalesced']} coalesced), "
+                f"{edits['failed']} failed, p50 {p50} ms / p95 {p95} ms to inject"
+            )
+
+        stage = self.stage_combo.currentData()
+        rows = self.latency_stats.rows(stage)
+
+        # Events swallowed by each binding's repeat policy, including bindings
+        # that never got as far as running an action
+        coalesced = self.hotkey_manager.get_coalesced_counts()
+        timed = {name for kind, name, _ in rows if kind == "Binding"}
+        empty = {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+        rows += [("Binding", name, empty) for name in sorted(coalesced) if name not in timed]
+        self.table.setRowCount(len(rows))
+
+        def fmt(value):
+            return "-" if value is None else f"{value:.2f}"
+
+        for i, (kind, name, summary) in enumerate(rows):
+            self.table.setItem(i, 0, QTableWidgetItem(kind))
+            self.table.setItem(i, 1, QTableWidgetItem(name))
+            count_item = QTableWidgetItem(str(summary["count"]))
+            count_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table.setItem(i, 2, count_item)
+            for col, key in ((3, "p50_ms"), (4, "p95_ms"), (5, "p99_ms")):
+                item = QTableWidgetItem(fmt(summary[key]))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(i, col, item)
+            coalesced_item = QTableWidgetItem(str(coalesced.get(name, 0)) if kind == "Binding" else "-")
+            coalesced_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table.setItem(i, 6, coalesced_item)
+
+    def reset_stats(self):
+        self.latency_stats.clear()
+        self.refresh_table()
+
+    def dump_json(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Dump Latency Stats", "latency.json", "JSON Files (*.json)")
+        if file_path:
+            success, msg = self.latency_stats.dump_json(file_path)
+            if success:
+                QMessageBox.information(self, "Success", "Latency stats written successfully!")
+            else:
+                QMessageBox.critical(self, "Error", msg)
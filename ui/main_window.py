@@ -117,15 +117,21 @@ from startup_manager import StartupManager
 from ui.text_expansion_tab import TextExpansionTab
 from ui.workspaces_tab import WorkspacesTab
 from ui.windows_shortcuts_tab import WindowsShortcutsTab
+from ui.latency_tab import LatencyTab
 from ui.blur_effect import apply_blur, apply_acrylic_blur, GRADIENT_DEEP_BLUE, remove_blur
 from ui.themes import THEMES
 from PyQt6.QtCore import QFileSystemWatcher
 from context_menu_manager import ContextMenuManager
+from hotkey_conflicts import build_conflict_index
+from usage_stats import format_last_used
+
+# Usage columns of the hotkey table, and the sort index a click on their header applies
+HOTKEY_USAGE_COLUMNS = {5: 4, 6: 6} # Uses: most used, Last Used: most recent
 
 class MainWindow(QMainWindow):
     # Signals to communicate with the controller/main logic
     start_listener_signal = pyqtSignal(bool) # True = start, False = stop
-    add_hotkey_signal = pyqtSignal(str, str, str, bool, bool, str) # trigger, type, target, suppress, long_press, name
+    add_hotkey_signal = pyqtSignal(dict) # AddHotkeyDialog.get_data()
     remove_hotkey_signal = pyqtSignal(int)
     toggle_hotkey_signal = pyqtSignal(int, bool)
     update_hotkey_signal = pyqtSignal(int, dict)
@@ -133,10 +139,12 @@ class MainWindow(QMainWindow):
     close_to_tray_signal = pyqtSignal()
     import_config_signal = pyqtSignal()
 
-    def __init__(self, config_manager, workspace_manager=None):
+    def __init__(self, config_manager, workspace_manager=None, hotkey_manager=None, text_expander=None):
         super().__init__()
         self.config_manager = config_manager
         self.workspace_manager = workspace_manager
+        self.hotkey_manager = hotkey_manager
+        self.text_expander = text_expander
         self.setWindowTitle("Global Hotkey Manager")
         self.resize(600, 555)
         self.startup_manager = StartupManager()
@@ -232,6 +240,9 @@ class MainWindow(QMainWindow):
             ("Z → A",  1),
             ("Newest", 2),
             ("Active", 3),
+            ("Most Used", 4),
+            ("Most Saved", 5),
+            ("Recent", 6),
         ]
         self._current_sort_index = 0
 
@@ -262,6 +273,7 @@ class MainWindow(QMainWindow):
 
         # Tab 2: Text Expansion
         self.text_expansion_tab = TextExpansionTab(self.config_manager)
+        self.text_expansion_tab.sort_requested.connect(self.set_sorting)
         self.tabs.addTab(self.text_expansion_tab, "Text Expansion")
 
         # Tab 3: Workspaces
@@ -278,6 +290,11 @@ class MainWindow(QMainWindow):
         self.settings_tab = QWidget()
         self.init_settings_tab()
         self.tabs.addTab(self.settings_tab, "Settings")
+
+        # Tab 6: Hotkey Latency (p50/p95/p99 per binding and action type)
+        if self.hotkey_manager:
+            self.latency_tab = LatencyTab(self.hotkey_manager, self.text_expander)
+            self.tabs.addTab(self.latency_tab, "Latency")
         
         # DEBUG: Force switch to Text Expansion tab
         # self.tabs.setCurrentIndex(1)
@@ -316,6 +333,60 @@ class MainWindow(QMainWindow):
         lp_layout.addWidget(self.lp_label)
         layout.addLayout(lp_layout)
 
+        # Multi-step Sequence Timeout
+        seq_layout = QHBoxLayout()
+        seq_layout.addWidget(QLabel("Sequence Timeout (ms):"))
+        self.seq_slider = QSlider(Qt.Orientation.Horizontal)
+        self.seq_slider.setRange(300, 3000)
+        self.seq_slider.setSingleStep(100)
+        current_seq = self.config_manager.get_sequence_timeout()
+        self.seq_slider.setValue(current_seq)
+        self.seq_slider.valueChanged.connect(self.on_sequence_timeout_changed)
+        seq_layout.addWidget(self.seq_slider)
+        self.seq_label = QLabel(f"{current_seq} ms")
+        seq_layout.addWidget(self.seq_label)
+        layout.addLayout(seq_layout)
+
+        # Tap / Double-Tap Timing
+        tap_layout = QHBoxLayout()
+        tap_layout.addWidget(QLabel("Tap Timeout (ms):"))
+        self.tap_slider = QSlider(Qt.Orientation.Horizontal)
+        self.tap_slider.setRange(100, 600)
+        self.tap_slider.setSingleStep(25)
+        current_tap = self.config_manager.get_tap_timeout()
+        self.tap_slider.setValue(current_tap)
+        self.tap_slider.valueChanged.connect(self.on_tap_timeout_changed)
+        tap_layout.addWidget(self.tap_slider)
+        self.tap_label = QLabel(f"{current_tap} ms")
+        tap_layout.addWidget(self.tap_label)
+        layout.addLayout(tap_layout)
+
+        dtap_layout = QHBoxLayout()
+        dtap_layout.addWidget(QLabel("Double-Tap Interval (ms):"))
+        self.dtap_slider = QSlider(Qt.Orientation.Horizontal)
+        self.dtap_slider.setRange(100, 800)
+        self.dtap_slider.setSingleStep(25)
+        current_dtap = self.config_manager.get_double_tap_interval()
+        self.dtap_slider.setValue(current_dtap)
+        self.dtap_slider.valueChanged.connect(self.on_double_tap_interval_changed)
+        dtap_layout.addWidget(self.dtap_slider)
+        self.dtap_label = QLabel(f"{current_dtap} ms")
+        dtap_layout.addWidget(self.dtap_label)
+        layout.addLayout(dtap_layout)
+
+        # Snippet Autocomplete
+        ac_layout = QHBoxLayout()
+        ac_layout.addWidget(QLabel("Suggest Snippets After (chars):"))
+        self.ac_slider = QSlider(Qt.Orientation.Horizontal)
+        self.ac_slider.setRange(0, 8)
+        current_ac = self.config_manager.get_autocomplete_min_chars()
+        self.ac_slider.setValue(current_ac)
+        self.ac_slider.valueChanged.connect(self.on_autocomplete_min_chars_changed)
+        ac_layout.addWidget(self.ac_slider)
+        self.ac_label = QLabel(self._autocomplete_text(current_ac))
+        ac_layout.addWidget(self.ac_label)
+        layout.addLayout(ac_layout)
+
         layout.addSpacing(20)
 
         # Appearance Section
@@ -445,12 +516,25 @@ class MainWindow(QMainWindow):
         search_layout.addWidget(self.sort_btn)
         
         layout.addWidget(search_container)
+
+        # Conflict summary (hidden when there are none)
+        self.conflict_label = QLabel()
+        self.conflict_label.setStyleSheet("color: #e67e22;")
+        self.conflict_label.setWordWrap(True)
+        self.conflict_label.setVisible(False)
+        layout.addWidget(self.conflict_label)
         
         # Table
         self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["Active", "Trigger", "Type", "Target", "Name"])
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setColumnCount(7)
+        self.table.setHorizontalHeaderLabels(["Active", "Trigger", "Type", "Target", "Name", "Uses", "Last Used"])
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        for col in HOTKEY_USAGE_COLUMNS:
+            header.setSectionResizeMode(col, QHeaderView.ResizeMode.ResizeToContents)
+        # Clicking a usage column header sorts by it
+        header.sectionClicked.connect(
+            lambda col: self.set_sorting(HOTKEY_USAGE_COLUMNS[col]) if col in HOTKEY_USAGE_COLUMNS else None)
         self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.table.cellDoubleClicked.connect(self.edit_hotkey)
@@ -477,6 +561,15 @@ class MainWindow(QMainWindow):
     def refresh_table(self):
         hotkeys = self.config_manager.get_hotkeys()
         self.table.setRowCount(len(hotkeys))
+        if self.hotkey_manager:
+            # The hotkeys may have been edited, sorted or reloaded since the
+            # manager last built its index; rebuild it so both show the same
+            self.hotkey_manager.invalidate_conflicts()
+            conflicts = self.hotkey_manager.get_conflicts()
+        else:
+            conflicts = build_conflict_index(hotkeys, self.config_manager.get_workspaces())
+        self.update_conflict_label(conflicts)
+        usage = self.config_manager.get_hotkey_usage()
         
         for i, hk in enumerate(hotkeys):
             # Active Checkbox
@@ -493,7 +586,12 @@ class MainWindow(QMainWindow):
             cb_layout.setContentsMargins(0, 0, 0, 0)
 
             self.table.setCellWidget(i, 0, cb_widget)
-            self.table.setItem(i, 1, QTableWidgetItem(hk["trigger"]))
+            trigger_item = QTableWidgetItem(hk["trigger"])
+            messages = conflicts.messages_for_hotkey(i)
+            if messages:
+                trigger_item.setIcon(QApplication.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxWarning))
+                trigger_item.setToolTip("\n".join(messages))
+            self.table.setItem(i, 1, trigger_item)
             self.table.setItem(i, 2, QTableWidgetItem(hk["type"]))
             self.table.setItem(i, 3, QTableWidgetItem(hk["target"]))
             
@@ -516,6 +614,21 @@ class MainWindow(QMainWindow):
                 
             self.table.setItem(i, 4, QTableWidgetItem(display_name))
 
+            used = usage.get(hk["trigger"])
+            uses_item = QTableWidgetItem(str(used.count if used else 0))
+            uses_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table.setItem(i, 5, uses_item)
+            self.table.setItem(i, 6, QTableWidgetItem(format_last_used(used.last_used if used else None)))
+
+    def update_conflict_label(self, conflicts):
+        if not len(conflicts):
+            self.conflict_label.setVisible(False)
+            return
+        count = len(conflicts)
+        self.conflict_label.setText(f"\u26a0 {count} hotkey conflict{'s' if count != 1 else ''} (hover the marked triggers for details)")
+        self.conflict_label.setToolTip("\n".join(conflicts.messages()))
+        self.conflict_label.setVisible(True)
+
     def filter_hotkeys(self, text):
         text = text.lower()
         for i in range(self.table.rowCount()):
@@ -550,14 +663,7 @@ class MainWindow(QMainWindow):
         dialog = AddHotkeyDialog(self)
         if dialog.exec():
             data = dialog.get_data()
-            self.add_hotkey_signal.emit(
-                data["trigger"], 
-                data["type"], 
-                data["target"], 
-                data["suppress"],
-                data.get("long_press", False),
-                data.get("name", "")
-            )
+            self.add_hotkey_signal.emit(data)
             self.refresh_table()
 
     def remove_selected_hotkey(self):
@@ -658,9 +764,8 @@ class MainWindow(QMainWindow):
             }
         """)
 
-        labels = ["⇅  A → Z", "⇅  Z → A", "⇅  Newest", "⇅  Active"]
-        for i, label in enumerate(labels):
-            action = menu.addAction(label)
+        for label, i in self._sort_options:
+            action = menu.addAction(f"⇅  {label}")
             action.setCheckable(True)
             action.setChecked(i == self._current_sort_index)
             action.setData(i)
@@ -671,11 +776,13 @@ class MainWindow(QMainWindow):
         action_chosen = menu.exec(pos)
         
         if action_chosen:
-            idx = action_chosen.data()
-            short = ["A → Z", "Z → A", "Newest", "Active"][idx]
-            self.sort_btn.setText(f"⇅ {short}")
-            self._current_sort_index = idx
-            self.apply_sorting(idx)
+            self.set_sorting(action_chosen.data())
+
+    def set_sorting(self, index):
+        label = next(label for label, i in self._sort_options if i == index)
+        self.sort_btn.setText(f"⇅ {label}")
+        self._current_sort_index = index
+        self.apply_sorting(index)
 
     def apply_sorting(self, index):
         current_widget = self.tabs.currentWidget()
@@ -690,6 +797,14 @@ class MainWindow(QMainWindow):
                 hotkeys.sort(key=lambda x: x.get("created_at", 0), reverse=True)
             elif index == 3:
                 hotkeys.sort(key=lambda x: x.get("active", True), reverse=True)
+            elif index in (4, 5, 6):
+                # Hotkeys save no typing of their own, so Most Saved ranks by uses too
+                usage = self.config_manager.get_hotkey_usage()
+                field = "last_used" if index == 6 else "count"
+                def used(hk):
+                    counter = usage.get(hk["trigger"])
+                    return (getattr(counter, field) or 0) if counter else 0
+                hotkeys.sort(key=used, reverse=True)
             self.refresh_table()
 
         elif current_widget == self.text_expansion_tab:
@@ -861,6 +976,34 @@ class MainWindow(QMainWindow):
         self.lp_label.setText(f"{value} ms")
         self.refresh_table() # Might need to refresh if we display delay somewhere, but mostly for backend logic
 
+    def on_sequence_timeout_changed(self, value):
+        self.config_manager.set_sequence_timeout(value)
+        self.seq_label.setText(f"{value} ms")
+        self._apply_timeouts()
+
+    def on_tap_timeout_changed(self, value):
+        self.config_manager.set_tap_timeout(value)
+        self.tap_label.setText(f"{value} ms")
+        self._apply_timeouts()
+
+    def on_double_tap_interval_changed(self, value):
+        self.config_manager.set_double_tap_interval(value)
+        self.dtap_label.setText(f"{value} ms")
+        self._apply_timeouts()
+
+    def _apply_timeouts(self):
+        # Takes effect on the next keystroke, without a reload
+        if self.hotkey_manager:
+            self.hotkey_manager.apply_timeouts()
+
+    @staticmethod
+    def _autocomplete_text(value):
+        return f"{value} chars" if value else "Off"
+
+    def on_autocomplete_min_chars_changed(self, value):
+        self.config_manager.set_autocomplete_min_chars(value)
+        self.ac_label.setText(self._autocomplete_text(value))
+
     def on_switch_workspace(self, workspace_id):
         if self.workspace_manager:
             self.workspace_manager.switch_to_workspace(workspace_id)
@@ -0,0 +1,76 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QListWidget, QListWidgetItem
+from PyQt6.QtCore import Qt, QPoint, QTimer, pyqtSignal
+from PyQt6.QtGui import QCursor
+
+from utils import get_caret_position
+
+# Characters of the replacement shown next to each trigger
+PREVIEW_LENGTH = 40
+# Hide the popup when nothing is typed for this long (ms)
+IDLE_HIDE_MS = 8000
+
+class SnippetPopup(QWidget):
+    """
+    Autocomplete list shown near the caret while a trigger prefix is typed.
+    It never takes focus, so typing continues in the target app; clicking a
+    candidate emits snippet_chosen(trigger).
+    """
+    snippet_chosen = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowFlags(Qt.WindowType.ToolTip | Qt.WindowType.FramelessWindowHint |
+                            Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.WindowDoesNotAcceptFocus)
+        self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.list = QListWidget()
+        self.list.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.list.setStyleSheet("""
+            QListWidget { background-color: #2b2b2b; color: #f0f0f0; border: 1px solid #555; font-size: 12px; }
+            QListWidget::item { padding: 3px 8px; }
+            QListWidget::item:hover { background-color: #3d6fb4; }
+        """)
+        self.list.itemClicked.connect(self.on_item_clicked)
+        layout.addWidget(self.list)
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.hide)
+
+    def show_candidates(self, candidates):
+        """candidates: list of (trigger, replacement); an empty list hides the popup."""
+        if not candidates:
+            self.hide()
+            return
+        self.list.clear()
+        for trigger, replacement in candidates:
+            preview = replacement.replace("\n", " ")
+            if len(preview) > PREVIEW_LENGTH:
+                preview = preview[:PREVIEW_LENGTH - 1] + "…"
+            item = QListWidgetItem(f"{trigger}  —  {preview}")
+            item.setData(Qt.ItemDataRole.UserRole, trigger)
+            self.list.addItem(item)
+
+        row_height = self.list.sizeHintForRow(0)
+        self.list.setFixedHeight(row_height * len(candidates) + 2 * self.list.frameWidth())
+        self.setFixedWidth(max(220, self.list.sizeHintForColumn(0) + 24))
+        self.move(self._anchor())
+        self.show()
+        self.idle_timer.start(IDLE_HIDE_MS)
+
+    def _anchor(self):
+        # Just below the caret of the focused app, or the mouse if it has none
+        caret = get_caret_position()
+        if caret is None:
+            return QCursor.pos() + QPoint(12, 16)
+        x, y = caret
+        screen = self.screen()
+        ratio = screen.devicePixelRatio() if screen else 1.0
+        return QPoint(int(x / ratio), int(y / ratio) + 4)
+
+    def on_item_clicked(self, item):
+        self.hide()
+        self.snippet_chosen.emit(item.data(Qt.ItemDataRole.UserRole))
@@ -2,12 +2,27 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QTableWidget, QTableWidgetItem, QHeaderView, 
                              QAbstractItemView, QInputDialog, QMessageBox, QCheckBox, QLineEdit)
 from PyQt6.QtCore import Qt, pyqtSignal
+from snippet_templates import compile_template
+from usage_stats import format_last_used
+
+# Characters of each replacement shown in the table
+PREVIEW_LENGTH = 100
+
+# Label shown for each expansion mode, in the order offered
+MODE_LABELS = {
+    "delimiter": "After a delimiter (space, enter, punctuation)",
+    "immediate": "Immediately when typed",
+}
+
+# Usage columns, and the sort_snippets index a click on their header applies
+USAGE_COLUMNS = {4: 4, 5: 5, 6: 6} # Uses: most used, Saved: most saved, Last Used: most recent
 
 class TextExpansionTab(QWidget):
-    add_snippet_signal = pyqtSignal(str, str) # trigger, replacement
+    add_snippet_signal = pyqtSignal(str, str, str) # trigger, replacement, mode
     remove_snippet_signal = pyqtSignal(int)
     toggle_snippet_signal = pyqtSignal(int, bool)
-    update_snippet_signal = pyqtSignal(int, str, str) # index, trigger, replacement
+    update_snippet_signal = pyqtSignal(int, str, str, str) # index, trigger, replacement, mode
+    sort_requested = pyqtSignal(int) # sort index picked by clicking a column header
 
     def __init__(self, config_manager, parent=None):
         super().__init__(parent)
@@ -26,9 +41,13 @@ class TextExpansionTab(QWidget):
 
         # Table
         self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Active", "Trigger", "Replacement"])
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setColumnCount(7)
+        self.table.setHorizontalHeaderLabels(["Active", "Trigger", "Replacement", "Expands", "Uses", "Saved", "Last Used"])
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        for col in USAGE_COLUMNS:
+            header.setSectionResizeMode(col, QHeaderView.ResizeMode.ResizeToContents)
+        header.sectionClicked.connect(self.on_header_clicked)
         self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.table.cellDoubleClicked.connect(self.prompt_edit_snippet)
@@ -49,12 +68,15 @@ class TextExpansionTab(QWidget):
 
     def refresh_table(self):
         snippets = self.config_manager.get_snippets()
+        # Bodies stay in the snippet store; the table shows their start
+        previews = self.config_manager.get_snippet_previews(PREVIEW_LENGTH)
+        usage = self.config_manager.get_snippet_usage()
         self.table.setRowCount(len(snippets))
         
         for i, s in enumerate(snippets):
             # Active Checkbox
             active_cb = QCheckBox()
-            active_cb.setChecked(s.get("active", True))
+            active_cb.setChecked(s.active)
             active_cb.clicked.connect(lambda checked, r=i: self.table.selectRow(r))
             active_cb.stateChanged.connect(lambda state, idx=i: self.emit_toggle(idx, state))
             
@@ -66,17 +88,27 @@ class TextExpansionTab(QWidget):
             cb_layout.setContentsMargins(0, 0, 0, 0)
 
             self.table.setCellWidget(i, 0, cb_widget)
-            self.table.setItem(i, 1, QTableWidgetItem(s["trigger"]))
-            self.table.setItem(i, 2, QTableWidgetItem(s["replacement"]))
+            self.table.setItem(i, 1, QTableWidgetItem(s.trigger))
+            self.table.setItem(i, 2, QTableWidgetItem(previews.get(s.id, "").replace("\n", " ")))
+            self.table.setItem(i, 3, QTableWidgetItem("Immediately" if s.mode == "immediate" else "On delimiter"))
+
+            used = usage.get(s.trigger.lower())
+            for col, value in ((4, used.count if used else 0), (5, used.saved if used else 0)):
+                item = QTableWidgetItem(str(value))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(i, col, item)
+            self.table.setItem(i, 6, QTableWidgetItem(format_last_used(used.last_used if used else None)))
+
+    def on_header_clicked(self, column):
+        if column in USAGE_COLUMNS:
+            self.sort_requested.emit(USAGE_COLUMNS[column])
 
     def filter_snippets(self, text):
-        text = text.lower()
+        # Searches triggers and whole replacements in the store, not just the previews
+        snippets = self.config_manager.get_snippets()
+        matches = self.config_manager.search_snippets(text) if text else None
         for i in range(self.table.rowCount()):
-            match = False
-            # Check Trigger (col 1) and Replacement (col 2)
-            if (text in self.table.item(i, 1).text().lower() or 
-                text in self.table.item(i, 2).text().lower()):
-                match = True
+            match = matches is None or (i < len(snippets) and snippets[i].id in matches)
             self.table.setRowHidden(i, not match)
 
     def emit_toggle(self, index, state):
@@ -87,10 +119,13 @@ class TextExpansionTab(QWidget):
         trigger, ok = QInputDialog.getText(self, "Add Snippet", "Enter Trigger (e.g., 'omw'):")
         if not ok or not trigger: return
         
-        replacement, ok = QInputDialog.getText(self, "Add Snippet", "Enter Replacement Text:")
-        if not ok or not replacement: return
+        replacement = self.prompt_replacement("Add Snippet", "")
+        if not replacement: return
+
+        mode = self.prompt_mode("Add Snippet", "delimiter")
+        if mode is None: return
         
-        self.add_snippet_signal.emit(trigger, replacement)
+        self.add_snippet_signal.emit(trigger, replacement, mode)
         self.refresh_table()
 
     def prompt_edit_snippet(self, row, column):
@@ -98,15 +133,39 @@ class TextExpansionTab(QWidget):
         if 0 <= row < len(snippets):
             s = snippets[row]
             
-            trigger, ok = QInputDialog.getText(self, "Edit Snippet", "Enter Trigger:", text=s["trigger"])
+            trigger, ok = QInputDialog.getText(self, "Edit Snippet", "Enter Trigger:", text=s.trigger)
             if not ok or not trigger: return
             
-            replacement, ok = QInputDialog.getText(self, "Edit Snippet", "Enter Replacement Text:", text=s["replacement"])
-            if not ok or not replacement: return
+            replacement = self.prompt_replacement("Edit Snippet", self.config_manager.get_snippet_text(s) or "")
+            if not replacement: return
+
+            mode = self.prompt_mode("Edit Snippet", s.mode)
+            if mode is None: return
             
-            self.update_snippet_signal.emit(row, trigger, replacement)
+            self.update_snippet_signal.emit(row, trigger, replacement, mode)
             self.refresh_table()
 
+    def prompt_replacement(self, title, text):
+        # Asks again until the template parses, keeping what was typed
+        while True:
+            text, ok = QInputDialog.getText(self, title,
+                                            "Enter Replacement Text (placeholders such as {date}, {cursor} or {shell:cmd} allowed):",
+                                            text=text)
+            if not ok or not text: return None
+            try:
+                compile_template(text)
+                return text
+            except ValueError as e:
+                QMessageBox.warning(self, "Invalid Replacement", str(e))
+
+    def prompt_mode(self, title, current):
+        modes = list(MODE_LABELS)
+        labels = [MODE_LABELS[m] for m in modes]
+        label, ok = QInputDialog.getItem(self, title, "Expand:", labels,
+                                         modes.index(current) if current in modes else 0, False)
+        if not ok: return None
+        return modes[labels.index(label)]
+
     def remove_selected(self):
         row = self.table.currentRow()
         if row >= 0:
@@ -120,18 +179,26 @@ class TextExpansionTab(QWidget):
         # 1: Trigger (Z-A)
         # 2: Date Added (Newest First)
         # 3: Active Status
-        snippets = self.config_manager.get_snippets()
+        # 4: Most Used
+        # 5: Most Keystrokes Saved
+        # 6: Recently Used
+        snippets = list(self.config_manager.get_snippets())
         
         if index == 0:
-            snippets.sort(key=lambda x: x["trigger"].lower())
+            snippets.sort(key=lambda x: x.trigger.lower())
         elif index == 1:
-            snippets.sort(key=lambda x: x["trigger"].lower(), reverse=True)
+            snippets.sort(key=lambda x: x.trigger.lower(), reverse=True)
         elif index == 2:
-            snippets.sort(key=lambda x: x.get("created_at", 0), reverse=True)
+            snippets.sort(key=lambda x: x.created_at or 0, reverse=True)
         elif index == 3:
-            snippets.sort(key=lambda x: x.get("active", True), reverse=True)
-            
-        elif index == 3:
-            snippets.sort(key=lambda x: x.get("active", True), reverse=True)
-            
+            snippets.sort(key=lambda x: x.active, reverse=True)
+        elif index in (4, 5, 6):
+            usage = self.config_manager.get_snippet_usage()
+            field = {4: "count", 5: "saved", 6: "last_used"}[index]
+            def used(s):
+                counter = usage.get(s.trigger.lower())
+                return (getattr(counter, field) or 0) if counter else 0
+            snippets.sort(key=used, reverse=True)
+
+        self.config_manager.reorder_snippets(snippets)
         self.refresh_table()
@@ -0,0 +1,143 @@
+"""
+Usage counters for snippets and hotkeys.
+
+For each snippet and hotkey: how often it was used, when last, and (for
+snippets) how many keystrokes it saved: the characters it inserted minus
+the keys typed to trigger it.
+
+record() only updates a dict in memory, so it is safe to call from the
+keyboard hook. Listeners hear about every use as it is recorded (the
+autocomplete ranking is built from these counts, not kept separately). A background thread writes the counters in one batch to
+their own file (usage_stats.json next to config.json, never config.json
+itself) every FLUSH_INTERVAL seconds when something changed, and close()
+writes whatever is left. Writes go to a temporary file that then replaces
+the old one, so a crash mid-write cannot lose the existing counters.
+"""
+import json
+import os
+import threading
+import time
+
+FLUSH_INTERVAL = 30.0 # seconds between writes, if anything changed
+
+KIND_SNIPPET = "snippet" # keyed by lower-cased trigger
+KIND_HOTKEY = "hotkey" # keyed by trigger
+KINDS = (KIND_SNIPPET, KIND_HOTKEY)
+
+
+class UsageCounter:
+    __slots__ = ("count", "saved", "last_used")
+
+    def __init__(self, count=0, saved=0, last_used=None):
+        self.count = count
+        self.saved = saved # keystrokes saved in total
+        self.last_used = last_used
+
+    def to_dict(self):
+        return {"count": self.count, "saved": self.saved, "last_used": self.last_used}
+
+
+class UsageStats:
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock() # one writer of the file at a time
+        self._counters = {kind: {} for kind in KINDS} # kind -> key -> UsageCounter
+        self._dirty = False
+        self._listeners = [] # listener(kind, key, when) after each record()
+        self._load()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name="UsageStats", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            for kind in KINDS:
+                for key, c in data.get(kind, {}).items():
+                    self._counters[kind][key] = UsageCounter(c.get("count", 0), c.get("saved", 0), c.get("last_used"))
+        except (json.JSONDecodeError, IOError, AttributeError) as e:
+            print(f"WARNING: Could not read usage stats from {self.path}: {e}")
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def record(self, kind, key, saved=0, when=None):
+        """Counts one use. Memory only; written out by the background flush."""
+        if kind == KIND_SNIPPET:
+            key = key.lower()
+        when = time.time() if when is None else when
+        with self._lock:
+            counter = self._counters[kind].get(key)
+            if counter is None:
+                counter = self._counters[kind][key] = UsageCounter()
+            counter.count += 1
+            counter.saved += max(0, saved)
+            counter.last_used = when
+            self._dirty = True
+        for listener in list(self._listeners):
+            listener(kind, key, when)
+
+    def get(self, kind, key):
+        """The UsageCounter of a snippet trigger or hotkey trigger, or None if never used."""
+        if kind == KIND_SNIPPET:
+            key = key.lower()
+        with self._lock:
+            return self._counters[kind].get(key)
+
+    def snapshot(self, kind):
+        """key -> UsageCounter copy for every used snippet or hotkey (for tables)."""
+        with self._lock:
+            return {key: UsageCounter(c.count, c.saved, c.last_used) for key, c in self._counters[kind].items()}
+
+    def clear(self):
+        with self._lock:
+            for counters in self._counters.values():
+                counters.clear()
+            self._dirty = True
+        self.flush()
+
+    def flush(self):
+        """Writes the counters if they changed since the last write."""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return True
+                data = {kind: {key: c.to_dict() for key, c in counters.items()}
+                        for kind, counters in self._counters.items()}
+                self._dirty = False
+            # Serialized outside the counter lock, so record() never waits on the disk
+            temp_path = self.path + ".tmp"
+            try:
+                with open(temp_path, "w") as f:
+                    json.dump(data, f, indent=4)
+                os.replace(temp_path, self.path)
+                return True
+            except OSError as e:
+                print(f"ERROR writing usage stats: {e}")
+                with self._lock:
+                    self._dirty = True # try again next time
+                return False
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+def format_last_used(timestamp):
+    if not timestamp:
+        return "-"
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
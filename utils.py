@@ -1,14 +1,13 @@
-import win32gui
-import win32con
-import win32clipboard
-import subprocess
 import subprocess
 import os
 
-def focus_window(window_title):
+def find_window(window_title):
     """
-    Finds a window by partial title match and brings it to the foreground.
+    Returns the handle of the first visible window whose title contains
+    window_title (case-insensitive), or None.
     """
+    import win32gui
+
     def callback(hwnd, handles):
         if win32gui.IsWindowVisible(hwnd):
             title = win32gui.GetWindowText(hwnd)
@@ -18,9 +17,17 @@ def focus_window(window_title):
 
     handles = []
     win32gui.EnumWindows(callback, handles)
+    return handles[0] if handles else None
+
+def focus_window(window_title):
+    """
+    Finds a window by partial title match and brings it to the foreground.
+    """
+    import win32gui
+    import win32con
 
-    if handles:
-        target_hwnd = handles[0] # Pick the first match
+    target_hwnd = find_window(window_title) # Pick the first match
+    if target_hwnd:
         # If minimized, restore it
         if win32gui.IsIconic(target_hwnd):
             win32gui.ShowWindow(target_hwnd, win32con.SW_RESTORE)
@@ -74,6 +81,8 @@ def set_clipboard(text):
     """
     Sets the clipboard content to the given text using win32clipboard.
     """
+    import win32clipboard
+
     try:
         win32clipboard.OpenClipboard()
         win32clipboard.EmptyClipboard()
@@ -87,3 +96,30 @@ def set_clipboard(text):
         except:
             pass
         return False
+
+def get_caret_position():
+    """
+    Screen position (physical pixels) of the bottom-left of the text caret in
+    the foreground window, or None if that window shows no caret.
+    """
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class GUITHREADINFO(ctypes.Structure):
+            _fields_ = [("cbSize", wintypes.DWORD), ("flags", wintypes.DWORD),
+                        ("hwndActive", wintypes.HWND), ("hwndFocus", wintypes.HWND),
+                        ("hwndCapture", wintypes.HWND), ("hwndMenuOwner", wintypes.HWND),
+                        ("hwndMoveSize", wintypes.HWND), ("hwndCaret", wintypes.HWND),
+                        ("rcCaret", wintypes.RECT)]
+
+        info = GUITHREADINFO(cbSize=ctypes.sizeof(GUITHREADINFO))
+        user32 = ctypes.windll.user32
+        thread_id = user32.GetWindowThreadProcessId(user32.GetForegroundWindow(), None)
+        if not user32.GetGUIThreadInfo(thread_id, ctypes.byref(info)) or not info.hwndCaret:
+            return None
+        point = wintypes.POINT(info.rcCaret.left, info.rcCaret.bottom)
+        user32.ClientToScreen(info.hwndCaret, ctypes.byref(point))
+        return point.x, point.y
+    except Exception:
+        return None
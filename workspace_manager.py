@@ -68,5 +68,5 @@ class WorkspaceManager:
         # For now, let's assume we store the current workspace ID in a runtime state
         self.hotkey_manager.set_current_workspace(workspace_id)
         
-        # Determine if we need to reload hotkeys
-        # HotkeyManager.set_current_workspace should trigger a reload if necessary
+        # No reload needed: HotkeyManager keeps a precompiled table per workspace
+        # and set_current_workspace just swaps the active one